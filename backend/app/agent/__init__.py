@@ -3,6 +3,7 @@
 from app.agent.builder import AgentBuilder
 from app.agent.mcp import get_mcp_server_configs, create_mcp_client, get_mcp_tools
 from app.agent.memory import create_postgres_checkpointer, get_history
+from app.agent.providers import get_chat_model, register_provider
 
 __all__ = [
     "AgentBuilder",
@@ -11,5 +12,7 @@ __all__ = [
     "get_mcp_tools",
     "create_postgres_checkpointer",
     "get_history",
+    "get_chat_model",
+    "register_provider",
 ]
 
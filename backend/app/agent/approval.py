@@ -0,0 +1,186 @@
+"""Server-side tool approval policies evaluated in the tool_approval node."""
+
+import fnmatch
+import json
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.tool_policy import ToolPolicyRule
+from app.schemas.tool_policy import ArgCondition, PolicyDecision, ToolPolicyRuleRead
+
+logger = logging.getLogger(__name__)
+
+# Rules of the same scope and priority are tried strictest first
+_SEVERITY = {"deny": 2, "review": 1, "allow": 0}
+
+# Enabled rules of all threads, reloaded after a write or once the TTL expires
+_rules_cache: Optional[List[ToolPolicyRuleRead]] = None
+_rules_loaded_at = 0.0
+
+_MISSING = object()
+
+
+def tool_server(tool_name: str) -> Optional[str]:
+    """
+    Get the MCP server of a tool from the prefix MCP clients add to tool names.
+
+    Both "mcp__github__create_issue" and "github__create_issue" belong to "github".
+
+    Args:
+        tool_name: Tool name as bound to the model.
+
+    Returns:
+        Server name, or None for tools without a server prefix.
+    """
+    parts = tool_name.split("__")
+    if len(parts) >= 3 and parts[0] == "mcp":
+        return parts[1]
+    if len(parts) >= 2:
+        return parts[0]
+    return None
+
+
+def _arg_value(args: Dict[str, Any], path: str) -> Any:
+    """Resolve a dotted path (with list indexes) in tool call arguments."""
+    value: Any = args
+    for key in path.split("."):
+        if isinstance(value, dict) and key in value:
+            value = value[key]
+        elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        else:
+            return _MISSING
+    return value
+
+
+def _condition_matches(condition: ArgCondition, args: Dict[str, Any]) -> Optional[bool]:
+    """Evaluate a condition; None if the argument is too long to search with its pattern."""
+    value = _arg_value(args, condition.arg)
+    if value is _MISSING:
+        matched = False
+    elif condition.pattern is not None:
+        text = value if isinstance(value, str) else json.dumps(value)
+        # Matching runs on the event loop: bound its cost
+        if len(text) > settings.tool_policy_max_match_length:
+            return None
+        matched = re.search(condition.pattern, text) is not None
+    else:
+        matched = value == condition.equals
+    return matched != condition.negate
+
+
+def rule_matches(rule: ToolPolicyRuleRead, tool_name: str, args: Dict[str, Any]) -> bool:
+    """
+    Check whether a rule applies to a tool call.
+
+    Args:
+        rule: Policy rule.
+        tool_name: Name of the called tool.
+        args: Arguments of the call.
+
+    Returns:
+        True if the tool pattern, server and every argument condition match. A
+        pattern condition on an argument longer than TOOL_POLICY_MAX_MATCH_LENGTH
+        is not searched: it fails closed, matching for deny and review rules only.
+    """
+    if not fnmatch.fnmatchcase(tool_name, rule.tool):
+        return False
+    if rule.server is not None and tool_server(tool_name) != rule.server:
+        return False
+    results = [_condition_matches(c, args) for c in rule.conditions or []]
+    if False in results:
+        return False
+    if None in results:
+        return rule.action != "allow"
+    return True
+
+
+class ToolPolicy:
+    """
+    Ordered approval rules for the tool calls of one thread.
+
+    The first matching rule decides: thread overrides before global rules, then
+    higher priority first, then the stricter action. Calls no rule matches get
+    the default action.
+    """
+
+    def __init__(self, rules: Sequence[ToolPolicyRuleRead] = (), default_action: str = "review"):
+        """
+        Initialize the policy.
+
+        Args:
+            rules: Rules for the thread (global rules and its overrides).
+            default_action: Action for calls no rule matches.
+        """
+        self.rules = sorted(
+            (r for r in rules if r.enabled),
+            key=lambda r: (r.thread_id is None, -r.priority, -_SEVERITY[r.action]),
+        )
+        self.default_action = default_action
+
+    def evaluate(
+        self,
+        tool_name: str,
+        args: Optional[Dict[str, Any]],
+        default_action: Optional[str] = None,
+    ) -> PolicyDecision:
+        """
+        Decide whether a tool call is allowed, denied or needs human review.
+
+        Args:
+            tool_name: Name of the called tool.
+            args: Arguments of the call.
+            default_action: Overrides the policy default (e.g. "allow" when all
+                tools are auto-approved); explicit rules still apply.
+
+        Returns:
+            The decision and the rule that made it (None for the default).
+        """
+        for rule in self.rules:
+            if rule_matches(rule, tool_name, args or {}):
+                return PolicyDecision(action=rule.action, rule_id=rule.id, reason=rule.reason)
+        return PolicyDecision(action=default_action or self.default_action)
+
+
+async def _get_rules() -> List[ToolPolicyRuleRead]:
+    """Get all enabled rules, from the cache while it is fresh."""
+    global _rules_cache, _rules_loaded_at
+
+    if _rules_cache is not None and time.monotonic() - _rules_loaded_at < settings.tool_policy_cache_ttl:
+        return _rules_cache
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(ToolPolicyRule).where(ToolPolicyRule.enabled == True)  # noqa: E712
+        )
+        rules = [ToolPolicyRuleRead.model_validate(row) for row in result.scalars().all()]
+
+    _rules_cache, _rules_loaded_at = rules, time.monotonic()
+    logger.debug(f"Loaded {len(rules)} tool policy rules")
+    return rules
+
+
+async def load_tool_policy(thread_id: str) -> ToolPolicy:
+    """
+    Get the tool approval policy of a thread (global rules and its overrides).
+
+    Args:
+        thread_id: Thread ID.
+
+    Returns:
+        Policy for the thread's tool calls.
+    """
+    rules = await _get_rules()
+    return ToolPolicy([r for r in rules if r.thread_id is None or r.thread_id == thread_id])
+
+
+def invalidate_tool_policies() -> None:
+    """Drop cached rules so the next run reloads them (called after rule writes)."""
+    global _rules_cache
+    _rules_cache = None
@@ -1,16 +1,20 @@
 """Agent builder for creating LangGraph StateGraph with tool approval workflow."""
 
 import logging
-from typing import List, Optional, Literal
+from typing import List, Optional, Literal, Set
 
 from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import SystemMessage, ToolMessage, AIMessage
 from langchain_core.tools import BaseTool
 from langgraph.graph import StateGraph, MessagesState, END, START
 from langgraph.prebuilt import ToolNode
 from langgraph.checkpoint.base import BaseCheckpointSaver
-from langgraph.types import Command, interrupt
+from langgraph.types import Command, Send, interrupt
+from langgraph.utils.runnable import RunnableCallable
 
+from app.agent.approval import ToolPolicy
+from app.schemas.tool_policy import PolicyDecision
 from app.agent.prompt import get_system_prompt
 
 logger = logging.getLogger(__name__)
@@ -22,12 +26,20 @@ class AgentBuilder:
     
     The agent follows this flow:
     START → agent → tool_approval (if tools needed) → tools → agent → END
+    
+    One compiled graph serves every model, tool selection and approval mode: a run
+    may override them through config["configurable"]:
+    
+    - "llm": chat model to call instead of the builder's model.
+    - "tools": names of the enabled tools (all of them when missing or empty);
+      calls to other tools are denied in the approval node.
+    - "approve_all_tools": auto-approve tool calls that no policy rule matches.
     """
     
     def __init__(
         self,
         tools: List[BaseTool],
-        llm: BaseChatModel,
+        llm: Optional[BaseChatModel] = None,
         prompt: str = "",
         checkpointer: Optional[BaseCheckpointSaver] = None,
         approve_all_tools: bool = False,
@@ -36,22 +48,34 @@ class AgentBuilder:
         Initialize the agent builder.
         
         Args:
-            tools: List of tools available to the agent.
-            llm: Language model to use for the agent.
+            tools: List of tools available to the agent (runs may enable a subset).
+            llm: Default language model; without one, every run must pass config["configurable"]["llm"].
             prompt: System prompt for the agent.
             checkpointer: Checkpointer for state persistence.
-            approve_all_tools: If True, auto-approve all tool calls without human review.
+            approve_all_tools: Default for auto-approving tool calls that no policy rule matches.
         """
-        if not llm:
-            raise ValueError("Language model (llm) is required")
-        
         self.tools = tools or []
+        self.tools_by_name = {t.name: t for t in self.tools}
         self.tool_node = ToolNode(self.tools)
         self.system_prompt = get_system_prompt(prompt)
         self.model = llm
         self.checkpointer = checkpointer
         self.approve_all_tools = approve_all_tools
     
+    def _enabled_tool_names(self, config: RunnableConfig) -> Optional[Set[str]]:
+        """Names of the tools a run enabled, or None when all tools are enabled."""
+        names = (config or {}).get("configurable", {}).get("tools")
+        return set(names) if names else None
+    
+    def _enabled_tools(self, config: RunnableConfig) -> List[BaseTool]:
+        """Tools bound to the model for a run, in registration order."""
+        names = self._enabled_tool_names(config)
+        if names is None:
+            return self.tools
+        # Not the set's order: it varies between processes (string hashing), and the
+        # bound tool list is part of the provider's prompt prefix
+        return [t for t in self.tools if t.name in names]
+    
     def _should_approve_tool(self, state: MessagesState) -> Literal["tool_approval", "__end__"]:
         """
         Conditional edge: determine if we need tool approval or can end.
@@ -75,104 +99,171 @@ class AgentBuilder:
         
         return END
     
-    def _approve_tool_call(self, state: MessagesState) -> Command:
+    def _review_tool_call(self, tool_call: dict) -> dict:
         """
-        Tool approval node: pause for human review unless auto-approval enabled.
+        Pause for human review of one tool call.
         
         Args:
-            state: Current graph state.
+            tool_call: Tool call to review.
             
         Returns:
-            Command to continue to tools, update and continue, or return to agent.
+            The review: {"action": "continue" | "update" | "feedback" | "deny", "data": ...}.
         """
-        # If auto-approve is enabled, skip human review
-        if self.approve_all_tools:
-            return Command(goto="tools")
+        human_review = interrupt(
+            {
+                "question": "Is this correct?",
+                "toolCall": {
+                    "id": tool_call["id"],
+                    "name": tool_call["name"],
+                    "args": tool_call["args"],
+                },
+            }
+        )
+        return {
+            "action": human_review.get("action", "continue"),
+            "data": human_review.get("data", {}),
+        }
+    
+    def _approve_tool_call(self, state: MessagesState, config: RunnableConfig) -> Command:
+        """
+        Tool approval node: apply the tool policy, pausing for human review where required.
+        
+        Each tool call of the last AI message is allowed, denied or reviewed according
+        to the policy in config["configurable"]["tool_policy"] (every call is reviewed
+        when there is none, or allowed when the run auto-approves all tools). Calls to
+        tools the run did not enable are denied. Denied calls and review feedback become
+        tool messages instead of being executed.
         
+        Args:
+            state: Current graph state.
+            config: Run config carrying the thread's tool policy and run options.
+            
+        Returns:
+            Command to run the approved calls, or to return to the agent if none were.
+        """
         messages = state["messages"]
         last_message = messages[-1]
         
-        if (
+        if not (
             isinstance(last_message, AIMessage)
             and hasattr(last_message, "tool_calls")
             and last_message.tool_calls
             and len(last_message.tool_calls) > 0
         ):
-            tool_call = last_message.tool_calls[-1]
-            
-            # Interrupt for human review
-            human_review = interrupt(
-                {
-                    "question": "Is this correct?",
-                    "toolCall": {
-                        "id": tool_call["id"],
-                        "name": tool_call["name"],
-                        "args": tool_call["args"],
-                    },
-                }
-            )
+            # No tool calls found, return to agent
+            return Command(goto="agent")
+        
+        configurable = config.get("configurable", {})
+        policy = configurable.get("tool_policy") or ToolPolicy()
+        approve_all = configurable.get("approve_all_tools", self.approve_all_tools)
+        default_action = "allow" if approve_all else None
+        enabled = self._enabled_tool_names(config)
+        
+        final_calls = []
+        approved = []
+        tool_messages = []
+        args_updated = False
+        
+        for tool_call in last_message.tool_calls:
+            if enabled is not None and tool_call["name"] not in enabled:
+                decision = PolicyDecision(action="deny", reason=f"{tool_call['name']} is not enabled")
+            else:
+                decision = policy.evaluate(tool_call["name"], tool_call["args"], default_action)
             
-            review_action = human_review.get("action", "continue")
-            review_data = human_review.get("data", {})
+            if decision.action == "allow":
+                review = {"action": "continue", "data": {}}
+            elif decision.action == "deny":
+                review = {"action": "deny", "data": {"reason": decision.reason or "Denied by policy"}}
+            else:
+                # Interrupt for human review
+                review = self._review_tool_call(tool_call)
             
-            if review_action == "continue":
-                # Approve and continue to tools
-                return Command(goto="tools")
+            review_action = review["action"]
+            review_data = review["data"]
             
-            elif review_action == "update":
+            if review_action == "update":
                 # Update tool call arguments and continue
-                updated_message = AIMessage(
-                    content=last_message.content,
-                    tool_calls=[
-                        {
-                            "id": tool_call["id"],
-                            "name": tool_call["name"],
-                            "args": review_data,
-                        }
-                    ],
-                    id=last_message.id,
-                )
-                return Command(
-                    goto="tools",
-                    update={"messages": [updated_message]},
-                )
+                tool_call = {**tool_call, "args": review_data}
+                args_updated = True
+            final_calls.append(tool_call)
+            
+            if review_action in ("continue", "update"):
+                approved.append(tool_call)
             
             elif review_action == "feedback":
-                # Send feedback and return to agent
-                tool_message = ToolMessage(
+                # Send feedback to the agent instead of running the tool
+                tool_messages.append(ToolMessage(
                     name=tool_call["name"],
                     content=str(review_data),
                     tool_call_id=tool_call["id"],
-                )
-                return Command(
-                    goto="agent",
-                    update={"messages": [tool_message]},
-                )
+                ))
             
-            raise ValueError(f"Invalid review action: {review_action}")
+            elif review_action == "deny":
+                reason = (review_data or {}).get("reason") or "Denied by the user"
+                logger.info(f"Denied tool call {tool_call['name']} ({tool_call['id']}): {reason}")
+                tool_messages.append(ToolMessage(
+                    name=tool_call["name"],
+                    content=f"Tool call denied: {reason}",
+                    tool_call_id=tool_call["id"],
+                    status="error",
+                ))
+            
+            else:
+                raise ValueError(f"Invalid review action: {review_action}")
+        
+        update_messages = []
+        if args_updated:
+            update_messages.append(AIMessage(
+                content=last_message.content,
+                tool_calls=final_calls,
+                id=last_message.id,
+            ))
+        update_messages.extend(tool_messages)
+        update = {"messages": update_messages} if update_messages else None
+        
+        if not approved:
+            return Command(goto="agent", update=update)
+        if not tool_messages:
+            return Command(goto="tools", update=update)
+        # Some calls were denied: run only the approved ones
+        return Command(goto=[Send("tools", approved)], update=update)
+    
+    def _bound_model(self, state: MessagesState, config: RunnableConfig):
+        """The run's language model with its enabled tools bound, and its input messages."""
+        model = config.get("configurable", {}).get("llm") or self.model
+        if not model or not hasattr(model, "bind_tools"):
+            raise ValueError("Invalid or missing language model (llm)")
+        
+        # Add system prompt (not duplicated in messages)
+        messages = [SystemMessage(content=self.system_prompt), *state["messages"]]
         
-        # No tool calls found, return to agent
-        return Command(goto="agent")
+        return model.bind_tools(self._enabled_tools(config)), messages
     
-    def _call_model(self, state: MessagesState) -> dict:
+    def _call_model(self, state: MessagesState, config: RunnableConfig) -> dict:
         """
-        Agent node: call the language model with tools bound.
+        Agent node: call the run's language model with its enabled tools bound.
         
         Args:
             state: Current graph state.
+            config: Run config, optionally carrying the model and tool selection.
             
         Returns:
             Updated state with AI response.
         """
-        if not self.model or not hasattr(self.model, "bind_tools"):
-            raise ValueError("Invalid or missing language model (llm)")
+        model_with_tools, messages = self._bound_model(state, config)
+        response = model_with_tools.invoke(messages)
         
-        # Add system prompt (not duplicated in messages)
-        messages = [SystemMessage(content=self.system_prompt), *state["messages"]]
+        return {"messages": [response]}
+    
+    async def _acall_model(self, state: MessagesState, config: RunnableConfig) -> dict:
+        """
+        Agent node for async runs (astream/ainvoke).
         
-        # Bind tools and invoke model
-        model_with_tools = self.model.bind_tools(self.tools)
-        response = model_with_tools.invoke(messages)
+        Runs on the event loop instead of an executor thread, so cancelling the run
+        also cancels the in-flight provider request.
+        """
+        model_with_tools, messages = self._bound_model(state, config)
+        response = await model_with_tools.ainvoke(messages)
         
         return {"messages": [response]}
     
@@ -187,7 +278,7 @@ class AgentBuilder:
         state_graph = StateGraph(MessagesState)
         
         # Add nodes
-        state_graph.add_node("agent", self._call_model)
+        state_graph.add_node("agent", RunnableCallable(self._call_model, self._acall_model, name="agent", trace=False))
         state_graph.add_node("tools", self.tool_node)
         state_graph.add_node("tool_approval", self._approve_tool_call)
         
@@ -206,6 +297,6 @@ class AgentBuilder:
         # Compile with checkpointer
         compiled_graph = state_graph.compile(checkpointer=self.checkpointer)
         
-        logger.info(f"Agent built with {len(self.tools)} tools, approve_all={self.approve_all_tools}")
+        logger.info(f"Agent built with {len(self.tools)} tools, approve_all={self.approve_all_tools} by default")
         return compiled_graph
 
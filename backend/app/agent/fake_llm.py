@@ -0,0 +1,203 @@
+"""Deterministic offline chat model for load tests and local development."""
+
+import asyncio
+import json
+import random
+import time
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+from urllib.parse import parse_qs
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import BaseTool
+
+# Prefix selecting the fake provider in the `model` option
+FAKE_MODEL_PREFIX = "fake:"
+
+# Named latency profiles (milliseconds)
+LATENCY_PROFILES: Dict[str, Dict[str, float]] = {
+    "instant": {"ttft_ms": 0, "itl_ms": 0},
+    "fast": {"ttft_ms": 50, "itl_ms": 5},
+    "realistic": {"ttft_ms": 400, "itl_ms": 25},
+    "slow": {"ttft_ms": 1500, "itl_ms": 60},
+}
+
+# Vocabulary for generated answers
+_WORDS = (
+    "the agent graph streams tokens while tools run and checkpoints persist state "
+    "across threads so every answer stays consistent under load with low latency"
+).split()
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that streams deterministic text with configurable latency.
+
+    Each call follows a script of steps, one step per model call within the current
+    turn (the messages after the last human message). A step is either "text" (a
+    generated answer) or "tool:<name>" (a tool call to <name>; a bare "tool" calls
+    the first bound tool). Once the script is exhausted the model answers with text.
+    """
+
+    ttft_ms: float = 0
+    """Delay before the first token, in milliseconds."""
+
+    itl_ms: float = 0
+    """Delay between consecutive tokens, in milliseconds."""
+
+    tokens: int = 20
+    """Number of tokens in generated text answers."""
+
+    script: List[str] = ["text"]
+    """Steps emitted by successive model calls within a turn."""
+
+    seed: int = 0
+    """Seed mixed with the last human message to pick the generated words."""
+
+    bound_tools: List[str] = []
+    """Names of the tools bound with bind_tools."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "FakeChatModel":
+        """Return a copy of the model that knows the names of the bound tools."""
+        names = [t.name if isinstance(t, BaseTool) else getattr(t, "__name__", str(t)) for t in tools]
+        return self.model_copy(update={"bound_tools": names})
+
+    def _plan(self, messages: List[BaseMessage]) -> tuple[int, str, str]:
+        """Return (step index, step, last human text) for the current call."""
+        step_index = 0
+        human_text = ""
+        for message in reversed(messages):
+            if message.type == "human":
+                human_text = message.content if isinstance(message.content, str) else ""
+                break
+            if message.type == "ai":
+                step_index += 1
+
+        step = self.script[step_index] if step_index < len(self.script) else "text"
+        return step_index, step, human_text
+
+    def _chunks(self, messages: List[BaseMessage]) -> List[AIMessageChunk]:
+        """Build the chunks streamed for one model call."""
+        step_index, step, human_text = self._plan(messages)
+        digest = zlib.crc32(f"{self.seed}:{human_text}".encode())
+
+        if step.startswith("tool"):
+            name = step.partition(":")[2] or (self.bound_tools[0] if self.bound_tools else "echo")
+            args = json.dumps({"input": human_text[:100]})
+            call_id = f"call_{digest:08x}_{step_index}"
+            # Stream the arguments in pieces, like real providers do
+            middle = len(args) // 2
+            return [
+                AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[{"name": name, "args": args[:middle], "id": call_id, "index": 0}],
+                ),
+                AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[{"name": None, "args": args[middle:], "id": None, "index": 0}],
+                ),
+            ]
+
+        rng = random.Random(digest + step_index)
+        return [
+            AIMessageChunk(content=("" if i == 0 else " ") + rng.choice(_WORDS))
+            for i in range(self.tokens)
+        ]
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        for index, message in enumerate(self._chunks(messages)):
+            delay = self.ttft_ms if index == 0 else self.itl_ms
+            if delay:
+                time.sleep(delay / 1000)
+
+            chunk = ChatGenerationChunk(message=message)
+            if run_manager:
+                run_manager.on_llm_new_token(message.content, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for index, message in enumerate(self._chunks(messages)):
+            delay = self.ttft_ms if index == 0 else self.itl_ms
+            if delay:
+                await asyncio.sleep(delay / 1000)
+
+            chunk = ChatGenerationChunk(message=message)
+            if run_manager:
+                await run_manager.on_llm_new_token(message.content, chunk=chunk)
+            yield chunk
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        merged: Optional[AIMessageChunk] = None
+        for chunk in self._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            merged = chunk.message if merged is None else merged + chunk.message
+
+        message = AIMessage(
+            content=merged.content if merged else "",
+            tool_calls=merged.tool_calls if merged else [],
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def create_fake_model(model: str) -> FakeChatModel:
+    """
+    Create a fake chat model from a model name.
+
+    Format: ``fake:<profile>[?ttft_ms=..&itl_ms=..&tokens=..&script=..&seed=..]`` where
+    profile is one of LATENCY_PROFILES and script is a comma-separated list of steps,
+    e.g. ``fake:realistic?tokens=200&script=tool:search,text``.
+
+    Args:
+        model: Model name starting with FAKE_MODEL_PREFIX.
+
+    Returns:
+        Configured FakeChatModel.
+
+    Raises:
+        ValueError: If the profile or a parameter is invalid.
+    """
+    profile, _, query = model[len(FAKE_MODEL_PREFIX):].partition("?")
+    profile = profile or "instant"
+
+    if profile not in LATENCY_PROFILES:
+        raise ValueError(
+            f"Unknown fake model profile '{profile}', expected one of {sorted(LATENCY_PROFILES)}"
+        )
+
+    options: Dict[str, Any] = dict(LATENCY_PROFILES[profile])
+    for key, values in parse_qs(query).items():
+        value = values[-1]
+        if key in ("ttft_ms", "itl_ms"):
+            options[key] = float(value)
+        elif key in ("tokens", "seed"):
+            options[key] = int(value)
+        elif key == "script":
+            options[key] = [step.strip() for step in value.split(",") if step.strip()]
+        else:
+            raise ValueError(f"Unknown fake model parameter '{key}'")
+
+    return FakeChatModel(**options)
@@ -1,7 +1,7 @@
 """MCP (Model Context Protocol) integration for dynamic tool loading."""
 
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Sequence
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -12,6 +12,52 @@ from app.models.mcp_server import MCPServer, MCPServerType
 logger = logging.getLogger(__name__)
 
 
+def build_mcp_server_configs(servers: Sequence[MCPServer]) -> Dict[str, Dict[str, Any]]:
+    """
+    Format MCP server rows as MCP client configurations.
+    
+    Args:
+        servers: MCP server rows (typically the enabled ones).
+        
+    Returns:
+        Dictionary mapping server names to their configurations.
+    """
+    configs: Dict[str, Dict[str, Any]] = {}
+    
+    for server in servers:
+        if server.type == MCPServerType.stdio and server.command:
+            config: Dict[str, Any] = {
+                "transport": "stdio",
+                "command": server.command,
+            }
+            
+            if server.args:
+                # Ensure args is a list of strings
+                if isinstance(server.args, list):
+                    config["args"] = server.args
+                elif isinstance(server.args, dict):
+                    # Handle case where args might be stored as dict
+                    config["args"] = list(server.args.values())
+            
+            if server.env and isinstance(server.env, dict):
+                config["env"] = server.env
+            
+            configs[server.name] = config
+            
+        elif server.type == MCPServerType.http and server.url:
+            config = {
+                "transport": "http",
+                "url": server.url,
+            }
+            
+            if server.headers and isinstance(server.headers, dict):
+                config["headers"] = server.headers
+            
+            configs[server.name] = config
+    
+    return configs
+
+
 async def get_mcp_server_configs() -> Dict[str, Dict[str, Any]]:
     """
     Fetch enabled MCP servers from the database and format them for MCP client.
@@ -24,40 +70,7 @@ async def get_mcp_server_configs() -> Dict[str, Dict[str, Any]]:
             result = await session.execute(
                 select(MCPServer).where(MCPServer.enabled == True)  # noqa: E712
             )
-            servers = result.scalars().all()
-            
-            configs: Dict[str, Dict[str, Any]] = {}
-            
-            for server in servers:
-                if server.type == MCPServerType.stdio and server.command:
-                    config: Dict[str, Any] = {
-                        "transport": "stdio",
-                        "command": server.command,
-                    }
-                    
-                    if server.args:
-                        # Ensure args is a list of strings
-                        if isinstance(server.args, list):
-                            config["args"] = server.args
-                        elif isinstance(server.args, dict):
-                            # Handle case where args might be stored as dict
-                            config["args"] = list(server.args.values())
-                    
-                    if server.env and isinstance(server.env, dict):
-                        config["env"] = server.env
-                    
-                    configs[server.name] = config
-                    
-                elif server.type == MCPServerType.http and server.url:
-                    config = {
-                        "transport": "http",
-                        "url": server.url,
-                    }
-                    
-                    if server.headers and isinstance(server.headers, dict):
-                        config["headers"] = server.headers
-                    
-                    configs[server.name] = config
+            configs = build_mcp_server_configs(result.scalars().all())
             
             logger.info(f"Loaded {len(configs)} MCP server configurations")
             return configs
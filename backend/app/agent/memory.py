@@ -6,10 +6,13 @@ import asyncio
 from typing import List, Optional
 
 from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.base import CheckpointTuple
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.constants import INTERRUPT
 from psycopg_pool import AsyncConnectionPool
 
 from app.config import settings
+from app.telemetry.tracing import tracer
 
 # Fix para Windows: usar SelectorEventLoop para compatibilidad con psycopg async
 if sys.platform == 'win32':
@@ -20,6 +23,31 @@ logger = logging.getLogger(__name__)
 # Global connection pool for async checkpointer
 _connection_pool: Optional[AsyncConnectionPool] = None
 _checkpointer: Optional[AsyncPostgresSaver] = None
+_checkpointer_lock = asyncio.Lock()
+
+
+class TracedAsyncPostgresSaver(AsyncPostgresSaver):
+    """AsyncPostgresSaver that records a span for every checkpoint read and write."""
+    
+    async def aget_tuple(self, config):
+        with tracer.start_as_current_span("checkpoint.get", attributes=_span_attributes(config)):
+            return await super().aget_tuple(config)
+    
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        with tracer.start_as_current_span("checkpoint.put", attributes=_span_attributes(config)):
+            return await super().aput(config, checkpoint, metadata, new_versions)
+    
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        with tracer.start_as_current_span(
+            "checkpoint.put_writes",
+            attributes={**_span_attributes(config), "writes": len(writes)},
+        ):
+            return await super().aput_writes(config, writes, task_id, task_path)
+
+
+def _span_attributes(config) -> dict:
+    """Span attributes identifying the thread of a checkpoint operation."""
+    return {"thread_id": str(config.get("configurable", {}).get("thread_id", ""))}
 
 
 def get_connection_string() -> str:
@@ -33,6 +61,11 @@ def get_connection_string() -> str:
     return connection_string
 
 
+def get_connection_pool() -> Optional[AsyncConnectionPool]:
+    """Get the checkpointer connection pool, or None if it has not been opened yet."""
+    return _connection_pool
+
+
 async def create_postgres_checkpointer() -> AsyncPostgresSaver:
     """
     Create an AsyncPostgresSaver instance using a connection pool.
@@ -49,25 +82,66 @@ async def create_postgres_checkpointer() -> AsyncPostgresSaver:
         _connection_pool = AsyncConnectionPool(
             conninfo=connection_string,
             min_size=1,
-            max_size=10,
+            max_size=settings.checkpointer_pool_size,
+            timeout=settings.db_pool_timeout,
             kwargs={"autocommit": True},  # Required for CREATE INDEX CONCURRENTLY
+            open=False,
         )
-        await _connection_pool.open()
+        await _connection_pool.open(wait=True)
         logger.info("PostgreSQL async connection pool created")
     
     # Create async checkpointer with the pool
-    checkpointer = AsyncPostgresSaver(_connection_pool)
+    checkpointer = TracedAsyncPostgresSaver(_connection_pool)
     
-    # Setup creates the necessary tables
+    # Only run the migrations (DDL) when the schema is missing or outdated
     try:
-        await checkpointer.setup()
-        logger.info("PostgreSQL async checkpointer initialized and setup completed")
+        version = await get_checkpoint_schema_version(_connection_pool)
+        if version < len(AsyncPostgresSaver.MIGRATIONS) - 1:
+            await checkpointer.setup()
+            logger.info(f"PostgreSQL async checkpointer schema migrated from version {version}")
+        else:
+            logger.info(f"PostgreSQL async checkpointer schema is current (version {version})")
     except Exception as e:
         logger.warning(f"Checkpointer setup warning (may already exist): {e}")
     
     return checkpointer
 
 
+async def get_checkpoint_schema_version(pool: AsyncConnectionPool) -> int:
+    """
+    Read the applied checkpoint migration version without running any DDL.
+    
+    Args:
+        pool: Connection pool to query with.
+        
+    Returns:
+        Latest applied migration version, or -1 if the schema does not exist.
+    """
+    async with pool.connection() as conn:
+        result = await conn.execute("SELECT to_regclass('checkpoint_migrations')")
+        row = await result.fetchone()
+        if row is None or row[0] is None:
+            return -1
+        
+        result = await conn.execute("SELECT max(v) FROM checkpoint_migrations")
+        row = await result.fetchone()
+        return row[0] if row and row[0] is not None else -1
+
+
+async def close_checkpointer() -> None:
+    """Close the checkpointer connection pool."""
+    global _connection_pool, _checkpointer, _checkpointer_lock
+    
+    if _connection_pool is not None:
+        await _connection_pool.close()
+        logger.info("PostgreSQL async connection pool closed")
+    
+    _connection_pool = None
+    _checkpointer = None
+    # A lock that was waited on is bound to its event loop; start fresh for the next one
+    _checkpointer_lock = asyncio.Lock()
+
+
 async def get_checkpointer() -> AsyncPostgresSaver:
     """
     Get or create the global async checkpointer instance.
@@ -77,10 +151,49 @@ async def get_checkpointer() -> AsyncPostgresSaver:
     """
     global _checkpointer
     if _checkpointer is None:
-        _checkpointer = await create_postgres_checkpointer()
+        # Concurrent first callers must not create two pools
+        async with _checkpointer_lock:
+            if _checkpointer is None:
+                _checkpointer = await create_postgres_checkpointer()
     return _checkpointer
 
 
+async def prefetch_checkpoint(thread_id: str) -> Optional[CheckpointTuple]:
+    """
+    Load the latest checkpoint tuple for a thread.
+    
+    Used on the stream start-up path to check for pending interrupts while other
+    start-up work runs; it also warms a checkpointer pool connection.
+    
+    Args:
+        thread_id: The ID of the thread.
+        
+    Returns:
+        Latest checkpoint tuple, or None if the thread has no checkpoint or the read failed.
+    """
+    try:
+        checkpointer = await get_checkpointer()
+        return await checkpointer.aget_tuple({"configurable": {"thread_id": thread_id}})
+    except Exception as e:
+        logger.warning(f"Failed to prefetch checkpoint for thread {thread_id}: {e}")
+        return None
+
+
+def has_pending_interrupt(checkpoint: Optional[CheckpointTuple]) -> bool:
+    """
+    Check whether a checkpoint is paused on an interrupt awaiting resume.
+    
+    Args:
+        checkpoint: Checkpoint tuple from prefetch_checkpoint.
+        
+    Returns:
+        True if the checkpoint has a pending interrupt write.
+    """
+    if not checkpoint or not checkpoint.pending_writes:
+        return False
+    return any(channel == INTERRUPT for _, channel, _ in checkpoint.pending_writes)
+
+
 async def get_history(thread_id: str) -> List[BaseMessage]:
     """
     Retrieve the message history for a specific thread.
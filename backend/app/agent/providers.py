@@ -0,0 +1,92 @@
+"""Chat model provider registry with lazily imported backends."""
+
+from typing import Callable, List, Optional, Tuple
+
+from langchain_core.language_models import BaseChatModel
+
+from app.config import settings
+
+# Model used when a request does not specify one
+DEFAULT_MODEL = "gpt-4o-mini"
+
+ProviderFactory = Callable[[str], BaseChatModel]
+
+# Registered providers as (model name prefixes, factory), checked in registration order
+_providers: List[Tuple[Tuple[str, ...], ProviderFactory]] = []
+
+
+def register_provider(*prefixes: str) -> Callable[[ProviderFactory], ProviderFactory]:
+    """
+    Register a chat model factory for model names starting with any of the prefixes.
+
+    Factories should import their SDK inside the function body so that a provider
+    is only loaded once a model from it is first requested.
+
+    Args:
+        prefixes: Model name prefixes handled by the factory.
+
+    Returns:
+        Decorator registering the factory.
+    """
+    def decorator(factory: ProviderFactory) -> ProviderFactory:
+        _providers.append((prefixes, factory))
+        return factory
+    return decorator
+
+
+@register_provider("gpt", "o1")
+def _create_openai_model(model: str) -> BaseChatModel:
+    """Create an OpenAI chat model."""
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=model,
+        api_key=settings.openai_api_key,
+        streaming=True,
+    )
+
+
+@register_provider("gemini")
+def _create_google_model(model: str) -> BaseChatModel:
+    """Create a Google Generative AI chat model."""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=model,
+        google_api_key=settings.google_api_key,
+    )
+
+
+@register_provider("fake:")
+def _create_fake_model(model: str) -> BaseChatModel:
+    """Create a deterministic offline model (see app.agent.fake_llm)."""
+    if not settings.fake_models_enabled:
+        raise ValueError(f"Unknown model '{model}': fake models are disabled (FAKE_MODELS_ENABLED)")
+
+    from app.agent.fake_llm import create_fake_model
+
+    return create_fake_model(model)
+
+
+def get_chat_model(model: Optional[str] = None) -> BaseChatModel:
+    """
+    Create a chat model instance for a model name.
+
+    Args:
+        model: Model name (e.g., "gpt-4o-mini", "gemini-pro"). Defaults to DEFAULT_MODEL.
+
+    Returns:
+        Language model instance.
+
+    Raises:
+        ValueError: If no registered provider handles the model name.
+    """
+    model = model or DEFAULT_MODEL
+
+    for prefixes, factory in _providers:
+        if model.startswith(prefixes):
+            return factory(model)
+
+    known = ", ".join(f"{p}*" for prefixes, _ in _providers for p in prefixes)
+    raise ValueError(f"Unknown model '{model}'. Supported models: {known}")
+
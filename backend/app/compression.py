@@ -0,0 +1,242 @@
+"""Response compression negotiated from Accept-Encoding, for JSON and SSE responses."""
+
+import zlib
+from typing import Callable, Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.telemetry.metrics import COMPRESSION_BYTES
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Levels trading ratio for CPU the way interactive responses need (not archival)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+
+class Encoder:
+    """Incremental compressor of one response body."""
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress data; the output may be held back until flush() or finish()."""
+        raise NotImplementedError
+
+    def flush(self) -> bytes:
+        """Emit everything compressed so far, decodable by the client right away."""
+        raise NotImplementedError
+
+    def finish(self) -> bytes:
+        """End the compressed stream."""
+        raise NotImplementedError
+
+
+class GzipEncoder(Encoder):
+    def __init__(self):
+        self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class ZstdEncoder(Encoder):
+    def __init__(self):
+        self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+class BrotliEncoder(Encoder):
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+def available_encoders() -> Dict[str, Callable[[], Encoder]]:
+    """Encoders by content coding, limited to the installed libraries."""
+    encoders: Dict[str, Callable[[], Encoder]] = {"gzip": GzipEncoder}
+    if zstandard is not None:
+        encoders["zstd"] = ZstdEncoder
+    if brotli is not None:
+        encoders["br"] = BrotliEncoder
+    return encoders
+
+
+def negotiate_encoding(accept_encoding: str, preference: List[str]) -> Optional[str]:
+    """
+    Pick the content coding of a response.
+
+    Args:
+        accept_encoding: Accept-Encoding request header.
+        preference: Server codings in order of preference (unavailable ones are skipped).
+
+    Returns:
+        The accepted coding with the highest q-value (ties go to the server's
+        preference), or None to send the response as is.
+    """
+    encoders = available_encoders()
+    offered = [e for e in preference if e in encoders]
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in offered:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Compress JSON responses, and optionally SSE streams, in the negotiated coding.
+
+    A JSON response is compressed when its body reaches COMPRESSION_MIN_SIZE
+    bytes; smaller ones cost more CPU than they save. With COMPRESSION_SSE, every
+    frame of an event stream is compressed and flushed as it is sent, so
+    compression never holds a token back. Responses that already have a
+    Content-Encoding, and other content types, pass through.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.compression_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate_encoding(accept, settings.compression_encodings) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self.app(scope, receive, _CompressingSend(encoding, send))
+
+
+class _CompressingSend:
+    """Rewrites one response's messages; decides from its headers and first body."""
+
+    def __init__(self, encoding: str, send: Send):
+        self.encoding = encoding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.mode = "identity"
+        self.encoder: Optional[Encoder] = None
+
+    def _begin(self, headers: MutableHeaders) -> None:
+        """Switch the response to the compressed coding."""
+        self.encoder = available_encoders()[self.encoding]()
+        headers["Content-Encoding"] = self.encoding
+        if "content-length" in headers:
+            del headers["content-length"]
+
+    def _count(self, raw: int, encoded: int) -> None:
+        COMPRESSION_BYTES.labels(self.encoding, "in").inc(raw)
+        COMPRESSION_BYTES.labels(self.encoding, "out").inc(encoded)
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if "content-encoding" in headers:
+                self.mode = "identity"
+            elif content_type.startswith("application/json"):
+                self.mode = "json"
+                headers.add_vary_header("Accept-Encoding")
+            elif content_type.startswith("text/event-stream") and settings.compression_sse:
+                self.mode = "sse"
+                headers.add_vary_header("Accept-Encoding")
+                self._begin(headers)
+            else:
+                self.mode = "identity"
+
+            if self.mode == "json":
+                # Held until the first body shows whether it is worth compressing
+                self.start = message
+            else:
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.mode == "identity":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.mode == "sse":
+            # Flushed frame by frame: the client can decode each one on arrival
+            chunk = self.encoder.compress(body) + (self.encoder.flush() if more_body else self.encoder.finish())
+            self._count(len(body), len(chunk))
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+            return
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            if not more_body and len(body) < settings.compression_min_size:
+                self.mode = "identity"
+                await self.send(start)
+                await self.send(message)
+                return
+            headers = MutableHeaders(raw=start["headers"])
+            self._begin(headers)
+            if not more_body:
+                chunk = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(chunk))
+                self._count(len(body), len(chunk))
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": chunk, "more_body": False})
+                return
+            await self.send(start)
+
+        # A JSON body sent in several parts: compressed as one stream
+        chunk = self.encoder.compress(body) + (b"" if more_body else self.encoder.finish())
+        self._count(len(body), len(chunk))
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
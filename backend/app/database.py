@@ -6,8 +6,10 @@ from typing import AsyncGenerator
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import NullPool
 
 from app.config import settings
+from app.telemetry.pools import TimedAsyncQueuePool
 
 logger = logging.getLogger(__name__)
 
@@ -17,14 +19,21 @@ database_url = settings.database_url_with_ssl
 if database_url.startswith("postgresql://"):
     database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
 
+# The pool is capped at its share of the per-process connection budget (no overflow)
 engine = create_async_engine(
     database_url,
     echo=settings.environment == "development",
-    pool_size=5,
-    max_overflow=10,
+    poolclass=TimedAsyncQueuePool,
+    pool_size=settings.sqlalchemy_pool_size,
+    max_overflow=0,
+    pool_timeout=settings.db_pool_timeout,
     pool_pre_ping=True,
 )
 
+# The connection holding this worker's advisory locks stays open for the worker's
+# lifetime, so it is opened outside the pool (one connection of the budget)
+lock_engine = create_async_engine(database_url, poolclass=NullPool)
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -63,9 +72,12 @@ async def init_db() -> None:
             logger.info("Database connection established")
             
             # Import models to register them with Base
-            from app.models import thread, mcp_server  # noqa: F401
+            from app.models import (  # noqa: F401
+                thread, mcp_server, thread_search, tool_policy, pending_approval, idempotency_key,
+            )
             
-            # Create tables (in production, use Alembic migrations instead)
+            # Create tables (elsewhere the schema comes from the Prisma migrations in
+            # frontend/prisma/migrations, which must create every model imported above)
             if settings.environment == "development":
                 await conn.run_sync(Base.metadata.create_all)
                 logger.info("Database tables created")
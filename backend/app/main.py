@@ -6,12 +6,22 @@ import asyncio
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.agent.memory import close_checkpointer
+from app.compression import CompressionMiddleware
 from app.config import settings
-from app.database import init_db
-from app.routers import agent, threads, mcp_servers
+from app.database import init_db, close_db
+from app.routers import agent, threads, mcp_servers, tool_policies, approvals, admin
+from app.serialization import DefaultJSONResponse
+from app.services.idempotency import idempotency_registry
+from app.services.thread_locks import thread_locks
+from app.telemetry.loop_monitor import start_loop_monitor, stop_loop_monitor
+from app.telemetry.metrics import render_metrics
+from app.telemetry.pools import get_pool_stats
+from app.telemetry.tracing import setup_tracing, shutdown_tracing
+from app.warmup import warmup_state, start_warm_up
 
 # Fix para Windows: usar SelectorEventLoop para compatibilidad con psycopg async
 if sys.platform == 'win32':
@@ -30,13 +40,32 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     """Application lifespan manager."""
     logger.info("Starting application...")
     
+    setup_tracing()
+    
+    # Measure event-loop lag for the lifetime of the worker
+    start_loop_monitor()
+    
     # Initialize database
     await init_db()
     logger.info("Database initialized")
     
+    # Warm up checkpointer, MCP and the default agent; /ready reports 503 until done
+    if settings.warmup_on_startup:
+        start_warm_up()
+    
     yield
     
     logger.info("Shutting down application...")
+    
+    if warmup_state.task and not warmup_state.task.done():
+        warmup_state.task.cancel()
+    
+    await idempotency_registry.close()
+    await thread_locks.close()
+    await close_checkpointer()
+    await close_db()
+    await stop_loop_monitor()
+    shutdown_tracing()
 
 
 # Create FastAPI application
@@ -45,6 +74,7 @@ app = FastAPI(
     description="FastAPI backend for LangGraph.js AI Agent Template",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=DefaultJSONResponse,
 )
 
 # Configure CORS
@@ -57,10 +87,16 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Compress JSON responses (and SSE streams with COMPRESSION_SSE) for clients accepting it
+app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(agent.router, prefix="/api/agent", tags=["agent"])
 app.include_router(threads.router, prefix="/api/agent", tags=["threads"])
+app.include_router(approvals.router, prefix="/api/agent", tags=["approvals"])
 app.include_router(mcp_servers.router, prefix="/api/mcp-servers", tags=["mcp-servers"])
+app.include_router(tool_policies.router, prefix="/api/tool-policies", tags=["tool-policies"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 
 @app.get("/")
@@ -82,6 +118,32 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """Readiness check: 503 until the startup warm-up has finished."""
+    ready = warmup_state.ready or not settings.warmup_on_startup
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    
+    return {
+        "status": "ready" if ready else "warming_up",
+        "warmup": warmup_state.steps,
+    }
+
+
+@app.get("/health/pools")
+async def pool_health():
+    """Database pool utilization and connection wait-time statistics."""
+    return get_pool_stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in the text exposition format."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
 if __name__ == "__main__":
     import uvicorn
     
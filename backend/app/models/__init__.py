@@ -2,6 +2,9 @@
 
 from app.models.thread import Thread
 from app.models.mcp_server import MCPServer
+from app.models.thread_search import ThreadSearchEntry
+from app.models.tool_policy import ToolPolicyRule
+from app.models.pending_approval import PendingApproval
+from app.models.idempotency_key import IdempotencyKey
 
-__all__ = ["Thread", "MCPServer"]
-
+__all__ = ["Thread", "MCPServer", "ThreadSearchEntry", "ToolPolicyRule", "PendingApproval", "IdempotencyKey"]
@@ -0,0 +1,40 @@
+"""IdempotencyKey model recording which request claimed an idempotency key."""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    IdempotencyKey model - a key claimed by a stream request on some worker.
+    
+    The run and its frames live in the worker that claimed the key; this table
+    lets the other workers recognize the key, so a retry reaching them is not
+    executed a second time. Rows are finished when the run succeeds, deleted
+    when it fails, and taken over by the next claim once expired.
+    """
+    
+    __tablename__ = "IdempotencyKey"
+    
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String, nullable=False)
+    
+    created_at: Mapped[datetime] = mapped_column(
+        "createdAt",
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        nullable=False,
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        "finishedAt",
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    
+    def __repr__(self) -> str:
+        return f"<IdempotencyKey(key={self.key}, finished={self.finished_at is not None})>"
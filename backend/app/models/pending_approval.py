@@ -0,0 +1,46 @@
+"""PendingApproval model indexing tool calls that wait for human review."""
+
+from datetime import datetime
+from typing import Any, Dict
+from uuid import uuid4
+
+from sqlalchemy import String, DateTime, JSON, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class PendingApproval(Base):
+    """
+    PendingApproval model - a tool call a paused run waits on.
+    
+    The source of truth is the thread's checkpoint; this table mirrors its pending
+    approval interrupts so they can be listed across threads without loading any
+    checkpoint. Rows are replaced at the end of every run that starts from or
+    stops at an approval (including a resume), once its graph has streamed.
+    """
+    
+    __tablename__ = "PendingApproval"
+    
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
+    thread_id: Mapped[str] = mapped_column(
+        "threadId",
+        String,
+        ForeignKey("Thread.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    tool_call_id: Mapped[str] = mapped_column("toolCallId", String, nullable=False)
+    tool_name: Mapped[str] = mapped_column("toolName", String, nullable=False)
+    args: Mapped[Dict[str, Any]] = mapped_column(JSON, default=dict, nullable=False)
+    
+    created_at: Mapped[datetime] = mapped_column(
+        "createdAt",
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        nullable=False,
+        index=True,
+    )
+    
+    def __repr__(self) -> str:
+        return f"<PendingApproval(thread={self.thread_id}, tool={self.tool_name}, call={self.tool_call_id})>"
@@ -0,0 +1,60 @@
+"""ThreadSearchEntry model for full-text search over threads."""
+
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import String, DateTime, Text, ForeignKey, Computed, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+# Text search configuration used both for the stored vectors and for queries
+SEARCH_CONFIG = "english"
+
+# Entry id used for the row that holds the thread title
+TITLE_ENTRY_ID = "title"
+
+
+class ThreadSearchEntry(Base):
+    """
+    ThreadSearchEntry model - one searchable document per thread title or message.
+
+    The tsvector is a generated column backed by a GIN index, so search never has to
+    read LangGraph checkpoints. Title rows are weighted above message rows.
+    """
+
+    __tablename__ = "ThreadSearchEntry"
+    __table_args__ = (
+        UniqueConstraint("threadId", "messageId", name="ThreadSearchEntry_threadId_messageId_key"),
+        Index("ThreadSearchEntry_searchVector_idx", "searchVector", postgresql_using="gin"),
+    )
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
+    thread_id: Mapped[str] = mapped_column(
+        "threadId",
+        String,
+        ForeignKey("Thread.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    message_id: Mapped[str] = mapped_column("messageId", String, nullable=False)
+    role: Mapped[str] = mapped_column(String, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    search_vector: Mapped[str] = mapped_column(
+        "searchVector",
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', content), "
+            "CASE WHEN role = 'title' THEN 'A' ELSE 'B' END::\"char\")",
+            persisted=True,
+        ),
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        "createdAt",
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<ThreadSearchEntry(thread_id={self.thread_id}, message_id={self.message_id}, role={self.role})>"
@@ -0,0 +1,63 @@
+"""ToolPolicyRule model for server-side tool approval rules."""
+
+from datetime import datetime
+from enum import Enum as PyEnum
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import String, DateTime, Boolean, Enum, Integer, JSON, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ToolPolicyAction(str, PyEnum):
+    """What happens to a tool call matched by a rule."""
+    allow = "allow"
+    deny = "deny"
+    review = "review"
+
+
+class ToolPolicyRule(Base):
+    """
+    ToolPolicyRule model - one allow, deny or require-review rule for tool calls.
+    
+    Rules match on a tool name pattern, an MCP server and argument conditions.
+    Rules with a thread_id only apply to that thread and take precedence over
+    global rules.
+    """
+    
+    __tablename__ = "ToolPolicyRule"
+    
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
+    action: Mapped[ToolPolicyAction] = mapped_column(Enum(ToolPolicyAction), nullable=False)
+    tool: Mapped[str] = mapped_column(String, default="*", nullable=False)
+    server: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    conditions: Mapped[Optional[List[Dict[str, Any]]]] = mapped_column(JSON, nullable=True)
+    thread_id: Mapped[Optional[str]] = mapped_column(
+        "threadId",
+        String,
+        ForeignKey("Thread.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+    priority: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    enabled: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    reason: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    
+    created_at: Mapped[datetime] = mapped_column(
+        "createdAt",
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        "updatedAt",
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False
+    )
+    
+    def __repr__(self) -> str:
+        return f"<ToolPolicyRule(id={self.id}, action={self.action}, tool={self.tool}, thread={self.thread_id})>"
@@ -1,6 +1,5 @@
 """API route handlers."""
 
-from app.routers import agent, threads, mcp_servers
-
-__all__ = ["agent", "threads", "mcp_servers"]
+from app.routers import agent, threads, mcp_servers, tool_policies, approvals, admin
 
+__all__ = ["agent", "threads", "mcp_servers", "tool_policies", "approvals", "admin"]
@@ -0,0 +1,111 @@
+"""Admin-only diagnostics endpoints."""
+
+import asyncio
+import logging
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.config import settings
+from app.telemetry import loop_monitor as loop_monitoring
+from app.telemetry.profiler import DEFAULT_HZ, MAX_HZ, SamplingProfiler, profile_store
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Check a token against ADMIN_TOKEN; always False when no admin token is configured."""
+    return bool(settings.admin_token) and token is not None and secrets.compare_digest(
+        token, settings.admin_token
+    )
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Dependency rejecting requests without a valid X-Admin-Token header.
+
+    Raises:
+        HTTPException: 404 if admin endpoints are disabled, 403 if the token is wrong.
+    """
+    if not settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+def _profile_response(profiler: SamplingProfiler) -> PlainTextResponse:
+    """Collapsed stacks of a profile, with its metadata in headers."""
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={
+            "X-Profile-Id": profiler.id,
+            "X-Profile-Samples": str(profiler.samples),
+            "X-Profile-Duration": f"{profiler.duration:.3f}",
+        },
+    )
+
+
+@router.post("/profile", dependencies=[Depends(require_admin)])
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0, le=300, description="Sampling duration"),
+    hz: int = Query(DEFAULT_HZ, ge=1, le=MAX_HZ, description="Samples per second"),
+    all_threads: bool = Query(False, description="Sample every thread, not only the event loop"),
+):
+    """
+    Sample this worker's stacks for a number of seconds.
+
+    Returns:
+        Collapsed stacks ('frame;frame;frame count' per line) for flamegraph tools.
+    """
+    if profile_store.active is not None and profile_store.active.running:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Profile {profile_store.active.id} is already running",
+        )
+
+    profiler = SamplingProfiler(hz=hz, all_threads=all_threads).start()
+    profile_store.active = profiler
+    logger.info(f"Profiling worker for {seconds}s at {hz}Hz (profile {profiler.id})")
+
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+        profile_store.active = None
+        profile_store.add(profiler)
+
+    return _profile_response(profiler)
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_profile(profile_id: str):
+    """
+    Get a finished profile (including per-stream profiles) by id.
+
+    Raises:
+        HTTPException: If the profile does not exist or was evicted.
+    """
+    profiler = profile_store.get(profile_id)
+    if profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile {profile_id} not found",
+        )
+    return _profile_response(profiler)
+
+
+@router.get("/loop", dependencies=[Depends(require_admin)])
+async def get_loop_stats():
+    """
+    Get event-loop lag and recent blocking events of this worker.
+
+    Blocking events carry the loop thread's stack only when LOOP_DEBUG is enabled.
+    """
+    monitor = loop_monitoring.loop_monitor
+    if monitor is None:
+        return {"running": False}
+    return monitor.snapshot()
@@ -1,30 +1,124 @@
 """Agent endpoints for streaming and history."""
 
+import asyncio
 import logging
 import json
-from typing import Optional
+from contextlib import aclosing
+from typing import AsyncIterator, Optional
 
-from fastapi import APIRouter, Query, Depends
+from fastapi import APIRouter, Query, Depends, Header, HTTPException, Request, WebSocket, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.schemas.message import MessageOptions, MessageResponse
+from app.routers.admin import is_admin_token
+from app.schemas.message import HistoryResponse, MessageOptions, MessageResponse, StreamEvent
+from app.serialization import schema_response
 from app.services.agent_service import stream_response, fetch_thread_history
+from app.services.agent_session import FRAME_FORMATS, AgentSession
+from app.services.idempotency import IdempotencyKeyHeldError, IdempotencyKeyReusedError, idempotency_registry
+from app.services.run_control import RunControl
+from app.services.stream_buffer import StreamItem
+from app.services.thread_locks import thread_locks
+from app.telemetry.metrics import IDEMPOTENT_REQUESTS
+from app.telemetry.profiler import SamplingProfiler, profile_store
+from app.telemetry.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _encode_sse_frame(message_response: MessageResponse) -> str:
+    """Encode a message response as an unnamed SSE data frame."""
+    return f"data: {json.dumps(message_response.model_dump())}\n\n"
+
+
+def _encode_sse_event(stream_event: StreamEvent) -> str:
+    """Encode a stream event as a named SSE frame."""
+    return f"event: {stream_event.event}\ndata: {json.dumps(stream_event.data.model_dump())}\n\n"
+
+
+async def _cancel_on_disconnect(request: Request, control: RunControl) -> None:
+    """
+    Cancel a run as soon as its client disconnects.
+    
+    Servers implementing ASGI spec 2.4 report a disconnect to a streaming response
+    only when a write fails, which may be many seconds (a slow tool, a long time to
+    first token) after the client left.
+    """
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            if control.cancel("disconnected"):
+                logger.info("Client disconnected, cancelling its run")
+            return
+
+
+async def _encode_frames(stream: AsyncIterator[StreamItem]) -> AsyncIterator[str]:
+    """
+    Encode stream items as SSE frames.
+    
+    Args:
+        stream: Items of a run, or of the run of an idempotency key.
+        
+    Yields:
+        Unnamed frames for AI/tool message chunks and named frames for stream events.
+    """
+    # aclosing() finalizes the stream in this task (spans, metrics) even when the
+    # client goes away mid-stream
+    chunk_count = 0
+    async with aclosing(stream):
+        async for message_response in stream:
+            chunk_count += 1
+            if isinstance(message_response, StreamEvent):
+                frame = _encode_sse_event(message_response)
+            elif message_response.type in ["ai", "tool"]:
+                # Only forward AI/tool chunks
+                frame = _encode_sse_frame(message_response)
+            else:
+                continue
+            logger.debug(f"Sending chunk {chunk_count}: {frame[:100]}...")
+            yield frame
+    
+    logger.info(f"Stream completed. Sent {chunk_count} chunks.")
+
+
+def _agent_stream(
+    thread_id: str,
+    content: str,
+    opts: MessageOptions,
+    control: Optional[RunControl] = None,
+) -> AsyncIterator[StreamItem]:
+    """
+    Run the agent.
+    
+    Args:
+        thread_id: Thread ID.
+        content: User message text.
+        opts: Message options.
+        control: Cancellation handle of the run.
+        
+    Returns:
+        The run's stream items.
+    """
+    logger.info(f"Starting stream for thread={thread_id}, content={content[:50]}...")
+    return stream_response(thread_id=thread_id, user_text=content, opts=opts, control=control)
+
+
 @router.get("/stream")
 async def stream_agent_response(
+    request: Request,
     content: str = Query(..., description="User message content"),
     threadId: str = Query(..., description="Thread ID"),
     model: Optional[str] = Query(None, description="Model to use"),
     allowTool: Optional[str] = Query(None, description="Tool approval action"),
     tools: Optional[str] = Query(None, description="Comma-separated tool names"),
     approveAllTools: bool = Query(False, description="Auto-approve all tools"),
+    profile: bool = Query(False, description="Profile the worker while this stream runs (admin only)"),
+    idempotencyKey: Optional[str] = Query(None, description="Idempotency key (or the Idempotency-Key header)"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    x_admin_token: Optional[str] = Header(None),
 ):
     """
     Stream agent responses via Server-Sent Events (SSE).
@@ -36,7 +130,30 @@ async def stream_agent_response(
         - allowTool: Tool approval action ("allow" or "deny")
         - tools: Comma-separated list of specific tools to enable
         - approveAllTools: Auto-approve all tool calls without human review
+        - profile: Sample the worker's stacks for the lifetime of this stream and
+          emit an `event: profile` frame with the profile id (needs X-Admin-Token)
+        - idempotencyKey: Requests repeating a key attach to the run it started:
+          they receive its output from the start while it runs (the tokens
+          produced before they attached merged per message), and a replay of it
+          for IDEMPOTENCY_TTL seconds after it finished. Only the worker running
+          the key holds its output; the key itself is recorded in the
+          database, so a retry reaching another worker is a 409 instead of a
+          second run
+    
+    The run is cancelled when the client disconnects, except the run of an
+    idempotency key, which keeps running for the requests retrying it.
+    
+    Unnamed `data:` frames carry message chunks (tokens and completed tool call
+    messages). Named events: tool_call, tool_call_delta, approval_required,
+    tool_result, run_end, then done (or error).
+    
+    Raises:
+        HTTPException: 422 if the idempotency key was sent with a different request,
+            409 if another worker runs (or ran) it.
     """
+    if profile and not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+    
     # Parse tools parameter
     tools_list = None
     if tools:
@@ -50,54 +167,151 @@ async def stream_agent_response(
         approve_all_tools=approveAllTools,
     )
     
+    # Duplicate submissions (retries, double clicks) share one run
+    run, started = None, False
+    key = idempotency_key or idempotencyKey
+    if key:
+        fingerprint = json.dumps([threadId, content, model, opts.allow_tool, tools_list, approveAllTools])
+        try:
+            run, started = await idempotency_registry.get_or_start(
+                key, fingerprint, lambda: _agent_stream(threadId, content, opts)
+            )
+        except IdempotencyKeyReusedError as e:
+            IDEMPOTENT_REQUESTS.labels("conflict").inc()
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+        except IdempotencyKeyHeldError as e:
+            IDEMPOTENT_REQUESTS.labels("held").inc()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        
+        result = "started" if started else "replayed" if run.done else "attached"
+        IDEMPOTENT_REQUESTS.labels(result).inc()
+        logger.info(f"Idempotency key {key} for thread={threadId}: {result}")
+    
     async def event_generator():
         """Generate SSE events."""
-        try:
-            # Send initial connection message
-            yield ": connected\n\n"
-            
-            logger.info(f"Starting stream for thread={threadId}, content={content[:50]}...")
-            
-            # Stream agent responses
-            chunk_count = 0
-            async for message_response in stream_response(
-                thread_id=threadId,
-                user_text=content,
-                opts=opts,
-            ):
-                # Only forward AI/tool chunks
-                if message_response.type in ["ai", "tool"]:
-                    chunk_count += 1
-                    data = json.dumps(message_response.model_dump())
-                    logger.debug(f"Sending chunk {chunk_count}: {data[:100]}...")
-                    yield f"data: {data}\n\n"
-            
-            logger.info(f"Stream completed. Sent {chunk_count} chunks.")
+        with tracer.start_as_current_span("GET /api/agent/stream", attributes={
+            "http.route": "/api/agent/stream",
+            "thread_id": threadId,
+        }):
+            # Samples the whole worker (the event loop thread) while this stream runs
+            profiler = SamplingProfiler().start() if profile else None
+            control = RunControl() if run is None else None
+            watcher = asyncio.create_task(_cancel_on_disconnect(request, control)) if control else None
             
-            # Signal completion
-            yield "event: done\ndata: {}\n\n"
+            try:
+                # Send initial connection message
+                yield ": connected\n\n"
+                
+                # Stream agent responses, or follow the run of the idempotency key
+                stream = run.follow() if run is not None else _agent_stream(threadId, content, opts, control)
+                frames = _encode_frames(stream)
+                async with aclosing(frames):
+                    async for frame in frames:
+                        yield frame
+                
+                if profiler is not None:
+                    profile_store.add(profiler.stop())
+                    profile_data = json.dumps({"id": profiler.id, "samples": profiler.samples})
+                    yield f"event: profile\ndata: {profile_data}\n\n"
+                
+                # Signal completion
+                yield "event: done\ndata: {}\n\n"
+                
+            except Exception as e:
+                logger.error(f"Stream error: {e}", exc_info=True)
+                error_data = json.dumps({
+                    "message": str(e),
+                    "threadId": threadId,
+                })
+                yield f"event: error\ndata: {error_data}\n\n"
             
-        except Exception as e:
-            logger.error(f"Stream error: {e}", exc_info=True)
-            error_data = json.dumps({
-                "message": str(e),
-                "threadId": threadId,
-            })
-            yield f"event: error\ndata: {error_data}\n\n"
+            finally:
+                if watcher is not None:
+                    watcher.cancel()
+                if profiler is not None and profiler.running:
+                    profile_store.add(profiler.stop())
+    
+    headers = {
+        "Cache-Control": "no-cache, no-transform",
+        "Connection": "keep-alive",
+        "X-Accel-Buffering": "no",
+        "Transfer-Encoding": "chunked",
+    }
+    if run is not None and not started:
+        headers["Idempotent-Replayed"] = "true"
     
     return StreamingResponse(
         event_generator(),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache, no-transform",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-            "Transfer-Encoding": "chunked",
-        },
+        headers=headers,
+    )
+
+
+@router.websocket("/ws/{thread_id}")
+async def agent_session(
+    websocket: WebSocket,
+    thread_id: str,
+    model: Optional[str] = Query(None, description="Default model of the session's runs"),
+    tools: Optional[str] = Query(None, description="Comma-separated tool names"),
+    approveAllTools: bool = Query(False, description="Auto-approve all tools"),
+    format: str = Query("json", description="Frame format: json (text) or msgpack (binary)"),
+):
+    """
+    Bidirectional agent session on a thread over a WebSocket.
+    
+    The client sends frames `{"type": "message", "content": ...}` (optionally with
+    model, tools and approveAllTools overriding the session's), `{"type":
+    "approval", "action": "allow" | "deny"}`, `{"type": "cancel"}` and `{"type":
+    "ping"}`. The server sends `{"event": ..., "data": ...}` frames: `session` once,
+    `message` for message chunks, the named stream events, `done` or `error` after
+    each run, and `ping`/`pong` for the heartbeat.
+    
+    Frames are JSON text, or MessagePack binary frames with format=msgpack.
+    """
+    if format not in FRAME_FORMATS:
+        await websocket.close(code=1003, reason=f"format must be one of: {', '.join(FRAME_FORMATS)}")
+        return
+    
+    await websocket.accept()
+    defaults = MessageOptions(
+        model=model,
+        tools=[t.strip() for t in tools.split(",") if t.strip()] if tools else None,
+        approve_all_tools=approveAllTools,
     )
+    logger.info(f"Session opened for thread={thread_id} ({format})")
+    await AgentSession(websocket, thread_id, format, defaults).serve()
+
+
+@router.post("/cancel/{thread_id}")
+async def cancel_thread_run(thread_id: str):
+    """
+    Cancel the run in progress on a thread.
+    
+    The run stops its model request and tools, checkpoints what it streamed so far
+    and ends its stream with run_end status "cancelled". Only runs of the worker
+    serving this request can be cancelled.
+    
+    Args:
+        thread_id: Thread ID.
+        
+    Returns:
+        The thread ID and the cancellation flag.
+        
+    Raises:
+        HTTPException: 404 if the thread has no run in progress on this worker.
+    """
+    lease = thread_locks.holder(thread_id)
+    if lease is None or not lease.control.cancel("user"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No run in progress on thread {thread_id}",
+        )
+    
+    logger.info(f"Cancelled the run on thread={thread_id} by request")
+    return {"threadId": thread_id, "cancelled": True}
 
 
-@router.get("/history/{thread_id}")
+@router.get("/history/{thread_id}", response_model=HistoryResponse)
 async def get_thread_history(
     thread_id: str,
     db: AsyncSession = Depends(get_db),
@@ -112,5 +326,5 @@ async def get_thread_history(
         List of message responses.
     """
     history = await fetch_thread_history(thread_id)
-    return {"messages": history, "total": len(history)}
+    return schema_response(HistoryResponse(messages=history, total=len(history)))
 
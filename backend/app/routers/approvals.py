@@ -0,0 +1,30 @@
+"""Pending tool approval endpoints."""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.schemas.approval import PendingApprovalListResponse
+from app.services.approval_service import list_pending_approvals
+
+router = APIRouter()
+
+
+@router.get("/approvals", response_model=PendingApprovalListResponse)
+async def list_all_pending_approvals(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    List tool calls waiting for human review, across all threads.
+    
+    Args:
+        skip: Number of records to skip (pagination).
+        limit: Maximum number of records to return.
+        
+    Returns:
+        Pending approvals, oldest first, with total count.
+    """
+    approvals, total = await list_pending_approvals(db, skip=skip, limit=limit)
+    return PendingApprovalListResponse(approvals=approvals, total=total)
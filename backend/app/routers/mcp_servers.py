@@ -18,6 +18,7 @@ from app.schemas.mcp import (
     MCPToolInfo,
 )
 from app.agent.mcp import get_mcp_tools
+from app.serialization import mcp_server_reads, schema_response
 
 logger = logging.getLogger(__name__)
 
@@ -46,29 +47,12 @@ async def list_mcp_servers(
         .offset(skip)
         .limit(limit)
     )
-    servers = result.scalars().all()
+    servers = mcp_server_reads(result.scalars().all())
     
     count_result = await db.execute(select(func.count(MCPServer.id)))
     total = count_result.scalar() or 0
     
-    server_reads = [
-        MCPServerRead(
-            id=s.id,
-            name=s.name,
-            type=s.type.value,
-            enabled=s.enabled,
-            command=s.command,
-            args=s.args,
-            env=s.env,
-            url=s.url,
-            headers=s.headers,
-            createdAt=s.created_at,
-            updatedAt=s.updated_at,
-        )
-        for s in servers
-    ]
-    
-    return MCPServerListResponse(servers=server_reads, total=total)
+    return schema_response(MCPServerListResponse(servers=servers, total=total))
 
 
 @router.get("/tools", response_model=MCPToolsResponse, tags=["tools"])
@@ -122,19 +106,7 @@ async def get_mcp_server(
             detail=f"MCP Server {server_id} not found",
         )
     
-    return MCPServerRead(
-        id=server.id,
-        name=server.name,
-        type=server.type.value,
-        enabled=server.enabled,
-        command=server.command,
-        args=server.args,
-        env=server.env,
-        url=server.url,
-        headers=server.headers,
-        createdAt=server.created_at,
-        updatedAt=server.updated_at,
-    )
+    return MCPServerRead.model_validate(server)
 
 
 @router.post("", response_model=MCPServerRead, status_code=status.HTTP_201_CREATED)
@@ -184,19 +156,7 @@ async def create_mcp_server(
     
     logger.info(f"Created MCP server: {server.name}")
     
-    return MCPServerRead(
-        id=server.id,
-        name=server.name,
-        type=server.type.value,
-        enabled=server.enabled,
-        command=server.command,
-        args=server.args,
-        env=server.env,
-        url=server.url,
-        headers=server.headers,
-        createdAt=server.created_at,
-        updatedAt=server.updated_at,
-    )
+    return MCPServerRead.model_validate(server)
 
 
 @router.put("/{server_id}", response_model=MCPServerRead)
@@ -239,19 +199,7 @@ async def update_mcp_server(
     
     logger.info(f"Updated MCP server: {server.name}")
     
-    return MCPServerRead(
-        id=server.id,
-        name=server.name,
-        type=server.type.value,
-        enabled=server.enabled,
-        command=server.command,
-        args=server.args,
-        env=server.env,
-        url=server.url,
-        headers=server.headers,
-        createdAt=server.created_at,
-        updatedAt=server.updated_at,
-    )
+    return MCPServerRead.model_validate(server)
 
 
 @router.delete("/{server_id}", status_code=status.HTTP_204_NO_CONTENT)
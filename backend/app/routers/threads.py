@@ -2,11 +2,20 @@
 
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.schemas.thread import ThreadCreate, ThreadRead, ThreadUpdate, ThreadListResponse
+from app.schemas.thread import (
+    ThreadCreate,
+    ThreadRead,
+    ThreadUpdate,
+    ThreadListResponse,
+    ThreadSearchHit,
+    ThreadSearchResponse,
+)
+from app.serialization import schema_response, thread_reads
+from app.services.search_service import search_threads
 from app.services.thread_service import (
     list_threads,
     get_thread,
@@ -34,18 +43,41 @@ async def list_all_threads(
     Returns:
         List of threads with total count.
     """
-    threads = await list_threads(db, skip=skip, limit=limit)
-    thread_reads = [
-        ThreadRead(
+    threads = thread_reads(await list_threads(db, skip=skip, limit=limit))
+    
+    return schema_response(ThreadListResponse(threads=threads, total=len(threads)))
+
+
+@router.get("/threads/search", response_model=ThreadSearchResponse)
+async def search_all_threads(
+    q: str = Query(..., min_length=1, description="Search text"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of threads"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Search threads by title and message content.
+    
+    Args:
+        q: Search text (supports quoted phrases, OR and -exclusion).
+        limit: Maximum number of threads to return.
+        
+    Returns:
+        Ranked threads with highlighted snippets (matches wrapped in <mark>).
+    """
+    hits = await search_threads(db, q, limit=limit)
+    results = [
+        ThreadSearchHit(
             id=t.id,
             title=t.title,
             createdAt=t.created_at,
             updatedAt=t.updated_at,
+            rank=rank,
+            snippet=snippet,
         )
-        for t in threads
+        for t, rank, snippet in hits
     ]
     
-    return ThreadListResponse(threads=thread_reads, total=len(thread_reads))
+    return schema_response(ThreadSearchResponse(results=results, total=len(results)))
 
 
 @router.get("/threads/{thread_id}", response_model=ThreadRead)
@@ -73,12 +105,7 @@ async def get_thread_by_id(
             detail=f"Thread {thread_id} not found",
         )
     
-    return ThreadRead(
-        id=thread.id,
-        title=thread.title,
-        createdAt=thread.created_at,
-        updatedAt=thread.updated_at,
-    )
+    return ThreadRead.model_validate(thread)
 
 
 @router.post("/threads", response_model=ThreadRead, status_code=status.HTTP_201_CREATED)
@@ -97,12 +124,7 @@ async def create_new_thread(
     """
     thread = await create_thread(db, thread_data)
     
-    return ThreadRead(
-        id=thread.id,
-        title=thread.title,
-        createdAt=thread.created_at,
-        updatedAt=thread.updated_at,
-    )
+    return ThreadRead.model_validate(thread)
 
 
 @router.put("/threads/{thread_id}", response_model=ThreadRead)
@@ -132,12 +154,7 @@ async def update_thread_by_id(
             detail=f"Thread {thread_id} not found",
         )
     
-    return ThreadRead(
-        id=thread.id,
-        title=thread.title,
-        createdAt=thread.created_at,
-        updatedAt=thread.updated_at,
-    )
+    return ThreadRead.model_validate(thread)
 
 
 @router.delete("/threads/{thread_id}", status_code=status.HTTP_204_NO_CONTENT)
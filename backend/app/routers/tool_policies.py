@@ -0,0 +1,153 @@
+"""Tool approval policy CRUD endpoints."""
+
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.agent.approval import invalidate_tool_policies
+from app.database import get_db
+from app.models.thread import Thread
+from app.models.tool_policy import ToolPolicyRule
+from app.schemas.tool_policy import (
+    ToolPolicyRuleCreate,
+    ToolPolicyRuleRead,
+    ToolPolicyRuleUpdate,
+    ToolPolicyRuleListResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def _get_rule_or_404(db: AsyncSession, rule_id: str) -> ToolPolicyRule:
+    """Load a rule by ID or raise 404."""
+    result = await db.execute(
+        select(ToolPolicyRule).where(ToolPolicyRule.id == rule_id)
+    )
+    rule = result.scalar_one_or_none()
+
+    if not rule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tool policy rule {rule_id} not found",
+        )
+    return rule
+
+
+@router.get("", response_model=ToolPolicyRuleListResponse)
+async def list_tool_policy_rules(
+    threadId: Optional[str] = Query(None, description="Only this thread's overrides"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    List tool policy rules.
+
+    Args:
+        threadId: If given, list only the overrides of this thread.
+
+    Returns:
+        Rules in evaluation order within each scope, with total count.
+    """
+    query = select(ToolPolicyRule)
+    if threadId:
+        query = query.where(ToolPolicyRule.thread_id == threadId)
+
+    result = await db.execute(
+        query.order_by(ToolPolicyRule.priority.desc(), ToolPolicyRule.created_at)
+    )
+    rules = [ToolPolicyRuleRead.model_validate(r) for r in result.scalars().all()]
+
+    return ToolPolicyRuleListResponse(rules=rules, total=len(rules))
+
+
+@router.get("/{rule_id}", response_model=ToolPolicyRuleRead)
+async def get_tool_policy_rule(
+    rule_id: str,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get a tool policy rule by ID.
+
+    Raises:
+        HTTPException: If the rule does not exist.
+    """
+    return ToolPolicyRuleRead.model_validate(await _get_rule_or_404(db, rule_id))
+
+
+@router.post("", response_model=ToolPolicyRuleRead, status_code=status.HTTP_201_CREATED)
+async def create_tool_policy_rule(
+    rule_data: ToolPolicyRuleCreate,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Create a global rule, or a thread override when threadId is set.
+
+    Raises:
+        HTTPException: If the thread of an override does not exist.
+    """
+    if rule_data.thread_id and not await db.get(Thread, rule_data.thread_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Thread {rule_data.thread_id} not found",
+        )
+
+    rule = ToolPolicyRule(**rule_data.model_dump(mode="json"))
+    db.add(rule)
+    await db.commit()
+    await db.refresh(rule)
+    invalidate_tool_policies()
+
+    logger.info(f"Created tool policy rule {rule.id}: {rule.action.value} {rule.tool}")
+
+    return ToolPolicyRuleRead.model_validate(rule)
+
+
+@router.put("/{rule_id}", response_model=ToolPolicyRuleRead)
+async def update_tool_policy_rule(
+    rule_id: str,
+    rule_data: ToolPolicyRuleUpdate,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Update a tool policy rule.
+
+    Raises:
+        HTTPException: If the rule does not exist.
+    """
+    rule = await _get_rule_or_404(db, rule_id)
+
+    for field, value in rule_data.model_dump(mode="json", exclude_unset=True).items():
+        setattr(rule, field, value)
+
+    await db.commit()
+    await db.refresh(rule)
+    invalidate_tool_policies()
+
+    logger.info(f"Updated tool policy rule {rule.id}")
+
+    return ToolPolicyRuleRead.model_validate(rule)
+
+
+@router.delete("/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_tool_policy_rule(
+    rule_id: str,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Delete a tool policy rule.
+
+    Raises:
+        HTTPException: If the rule does not exist.
+    """
+    rule = await _get_rule_or_404(db, rule_id)
+
+    await db.delete(rule)
+    await db.commit()
+    invalidate_tool_policies()
+
+    logger.info(f"Deleted tool policy rule {rule_id}")
+    return None
@@ -0,0 +1,25 @@
+"""Pending tool approval schemas for response validation."""
+
+from datetime import datetime
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from app.schemas.message import ToolCall
+
+
+class PendingApprovalRead(BaseModel):
+    """A tool call waiting for human review."""
+    thread_id: str = Field(..., alias="threadId")
+    thread_title: str = Field(..., alias="threadTitle")
+    tool_call: ToolCall = Field(..., alias="toolCall")
+    created_at: datetime = Field(..., alias="createdAt")
+    
+    class Config:
+        populate_by_name = True
+
+
+class PendingApprovalListResponse(BaseModel):
+    """Response for listing pending approvals."""
+    approvals: List[PendingApprovalRead]
+    total: int
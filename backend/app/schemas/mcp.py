@@ -2,7 +2,7 @@
 
 from datetime import datetime
 from typing import Optional, Dict, Any, List, Literal
-from pydantic import BaseModel, Field, field_validator
+from pydantic import AliasChoices, BaseModel, Field, field_validator
 
 
 class MCPServerBase(BaseModel):
@@ -60,8 +60,13 @@ class MCPServerRead(MCPServerBase):
     env: Optional[Dict[str, str]] = None
     url: Optional[str] = None
     headers: Optional[Dict[str, str]] = None
-    created_at: datetime = Field(..., alias="createdAt")
-    updated_at: datetime = Field(..., alias="updatedAt")
+    # Attribute names first, as in ThreadRead
+    created_at: datetime = Field(
+        ..., validation_alias=AliasChoices("created_at", "createdAt"), serialization_alias="createdAt",
+    )
+    updated_at: datetime = Field(
+        ..., validation_alias=AliasChoices("updated_at", "updatedAt"), serialization_alias="updatedAt",
+    )
     
     class Config:
         from_attributes = True
@@ -33,6 +33,7 @@ class ToolMessageData(BaseModel):
     content: str
     tool_call_id: str
     name: Optional[str] = None
+    status: Optional[str] = None
 
 
 class ErrorMessageData(BaseModel):
@@ -69,6 +70,61 @@ class MessageResponse(BaseModel):
         }
 
 
+class HistoryResponse(BaseModel):
+    """Response for a thread's conversation history."""
+    messages: List[MessageResponse]
+    total: int
+
+
+class ToolCallStartData(BaseModel):
+    """A tool call the model started streaming."""
+    id: str
+    message_id: str
+    name: str
+    index: int = 0
+
+
+class ToolCallDeltaData(BaseModel):
+    """A fragment of a streamed tool call's JSON arguments."""
+    id: str
+    index: int = 0
+    args: str
+
+
+class ApprovalRequiredData(BaseModel):
+    """A run paused for human review of a tool call."""
+    thread_id: str
+    value: Dict[str, Any]
+    tool_call: Optional[ToolCall] = None
+    resumable: bool = True
+
+
+class RunEndData(BaseModel):
+    """End of an agent run."""
+    thread_id: str
+    status: Literal["completed", "interrupted", "cancelled", "ignored"]
+    tokens: int = 0
+
+
+class StreamSummaryData(BaseModel):
+    """Tokens of a message that were not sent because the client fell behind."""
+    message_id: str
+    tokens: int = 0
+
+
+class StreamEvent(BaseModel):
+    """
+    Named SSE event sent next to message chunks.
+    
+    Message chunks (tokens and completed AI messages) keep using unnamed SSE
+    events; everything else is sent as `event: <event>`.
+    """
+    event: Literal["tool_call", "tool_call_delta", "approval_required", "tool_result", "stream_summary", "run_end"]
+    data: Union[
+        ToolCallStartData, ToolCallDeltaData, ApprovalRequiredData, ToolMessageData, StreamSummaryData, RunEndData,
+    ]
+
+
 class MessageOptions(BaseModel):
     """Options for sending messages."""
     model: Optional[str] = None
@@ -2,7 +2,7 @@
 
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 
 
 class ThreadBase(BaseModel):
@@ -23,8 +23,14 @@ class ThreadUpdate(BaseModel):
 class ThreadRead(ThreadBase):
     """Schema for reading thread data."""
     id: str
-    created_at: datetime = Field(..., alias="createdAt")
-    updated_at: datetime = Field(..., alias="updatedAt")
+    # Attribute names first: validating a row from attributes tries each choice
+    # in order, and a missing attribute costs an AttributeError per field
+    created_at: datetime = Field(
+        ..., validation_alias=AliasChoices("created_at", "createdAt"), serialization_alias="createdAt",
+    )
+    updated_at: datetime = Field(
+        ..., validation_alias=AliasChoices("updated_at", "updatedAt"), serialization_alias="updatedAt",
+    )
     
     class Config:
         from_attributes = True
@@ -36,3 +42,15 @@ class ThreadListResponse(BaseModel):
     threads: list[ThreadRead]
     total: int
 
+
+
+class ThreadSearchHit(ThreadRead):
+    """A thread matching a full-text search query."""
+    rank: float
+    snippet: Optional[str] = None
+
+
+class ThreadSearchResponse(BaseModel):
+    """Response for thread search."""
+    results: list[ThreadSearchHit]
+    total: int
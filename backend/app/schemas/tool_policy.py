@@ -0,0 +1,157 @@
+"""Tool approval policy schemas for request/response validation."""
+
+import re
+from datetime import datetime
+from re import _constants, _parser
+from typing import Any, List, Literal, Optional
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+_REPEATS = (_constants.MAX_REPEAT, _constants.MIN_REPEAT)
+
+
+def _subpatterns(arg):
+    """Yield the subpatterns in the argument of a parsed regex node."""
+    for item in arg if isinstance(arg, (tuple, list)) else (arg,):
+        if isinstance(item, _parser.SubPattern):
+            yield item
+        elif isinstance(item, (tuple, list)):
+            yield from _subpatterns(item)
+
+
+def _has_nested_quantifier(pattern, repeated: Optional[bool] = None) -> bool:
+    """
+    Whether a parsed regex repeats a repetition, either of them unbounded.
+
+    Such patterns ("(a+)+", "(\\w+\\s?)*") backtrack exponentially on inputs that
+    almost match; bounded nestings like "(\\d{1,3}\\.){3}" are fine.
+
+    Args:
+        pattern: Parsed (sub)pattern.
+        repeated: Whether an enclosing repetition is unbounded (None outside any).
+
+    Returns:
+        True if the pattern nests such repetitions.
+    """
+    for op, arg in pattern:
+        if op in _REPEATS and arg[1] > 1:
+            unbounded = arg[1] == _constants.MAXREPEAT
+            if repeated is not None and (repeated or unbounded):
+                return True
+            if _has_nested_quantifier(arg[2], unbounded):
+                return True
+        elif any(_has_nested_quantifier(p, repeated) for p in _subpatterns(arg)):
+            return True
+    return False
+
+
+class ArgCondition(BaseModel):
+    """
+    Condition on one tool call argument.
+
+    The argument is addressed by a dotted path into the call's arguments and
+    matched either with a regular expression (searched in its string form) or
+    by equality. A missing argument never matches.
+    """
+    arg: str
+    pattern: Optional[str] = None
+    equals: Optional[Any] = None
+    negate: bool = False
+
+    @field_validator("pattern")
+    @classmethod
+    def validate_pattern(cls, v):
+        """Reject patterns that are not valid regular expressions."""
+        if v is not None:
+            try:
+                re.compile(v)
+            except re.error as e:
+                raise ValueError(f"invalid pattern: {e}")
+        return v
+
+    @model_validator(mode="after")
+    def validate_matcher(self):
+        """Exactly one of pattern and equals must be set."""
+        if (self.pattern is None) == (self.equals is None):
+            raise ValueError("a condition needs exactly one of pattern or equals")
+        return self
+
+
+def _reject_backtracking_patterns(conditions: Optional[List[ArgCondition]]) -> Optional[List[ArgCondition]]:
+    """
+    Reject condition patterns that may backtrack catastrophically.
+
+    Only checked on writes, so rules saved before the check still load.
+    """
+    for condition in conditions or []:
+        if condition.pattern is not None and _has_nested_quantifier(_parser.parse(condition.pattern)):
+            raise ValueError(
+                f"invalid pattern {condition.pattern!r}: nested quantifiers (e.g. (a+)+) may never finish matching"
+            )
+    return conditions
+
+
+class ToolPolicyRuleBase(BaseModel):
+    """Base tool policy rule schema with common fields."""
+    action: Literal["allow", "deny", "review"]
+    tool: str = "*"
+    server: Optional[str] = None
+    conditions: Optional[List[ArgCondition]] = None
+    thread_id: Optional[str] = Field(None, alias="threadId")
+    priority: int = 0
+    enabled: bool = True
+    reason: Optional[str] = None
+
+    class Config:
+        populate_by_name = True
+
+
+class ToolPolicyRuleCreate(ToolPolicyRuleBase):
+    """Schema for creating a tool policy rule."""
+
+    @field_validator("conditions")
+    @classmethod
+    def validate_conditions(cls, v):
+        """Reject patterns that may backtrack catastrophically."""
+        return _reject_backtracking_patterns(v)
+
+
+class ToolPolicyRuleUpdate(BaseModel):
+    """Schema for updating a tool policy rule."""
+    action: Optional[Literal["allow", "deny", "review"]] = None
+    tool: Optional[str] = None
+    server: Optional[str] = None
+    conditions: Optional[List[ArgCondition]] = None
+    priority: Optional[int] = None
+    enabled: Optional[bool] = None
+    reason: Optional[str] = None
+
+    @field_validator("conditions")
+    @classmethod
+    def validate_conditions(cls, v):
+        """Reject patterns that may backtrack catastrophically."""
+        return _reject_backtracking_patterns(v)
+
+
+class ToolPolicyRuleRead(ToolPolicyRuleBase):
+    """Schema for reading tool policy rule data."""
+    id: str
+    created_at: datetime = Field(..., alias="createdAt")
+    updated_at: datetime = Field(..., alias="updatedAt")
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+
+
+class ToolPolicyRuleListResponse(BaseModel):
+    """Response for listing tool policy rules."""
+    rules: List[ToolPolicyRuleRead]
+    total: int
+
+
+class PolicyDecision(BaseModel):
+    """Outcome of evaluating the policy for one tool call."""
+    action: Literal["allow", "deny", "review"]
+    rule_id: Optional[str] = None
+    reason: Optional[str] = None
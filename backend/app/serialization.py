@@ -0,0 +1,54 @@
+"""Response serialization: ORM rows to schemas and schemas to JSON bytes in one pass."""
+
+from typing import Any, List
+
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.schemas.mcp import MCPServerRead
+from app.schemas.thread import ThreadRead
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# App-wide response class for routes returning dicts and models
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+# Built once: validating a page of rows reads their attributes in pydantic-core
+# instead of building every schema field by field in Python
+THREAD_READS = TypeAdapter(List[ThreadRead])
+MCP_SERVER_READS = TypeAdapter(List[MCPServerRead])
+
+
+def thread_reads(rows: List[Any]) -> List[ThreadRead]:
+    """Thread rows as response schemas."""
+    return THREAD_READS.validate_python(rows, from_attributes=True)
+
+
+def mcp_server_reads(rows: List[Any]) -> List[MCPServerRead]:
+    """MCP server rows as response schemas."""
+    return MCP_SERVER_READS.validate_python(rows, from_attributes=True)
+
+
+def schema_response(model: BaseModel, status_code: int = 200) -> Response:
+    """
+    Serialize a response schema straight to JSON.
+
+    A route returning a model has FastAPI dump it, validate it again against the
+    response_model and encode the result; the route's response_model still
+    documents the endpoint, but the body is written by pydantic-core in one pass.
+
+    Args:
+        model: Response schema (serialized by alias, like FastAPI does).
+        status_code: HTTP status of the response.
+
+    Returns:
+        JSON response with the serialized model.
+    """
+    return Response(
+        content=model.model_dump_json(by_alias=True),
+        status_code=status_code,
+        media_type="application/json",
+    )
@@ -1,107 +1,168 @@
 """Agent service for streaming responses and managing agent state."""
 
+import asyncio
 import logging
-from typing import AsyncGenerator, Optional, List
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import AsyncGenerator, AsyncIterator, Dict, List, Optional, Tuple, Union
 
-from langchain_core.messages import HumanMessage, BaseMessage, AIMessage, AIMessageChunk
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.types import Command
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage, BaseMessage, AIMessage, AIMessageChunk, ToolMessage
+from langgraph.types import Command, Interrupt
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from opentelemetry.trace import Status, StatusCode
 
+from app.agent.approval import load_tool_policy
 from app.agent.builder import AgentBuilder
-from app.agent.memory import get_checkpointer, get_history
+from app.agent.memory import (
+    get_checkpointer,
+    get_history,
+    prefetch_checkpoint,
+    has_pending_interrupt,
+)
 from app.agent.mcp import get_mcp_tools
+from app.agent.providers import get_chat_model
 from app.config import settings
-from app.schemas.message import MessageResponse, MessageOptions, AIMessageData, ToolCall
+from app.schemas.message import (
+    MessageResponse,
+    MessageOptions,
+    AIMessageData,
+    HumanMessageData,
+    ToolCall,
+    ToolMessageData,
+    StreamEvent,
+    ToolCallStartData,
+    ToolCallDeltaData,
+    ApprovalRequiredData,
+    RunEndData,
+)
 from app.database import AsyncSessionLocal
-from app.services.thread_service import ensure_thread
+from app.services.approval_service import replace_pending_approvals
+from app.services.run_control import RunControl
+from app.services.stream_buffer import SlowConsumerError, StreamBuffer
+from app.services.thread_locks import ThreadBusyError, thread_locks
+from app.services.thread_service import ensure_thread, default_thread_title
+from app.services.search_service import index_messages, current_turn
+from app.telemetry.metrics import (
+    MetricsCallbackHandler,
+    StreamMetrics,
+    model_label,
+    record_cancelled_run,
+    record_completed_run,
+)
+from app.telemetry.tracing import TracingCallbackHandler, traced, tracer
+from app.telemetry.timing import PhaseTimer
 
 logger = logging.getLogger(__name__)
 
-# Global agent instance cache
-_agent_cache = {}
+# The compiled agent graph, shared by every model, tool selection and approval mode
+_agent = None
 
+# Chat model instances by model name, passed to runs through config["configurable"];
+# least recently used first, at most settings.llm_cache_size
+_llm_cache: "OrderedDict[str, BaseChatModel]" = OrderedDict()
 
-def _get_llm_instance(model: Optional[str] = None):
+
+def _get_llm_instance(model: Optional[str] = None) -> BaseChatModel:
     """
-    Get language model instance based on model name.
+    Get the cached language model instance for a model name.
+    
+    Provider SDKs are imported on first use by the provider registry.
     
     Args:
         model: Model name (e.g., "gpt-4", "gemini-pro")
         
     Returns:
         Language model instance.
+        
+    Raises:
+        ValueError: If no provider handles the model name.
     """
-    model = model or "gpt-4o-mini"
+    key = model or ""
+    if key in _llm_cache:
+        _llm_cache.move_to_end(key)
+        return _llm_cache[key]
     
-    if model.startswith("gpt") or model.startswith("o1"):
-        return ChatOpenAI(
-            model=model,
-            api_key=settings.openai_api_key,
-            streaming=True,
-        )
-    elif model.startswith("gemini"):
-        return ChatGoogleGenerativeAI(
-            model=model,
-            google_api_key=settings.google_api_key,
-        )
-    else:
-        # Default to OpenAI
-        return ChatOpenAI(
-            model="gpt-4o-mini",
-            api_key=settings.openai_api_key,
-            streaming=True,
-        )
+    llm = _llm_cache[key] = get_chat_model(model)
+    while len(_llm_cache) > settings.llm_cache_size:
+        _llm_cache.popitem(last=False)
+    return llm
 
 
-async def _ensure_agent(
-    model: Optional[str] = None,
-    tools: Optional[List[str]] = None,
-    approve_all_tools: bool = False,
-):
+async def _ensure_agent():
     """
-    Ensure agent is created and cached.
+    Ensure the agent graph is compiled and cached.
+    
+    The graph is compiled once with every MCP tool; the model, enabled tools and
+    approval mode of a run are passed in config["configurable"] (see run_options).
     
-    Args:
-        model: Model name to use.
-        tools: List of specific tools to enable.
-        approve_all_tools: Auto-approve all tool calls.
-        
     Returns:
         Compiled agent graph.
     """
-    cache_key = f"{model}_{tools}_{approve_all_tools}"
-    
-    if cache_key in _agent_cache:
-        return _agent_cache[cache_key]
+    global _agent
     
-    # Get LLM
-    llm = _get_llm_instance(model)
+    if _agent is not None:
+        return _agent
     
-    # Get tools from MCP
-    mcp_tools = await get_mcp_tools()
-    
-    # Filter tools if specific list provided
-    if tools and len(tools) > 0:
-        mcp_tools = [t for t in mcp_tools if t.name in tools]
-    
-    # Get async checkpointer
-    checkpointer = await get_checkpointer()
+    # Get tools from MCP and the async checkpointer concurrently
+    mcp_tools, checkpointer = await asyncio.gather(get_mcp_tools(), get_checkpointer())
     
     # Build agent
     builder = AgentBuilder(
         tools=mcp_tools,
-        llm=llm,
         prompt="",
         checkpointer=checkpointer,
-        approve_all_tools=approve_all_tools,
     )
     
-    agent = builder.build()
-    _agent_cache[cache_key] = agent
+    _agent = builder.build()
     
-    logger.info(f"Agent created with model={model}, tools={len(mcp_tools)}")
-    return agent
+    logger.info(f"Agent created with tools={len(mcp_tools)}")
+    return _agent
+
+
+def run_options(
+    model: Optional[str] = None,
+    tools: Optional[List[str]] = None,
+    approve_all_tools: bool = False,
+) -> dict:
+    """
+    Configurable values selecting the model, tools and approval mode of a run.
+    
+    Args:
+        model: Model name to use.
+        tools: List of specific tools to enable (all tools when empty).
+        approve_all_tools: Auto-approve all tool calls.
+        
+    Returns:
+        Entries for config["configurable"].
+        
+    Raises:
+        ValueError: If no provider handles the model name.
+    """
+    return {
+        "llm": _get_llm_instance(model),
+        "tools": list(tools) if tools else None,
+        "approve_all_tools": approve_all_tools,
+    }
+
+
+def reset_agent_cache() -> None:
+    """Drop the compiled graph and cached models (e.g. after the checkpointer is closed)."""
+    global _agent
+    _agent = None
+    _llm_cache.clear()
+
+
+async def prebuild_default_agent():
+    """
+    Build and cache the agent graph and the default model before the first request.
+    
+    Returns:
+        Compiled agent graph.
+    """
+    _get_llm_instance()
+    return await _ensure_agent()
 
 
 def _process_ai_message(message: BaseMessage) -> Optional[MessageResponse]:
@@ -172,34 +233,438 @@ def _process_ai_message(message: BaseMessage) -> Optional[MessageResponse]:
     return None
 
 
+# Items yielded by a stream: message chunks and named events
+StreamItem = Union[MessageResponse, StreamEvent]
+
+
+def _token_response(chunk: AIMessageChunk, message_id: str) -> Optional[MessageResponse]:
+    """
+    Token event for a streamed model chunk, or None for chunks without text.
+    
+    Chunks keep the ID of the model call they belong to, which is also the ID of
+    the final AI message (and its tool call event); message_id is the fallback.
+    """
+    if not chunk.content:
+        return None
+    return MessageResponse(
+        type="ai",
+        data=AIMessageData(id=chunk.id or message_id, content=chunk.content),
+    )
+
+
+class _ChunkConverter:
+    """Turn the streamed model chunks of one run into token and tool call events."""
+    
+    def __init__(self, message_id: str):
+        """
+        Initialize the converter.
+        
+        Args:
+            message_id: Fallback ID for chunks without an ID of their own.
+        """
+        self.message_id = message_id
+        # Tool call IDs by (message ID, index); argument chunks only carry the index
+        self._tool_call_ids: Dict[Tuple[str, int], str] = {}
+    
+    def convert(self, chunk: AIMessageChunk) -> List[StreamItem]:
+        """Events for one chunk: its text token, started tool calls and argument deltas."""
+        events: List[StreamItem] = []
+        message_id = chunk.id or self.message_id
+        
+        token = _token_response(chunk, message_id)
+        if token is not None:
+            events.append(token)
+        
+        for tool_chunk in chunk.tool_call_chunks:
+            index = tool_chunk.get("index") or 0
+            key = (message_id, index)
+            if tool_chunk.get("id") and key not in self._tool_call_ids:
+                self._tool_call_ids[key] = tool_chunk["id"]
+                events.append(StreamEvent(
+                    event="tool_call",
+                    data=ToolCallStartData(
+                        id=tool_chunk["id"],
+                        message_id=message_id,
+                        name=tool_chunk.get("name") or "",
+                        index=index,
+                    ),
+                ))
+            if tool_chunk.get("args") and key in self._tool_call_ids:
+                events.append(StreamEvent(
+                    event="tool_call_delta",
+                    data=ToolCallDeltaData(id=self._tool_call_ids[key], index=index, args=tool_chunk["args"]),
+                ))
+        
+        return events
+
+
+def _tool_call_response(message: AIMessage) -> MessageResponse:
+    """
+    Completed tool call message, with parsed arguments.
+    
+    The content is left empty because its text was already streamed as tokens.
+    """
+    return MessageResponse(
+        type="ai",
+        data=AIMessageData(
+            id=message.id or str(id(message)),
+            content="",
+            tool_calls=[
+                ToolCall(id=tc["id"], name=tc["name"], args=tc["args"], type=tc.get("type", "function"))
+                for tc in message.tool_calls
+            ],
+        ),
+    )
+
+
+def _tool_result_event(message: ToolMessage) -> StreamEvent:
+    """Tool result event for a tool message."""
+    return StreamEvent(
+        event="tool_result",
+        data=ToolMessageData(
+            id=message.id or str(id(message)),
+            content=message.content if isinstance(message.content, str) else str(message.content),
+            tool_call_id=message.tool_call_id,
+            name=message.name,
+            status=message.status,
+        ),
+    )
+
+
+def _approval_event(interrupt: Interrupt, thread_id: str) -> StreamEvent:
+    """Approval-required event carrying an interrupt's payload."""
+    value = interrupt.value if isinstance(interrupt.value, dict) else {"value": interrupt.value}
+    tool_call = value.get("toolCall")
+    return StreamEvent(
+        event="approval_required",
+        data=ApprovalRequiredData(
+            thread_id=thread_id,
+            value=value,
+            tool_call=ToolCall(**tool_call) if tool_call else None,
+            resumable=interrupt.resumable,
+        ),
+    )
+
+
+def is_token(message: StreamItem) -> bool:
+    """Whether a stream item is a model token (as opposed to a tool call or named event)."""
+    return isinstance(message, MessageResponse) and message.type == "ai" and not message.data.tool_calls
+
+
+async def _iter_lean(agent, inputs, config: dict, message_id: str) -> AsyncIterator[StreamItem]:
+    """
+    Stream a run with the graph's "messages" and "updates" stream modes.
+    
+    Tokens and tool call deltas come from "messages" (model chunks only; full
+    messages replayed from node outputs are skipped); completed tool calls, tool
+    results and approval interrupts come from node "updates".
+    """
+    thread_id = config["configurable"]["thread_id"]
+    converter = _ChunkConverter(message_id)
+    
+    async for mode, payload in agent.astream(inputs, config, stream_mode=["messages", "updates"]):
+        if mode == "messages":
+            chunk = payload[0]
+            if isinstance(chunk, AIMessageChunk):
+                for event in converter.convert(chunk):
+                    yield event
+            continue
+        
+        for node, update in payload.items():
+            if node == "__interrupt__":
+                for interrupt in update:
+                    yield _approval_event(interrupt, thread_id)
+                continue
+            if not isinstance(update, dict):
+                continue
+            for message in update.get("messages", []):
+                if isinstance(message, AIMessage) and message.tool_calls:
+                    yield _tool_call_response(message)
+                elif isinstance(message, ToolMessage):
+                    yield _tool_result_event(message)
+
+
+async def _iter_events(agent, inputs, config: dict, message_id: str) -> AsyncIterator[StreamItem]:
+    """
+    Stream a run with astream_events v2, keeping only model chunk events.
+    
+    Tool results are not streamed in this mode; a pending approval is read from
+    the thread state once the run stops.
+    """
+    converter = _ChunkConverter(message_id)
+    
+    async for event in agent.astream_events(inputs, config, version="v2"):
+        if event["event"] == "on_chat_model_stream":
+            for item in converter.convert(event["data"]["chunk"]):
+                yield item
+    
+    state = await agent.aget_state(config)
+    for task in state.tasks:
+        for interrupt in task.interrupts:
+            yield _approval_event(interrupt, config["configurable"]["thread_id"])
+
+
+def iter_agent_stream(
+    agent,
+    inputs,
+    config: dict,
+    message_id: str,
+    mode: Optional[str] = None,
+) -> AsyncIterator[StreamItem]:
+    """
+    Stream the events of one agent run.
+    
+    Args:
+        agent: Compiled agent graph.
+        inputs: Graph input or resume Command.
+        config: Run config with the thread_id.
+        message_id: ID for token events of chunks without an ID of their own.
+        mode: "lean" or "events" (defaults to AGENT_STREAM_MODE).
+        
+    Returns:
+        Async iterator of token and tool call messages and named events.
+    """
+    if (mode or settings.agent_stream_mode) == "events":
+        return _iter_events(agent, inputs, config, message_id)
+    return _iter_lean(agent, inputs, config, message_id)
+
+
+async def _index_completed_run(agent, config: dict, thread_id: str, title: str) -> None:
+    """
+    Add the messages of the run that just finished to the search index.
+    
+    Indexing failures are logged and never surface to the stream.
+    
+    Args:
+        agent: Compiled agent graph.
+        config: Run config with the thread_id.
+        thread_id: Thread ID of the run.
+        title: Title to index if the thread has no title entry yet.
+    """
+    try:
+        state = await agent.aget_state(config)
+        messages = state.values.get("messages", []) if state.values else []
+        
+        async with AsyncSessionLocal() as session:
+            indexed = await index_messages(
+                session, thread_id, current_turn(messages), title=title
+            )
+            await session.commit()
+        
+        logger.debug(f"Indexed {indexed} messages for thread={thread_id}")
+    
+    except Exception as e:
+        logger.warning(f"Failed to index messages for thread {thread_id}: {e}")
+
+
+async def _register_thread(thread_id: str, user_text: str) -> None:
+    """Ensure the thread exists in the database using a dedicated session."""
+    async with AsyncSessionLocal() as session:
+        await ensure_thread(session, thread_id, user_text)
+
+
+async def _sync_pending_approvals(thread_id: str, tool_calls: List[ToolCall]) -> None:
+    """
+    Replace a thread's pending approvals with the calls its run stopped at.
+    
+    Failures are logged and never surface to the stream; the checkpoint remains
+    the source of truth for resuming.
+    """
+    try:
+        async with AsyncSessionLocal() as session:
+            await replace_pending_approvals(session, thread_id, tool_calls)
+            await session.commit()
+    except Exception as e:
+        logger.warning(f"Failed to update pending approvals for thread {thread_id}: {e}")
+
+
+async def _checkpoint_cancelled_run(
+    agent,
+    thread_id: str,
+    partial: Optional[AIMessage],
+) -> None:
+    """
+    Leave the thread of a cancelled run in a state the next run can continue from.
+    
+    The graph stops at its last completed step: tool calls may lack their results
+    (which providers reject on the next turn) and the answer being streamed is
+    lost. Dangling tool calls get an error tool message, and the streamed part of
+    the answer is stored as the AI message the user saw.
+    
+    Args:
+        agent: Compiled agent graph.
+        thread_id: Thread of the cancelled run.
+        partial: Text streamed by the interrupted model call, if any.
+    """
+    config = {"configurable": {"thread_id": thread_id}}
+    state = await agent.aget_state(config)
+    messages = state.values.get("messages", []) if state.values else []
+    
+    answered = {m.tool_call_id for m in messages if isinstance(m, ToolMessage)}
+    last_ai = next((m for m in reversed(messages) if isinstance(m, AIMessage)), None)
+    updates: List[BaseMessage] = [
+        ToolMessage(
+            content="Tool call cancelled",
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
+        for call in (last_ai.tool_calls if last_ai is not None else [])
+        if call["id"] not in answered
+    ]
+    if partial is not None and all(m.id != partial.id for m in messages):
+        updates.append(partial)
+    
+    if updates:
+        # As the agent's output: no tool calls are left, so the graph ends here
+        await agent.aupdate_state(config, {"messages": updates}, as_node="agent")
+        logger.info(f"Checkpointed {len(updates)} messages of the cancelled run on thread={thread_id}")
+
+
+class _GraphRun:
+    """
+    Runs the graph in its own task, feeding a bounded buffer read by the stream.
+    
+    Cancelling the run (RunControl: client disconnect, cancel endpoint or a newer
+    run) cancels this task, and with it the running node and any in-flight model
+    request, instead of waiting for the next chunk. The task then checkpoints a
+    consistent state, updates the pending approvals and releases the thread,
+    whether or not anyone still reads the stream.
+    
+    The run does not wait for a slow client: once the buffer is full, the slow
+    consumer policy applies (see StreamBuffer).
+    """
+    
+    def __init__(self, agent, inputs, config: dict, message_id: str, lease, checkpoint, model: Optional[str]):
+        self.agent = agent
+        self.config = config
+        self.lease = lease
+        self.checkpoint = checkpoint
+        self.model = model
+        self.thread_id = config["configurable"]["thread_id"]
+        self.buffer = StreamBuffer(
+            settings.stream_buffer_size,
+            settings.stream_slow_consumer_policy,
+            on_overflow=lambda: lease.control.cancel("slow_consumer"),
+        )
+        self.tokens = 0
+        self.pending_calls: List[ToolCall] = []
+        self.interrupted = False
+        self.cancelled = False
+        self.finished = False
+        self.error: Optional[Exception] = None
+        # Text streamed by the current model call, kept for a cancelled run's checkpoint
+        self._partial_id: Optional[str] = None
+        self._partial_text: List[str] = []
+        self._streaming = True
+        self.task = asyncio.create_task(self._run(iter_agent_stream(agent, inputs, config, message_id)))
+    
+    def _observe(self, message: StreamItem) -> None:
+        """Track tokens, the current answer and approval requests."""
+        if is_token(message):
+            self.tokens += 1
+            if message.data.id != self._partial_id:
+                self._partial_id, self._partial_text = message.data.id, []
+            if isinstance(message.data.content, str):
+                self._partial_text.append(message.data.content)
+        elif isinstance(message, StreamEvent) and message.event == "approval_required":
+            self.interrupted = True
+            if message.data.tool_call is not None:
+                self.pending_calls.append(message.data.tool_call)
+    
+    def _partial_message(self) -> Optional[AIMessage]:
+        text = "".join(self._partial_text)
+        if not text:
+            return None
+        return AIMessage(content=text, id=self._partial_id, response_metadata={"finish_reason": "cancelled"})
+    
+    def _cancel(self) -> None:
+        """Stop the graph; a run that already finished streaming completes as is."""
+        # Cancelled by the run itself (the buffer dropping a slow client): a
+        # cancellation of the running task would only land on its next await,
+        # possibly after streaming, so the loop stops at the current item instead
+        if self._streaming and asyncio.current_task() is not self.task:
+            self.task.cancel()
+    
+    async def _run(self, graph_stream: AsyncIterator[StreamItem]) -> None:
+        control = self.lease.control
+        try:
+            try:
+                control.on_cancel(self._cancel)
+                async with aclosing(graph_stream):
+                    async for message in graph_stream:
+                        self._observe(message)
+                        self.buffer.put(message)
+                        if control.cancelled:
+                            raise asyncio.CancelledError
+                self._streaming = False
+            except asyncio.CancelledError:
+                if not control.cancelled:
+                    raise
+                # Cancelled through the run's control: finish the run as cancelled
+                asyncio.current_task().uncancel()
+                self._streaming = False
+                self.cancelled = True
+                saved = record_cancelled_run(self.model, control.reason, self.tokens)
+                logger.info(
+                    f"Run on thread={self.thread_id} cancelled ({control.reason}) after "
+                    f"{self.tokens} tokens, ~{saved:.0f} tokens saved"
+                )
+                await traced("checkpoint_cancelled_run", _checkpoint_cancelled_run(
+                    self.agent, self.thread_id, self._partial_message(),
+                ))
+            
+            if not self.cancelled and not self.interrupted:
+                record_completed_run(self.model, self.tokens)
+            
+            # A run that started from a pending interrupt (answered, or discarded by new
+            # input) or stopped at one; replaced only once the graph has streamed, so a
+            # failed run leaves the index matching its checkpoint
+            if self.pending_calls or has_pending_interrupt(self.checkpoint):
+                await traced("sync_pending_approvals", _sync_pending_approvals(self.thread_id, self.pending_calls))
+        
+        except Exception as e:
+            self.error = e
+        
+        finally:
+            # The thread's next run may start while this one's stream finishes
+            await thread_locks.release(self.lease)
+            self.finished = True
+            self.buffer.close()
+
+
 async def stream_response(
     thread_id: str,
     user_text: str,
     opts: Optional[MessageOptions] = None,
-) -> AsyncGenerator[MessageResponse, None]:
+    control: Optional[RunControl] = None,
+) -> AsyncGenerator[StreamItem, None]:
     """
     Stream agent responses for a user message.
     
+    Closing the stream before it ends (client disconnect) cancels the run.
+    
     Args:
         thread_id: Thread ID for the conversation.
         user_text: User's message text.
         opts: Optional message options (model, tools, approval settings).
+        control: Cancellation handle of the run.
         
     Yields:
-        MessageResponse objects as they are generated.
+        MessageResponse chunks (tokens and completed tool call messages) and named
+        StreamEvents (tool call starts and argument deltas, approval requests, tool
+        results), ending with a run_end event.
     """
     opts = opts or MessageOptions()
-    
-    # Ensure thread exists in database
-    async with AsyncSessionLocal() as session:
-        await ensure_thread(session, thread_id, user_text)
+    control = control or RunControl()
+    timer = PhaseTimer()
     
     # Determine inputs based on options
     if opts.allow_tool:
         # This is a tool approval response
         inputs = Command(
             resume={
-                "action": "continue" if opts.allow_tool == "allow" else "update",
+                "action": "continue" if opts.allow_tool == "allow" else "deny",
                 "data": {},
             }
         )
@@ -207,45 +672,159 @@ async def stream_response(
         # Regular user message
         inputs = {"messages": [HumanMessage(content=user_text)]}
     
-    # Get or create agent
-    agent = await _ensure_agent(
-        model=opts.model,
-        tools=opts.tools,
-        approve_all_tools=opts.approve_all_tools,
-    )
-    
-    # Stream agent responses
-    config = {"configurable": {"thread_id": thread_id}}
+    span = tracer.start_span("stream_response", attributes={
+        "thread_id": thread_id,
+        "model": model_label(opts.model),
+        "resume": bool(opts.allow_tool),
+    })
+    span_context = otel_context.attach(trace.set_span_in_context(span))
+    stream_metrics = None
+    outcome = "error"
+    lease = None
+    run = None
     
     try:
+        # Started before the lock and start-up: TTFT and duration include them, and
+        # streams waiting for their thread count as in flight
+        stream_metrics = StreamMetrics()
+        
+        # One run per thread at a time, in this worker and across workers; the
+        # checkpoint is read once the previous run has written its last one
+        lease = await timer.timed("lock", traced("acquire_thread", thread_locks.acquire(thread_id, control=control)))
+        
+        # Thread registration, agent resolution, checkpoint prefetch and policy are independent
+        _, agent, checkpoint, tool_policy = await asyncio.gather(
+            timer.timed("thread", traced("ensure_thread", _register_thread(thread_id, user_text))),
+            timer.timed("agent", traced("ensure_agent", _ensure_agent())),
+            timer.timed("checkpoint", traced("prefetch_checkpoint", prefetch_checkpoint(thread_id))),
+            timer.timed("policy", traced("load_tool_policy", load_tool_policy(thread_id))),
+        )
+        timer.mark("startup")
+        
+        if opts.allow_tool and checkpoint is not None and not has_pending_interrupt(checkpoint):
+            logger.warning(f"Ignoring tool approval for thread={thread_id}: no pending interrupt")
+            outcome = "ignored"
+            yield StreamEvent(event="run_end", data=RunEndData(thread_id=thread_id, status="ignored"))
+            return
+        
+        # Stream agent responses
+        config = {
+            "configurable": {
+                "thread_id": thread_id,
+                "tool_policy": tool_policy,
+                **run_options(opts.model, opts.tools, opts.approve_all_tools),
+            },
+            "callbacks": [
+                MetricsCallbackHandler(opts.model),
+                TracingCallbackHandler(thread_id, model_label(opts.model)),
+            ],
+        }
         logger.info(f"Starting agent stream for thread={thread_id}")
         chunk_num = 0
         current_message_id = f"msg-{thread_id}-{id(inputs)}"
         
-        # Use astream_events for token-level streaming
-        async for event in agent.astream_events(inputs, config, version="v2"):
+        # Tokens carry the ID of their model call; tool calls reuse it, tool results have their own
+        run = _GraphRun(agent, inputs, config, current_message_id, lease, checkpoint, opts.model)
+        lease = None
+        
+        async for message in run.buffer:
             chunk_num += 1
             
-            # Filter for LLM token events
-            if event["event"] == "on_chat_model_stream":
-                chunk = event["data"]["chunk"]
-                if hasattr(chunk, "content") and chunk.content:
-                    # Yield individual tokens as they arrive
-                    # Use the same message ID for all chunks of this response
-                    logger.debug(f"Token chunk {chunk_num}: {chunk.content[:50]}")
-                    yield MessageResponse(
-                        type="ai",
-                        data=AIMessageData(
-                            id=current_message_id,  # Same ID for all chunks
-                            content=chunk.content,
-                        ),
-                    )
-        
-        logger.info(f"Stream completed. Total events: {chunk_num}")
+            if is_token(message):
+                stream_metrics.token()
+                if timer.get("ttft") is None:
+                    timer.mark("ttft")
+                    span.add_event("first_token")
+                    logger.info(f"TTFT breakdown thread={thread_id} {timer.summary()}")
+            
+            logger.debug(f"Stream event {chunk_num}: {type(message).__name__}")
+            yield message
+        
+        if run.error is not None:
+            raise run.error
+        
+        timer.mark("total")
+        logger.info(
+            f"Stream completed. Total events: {chunk_num} thread={thread_id} {timer.summary()}"
+        )
+        
+        if run.cancelled:
+            status = "cancelled"
+        else:
+            status = "interrupted" if run.interrupted else "completed"
+        
+        outcome = "cancelled" if run.cancelled else "ok"
+        yield StreamEvent(
+            event="run_end",
+            data=RunEndData(thread_id=thread_id, status=status, tokens=run.tokens),
+        )
+        
+        await traced(
+            "index_run",
+            _index_completed_run(agent, config, thread_id, default_thread_title(user_text)),
+        )
+    
+    except (GeneratorExit, asyncio.CancelledError):
+        outcome = "cancelled"
+        raise
+    
+    except SlowConsumerError as e:
+        logger.warning(f"Dropped a slow client of thread={thread_id}: {e}")
+        outcome = "cancelled"
+        span.set_status(Status(StatusCode.ERROR, str(e)))
+        raise
+    
+    except ThreadBusyError as e:
+        logger.warning(f"Rejected run on thread={thread_id}: {e}")
+        outcome = "rejected"
+        span.set_status(Status(StatusCode.ERROR, str(e)))
+        raise
     
     except Exception as e:
         logger.error(f"Error streaming response: {e}", exc_info=True)
+        span.record_exception(e)
+        span.set_status(Status(StatusCode.ERROR, str(e)))
         raise
+    
+    finally:
+        # Nobody reads the run any more (client gone): stop it
+        if run is not None and not run.finished:
+            control.cancel("disconnected")
+        if lease is not None:
+            await thread_locks.release(lease)
+        if stream_metrics is not None:
+            stream_metrics.finish(outcome)
+        span.set_attribute("outcome", outcome)
+        span.end()
+        otel_context.detach(span_context)
+
+
+def _history_to_responses(history: List[BaseMessage]) -> List[MessageResponse]:
+    """
+    Convert checkpointed messages to the history response format.
+    
+    Args:
+        history: Messages stored in the thread state.
+        
+    Returns:
+        List of message responses (human and AI messages only).
+    """
+    responses: List[MessageResponse] = []
+    
+    for msg in history:
+        # Dispatch on the type attribute: dumping every message to a dict copied
+        # its content, tool calls and metadata only to read the type
+        if msg.type == "human":
+            responses.append(MessageResponse(
+                type="human",
+                data=HumanMessageData(id=msg.id or str(id(msg)), content=msg.content),
+            ))
+        elif msg.type == "ai":
+            processed = _process_ai_message(msg)
+            if processed:
+                responses.append(processed)
+    
+    return responses
 
 
 async def fetch_thread_history(thread_id: str) -> List[MessageResponse]:
@@ -262,25 +841,8 @@ async def fetch_thread_history(thread_id: str) -> List[MessageResponse]:
         history = await get_history(thread_id)
         
         # Convert messages to MessageResponse format
-        responses: List[MessageResponse] = []
-        
-        for msg in history:
-            msg_dict = msg.dict() if hasattr(msg, "dict") else {}
-            
-            # This is a simplified conversion - adjust based on actual message types
-            if msg_dict.get("type") == "human":
-                responses.append(MessageResponse(
-                    type="human",
-                    data={"id": msg.id or str(id(msg)), "content": msg.content}
-                ))
-            elif msg_dict.get("type") == "ai":
-                processed = _process_ai_message(msg)
-                if processed:
-                    responses.append(processed)
-        
-        return responses
+        return _history_to_responses(history)
         
     except Exception as e:
         logger.error(f"Failed to fetch thread history: {e}")
         return []
-
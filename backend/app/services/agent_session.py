@@ -0,0 +1,228 @@
+"""Bidirectional agent sessions over a WebSocket, one per thread."""
+
+import asyncio
+import json
+import logging
+import time
+from contextlib import aclosing
+from typing import Any, Dict, Optional
+
+import ormsgpack
+from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from app.config import settings
+from app.schemas.message import MessageOptions, StreamEvent
+from app.services.agent_service import stream_response
+from app.services.run_control import RunControl
+from app.telemetry.metrics import WS_FRAMES, WS_SESSIONS
+
+logger = logging.getLogger(__name__)
+
+# Frame formats: JSON in text frames, or MessagePack in binary frames
+FRAME_FORMATS = ("json", "msgpack")
+
+# Close code sent when the client stopped answering the heartbeat
+HEARTBEAT_TIMEOUT_CODE = 4408
+
+
+def encode_frame(payload: Dict[str, Any], frame_format: str) -> Any:
+    """
+    Encode a frame for the session's format.
+
+    Args:
+        payload: Frame with an "event" name and its "data".
+        frame_format: "json" or "msgpack".
+
+    Returns:
+        Text for JSON frames, bytes for MessagePack frames.
+    """
+    if frame_format == "msgpack":
+        return ormsgpack.packb(payload)
+    return json.dumps(payload)
+
+
+def decode_frame(message: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Decode a client frame, text (JSON) or binary (MessagePack).
+
+    Args:
+        message: ASGI websocket.receive message.
+
+    Returns:
+        The decoded frame.
+
+    Raises:
+        ValueError: If the frame is not an object in either format.
+    """
+    try:
+        if message.get("bytes") is not None:
+            frame = ormsgpack.unpackb(message["bytes"])
+        else:
+            frame = json.loads(message.get("text") or "")
+    except (ormsgpack.MsgpackDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Malformed frame: {e}")
+    if not isinstance(frame, dict):
+        raise ValueError("A frame must be an object")
+    return frame
+
+
+class AgentSession:
+    """
+    One client connection to a thread, carrying any number of runs.
+
+    The client sends `message` frames (a user message), `approval` frames (the
+    decision on a pending tool call), `cancel` and `ping`; the server sends every
+    item of the runs (`message` frames for chunks, named events otherwise), then
+    `done` or `error` after each run. Runs of a session follow one another: a
+    message sent while a run is in progress is refused with an `error` frame.
+
+    The server sends `ping` every WS_HEARTBEAT_INTERVAL seconds and closes the
+    session when the client sent nothing (its `pong`s included) for
+    WS_HEARTBEAT_TIMEOUT seconds.
+    """
+
+    def __init__(self, websocket: WebSocket, thread_id: str, frame_format: str, defaults: MessageOptions):
+        """
+        Initialize the session.
+
+        Args:
+            websocket: Accepted connection.
+            thread_id: Thread of the session.
+            frame_format: "json" or "msgpack".
+            defaults: Options of runs whose frames do not override them.
+        """
+        self.websocket = websocket
+        self.thread_id = thread_id
+        self.frame_format = frame_format
+        self.defaults = defaults
+        self.last_seen = time.monotonic()
+        self._send_lock = asyncio.Lock()
+        self._run_task: Optional[asyncio.Task] = None
+        self._control: Optional[RunControl] = None
+
+    async def send(self, event: str, data: Any = None) -> None:
+        """Send one frame; frames of the run, the heartbeat and replies never interleave."""
+        frame = encode_frame({"event": event, "data": data if data is not None else {}}, self.frame_format)
+        async with self._send_lock:
+            if self.frame_format == "msgpack":
+                await self.websocket.send_bytes(frame)
+            else:
+                await self.websocket.send_text(frame)
+        WS_FRAMES.labels("out").inc()
+
+    async def _run(self, content: str, opts: MessageOptions, control: RunControl) -> None:
+        """Stream one run to the client."""
+        try:
+            stream = stream_response(self.thread_id, content, opts, control)
+            async with aclosing(stream):
+                async for item in stream:
+                    if isinstance(item, StreamEvent):
+                        await self.send(item.event, item.data.model_dump())
+                    elif item.type in ("ai", "tool"):
+                        await self.send("message", item.model_dump())
+            await self.send("done")
+
+        except (WebSocketDisconnect, asyncio.CancelledError):
+            raise
+
+        except Exception as e:
+            logger.error(f"Session run error on thread={self.thread_id}: {e}", exc_info=True)
+            await self.send("error", {"message": str(e), "threadId": self.thread_id})
+
+        finally:
+            self._control = None
+
+    def _options(self, frame: Dict[str, Any], allow_tool: Optional[str] = None) -> MessageOptions:
+        """Options of a run: the session defaults, overridden by the frame."""
+        fields = self.defaults.model_dump(by_alias=True)
+        fields.update({k: frame[k] for k in ("model", "tools", "approveAllTools") if k in frame})
+        fields["allowTool"] = allow_tool
+        return MessageOptions(**fields)
+
+    async def _start(self, content: str, opts: MessageOptions) -> None:
+        """Start a run unless one is in progress."""
+        if self._run_task is not None and not self._run_task.done():
+            await self.send("error", {"message": "A run is in progress on this session", "threadId": self.thread_id})
+            return
+        self._control = RunControl()
+        self._run_task = asyncio.create_task(self._run(content, opts, self._control))
+
+    async def _handle(self, frame: Dict[str, Any]) -> None:
+        """Act on one client frame."""
+        kind = frame.get("type")
+
+        if kind == "ping":
+            await self.send("pong")
+        elif kind == "pong":
+            pass
+        elif kind == "message":
+            content = frame.get("content")
+            if not isinstance(content, str) or not content:
+                raise ValueError("A message frame needs a content string")
+            await self._start(content, self._options(frame))
+        elif kind == "approval":
+            action = frame.get("action")
+            if action not in ("allow", "deny"):
+                raise ValueError("An approval frame needs an action: allow or deny")
+            await self._start("", self._options(frame, allow_tool=action))
+        elif kind == "cancel":
+            if self._control is not None:
+                self._control.cancel("user")
+        else:
+            raise ValueError(f"Unknown frame type: {kind!r}")
+
+    async def _heartbeat(self) -> None:
+        """Ping the client, and close the session once it stopped answering."""
+        try:
+            while True:
+                await asyncio.sleep(settings.ws_heartbeat_interval)
+                if time.monotonic() - self.last_seen > settings.ws_heartbeat_timeout:
+                    logger.info(f"Closing the silent session of thread={self.thread_id}")
+                    await self.websocket.close(code=HEARTBEAT_TIMEOUT_CODE, reason="Heartbeat timeout")
+                    return
+                await self.send("ping")
+        except Exception as e:
+            # The connection is gone; the receive loop sees it too
+            logger.debug(f"Heartbeat stopped for thread={self.thread_id}: {e}")
+
+    async def serve(self) -> None:
+        """Handle the client's frames until it disconnects or stops answering."""
+        WS_SESSIONS.inc()
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            await self.send("session", {"threadId": self.thread_id, "format": self.frame_format})
+
+            while True:
+                receive = asyncio.ensure_future(self.websocket.receive())
+                done, _ = await asyncio.wait({receive, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+                if receive not in done:
+                    receive.cancel()
+                    return
+                message = receive.result()
+                if message["type"] == "websocket.disconnect":
+                    return
+
+                self.last_seen = time.monotonic()
+                WS_FRAMES.labels("in").inc()
+                try:
+                    await self._handle(decode_frame(message))
+                except (ValueError, ValidationError) as e:
+                    await self.send("error", {"message": str(e), "threadId": self.thread_id})
+
+        except WebSocketDisconnect:
+            pass
+
+        finally:
+            heartbeat.cancel()
+            # Nobody reads the run any more: stop it, and wait for it to checkpoint
+            if self._control is not None:
+                self._control.cancel("disconnected")
+            if self._run_task is not None:
+                try:
+                    await self._run_task
+                except (Exception, asyncio.CancelledError) as e:
+                    # Its last frames could not be sent to the closed connection
+                    logger.debug(f"Session run ended with {type(e).__name__} on thread={self.thread_id}")
+            WS_SESSIONS.dec()
+            logger.info(f"Session closed for thread={self.thread_id}")
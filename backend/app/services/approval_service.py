@@ -0,0 +1,91 @@
+"""Approval service maintaining the index of tool calls awaiting review."""
+
+import logging
+from typing import List, Sequence, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.pending_approval import PendingApproval
+from app.models.thread import Thread
+from app.schemas.approval import PendingApprovalRead
+from app.schemas.message import ToolCall
+
+logger = logging.getLogger(__name__)
+
+
+async def replace_pending_approvals(
+    session: AsyncSession,
+    thread_id: str,
+    tool_calls: Sequence[ToolCall],
+) -> None:
+    """
+    Replace the pending approvals of a thread.
+    
+    The caller commits the session.
+    
+    Args:
+        session: Database session.
+        thread_id: Thread ID.
+        tool_calls: Tool calls the thread's run now waits on (empty when none).
+    """
+    await session.execute(
+        delete(PendingApproval).where(PendingApproval.thread_id == thread_id)
+    )
+    session.add_all(
+        PendingApproval(
+            thread_id=thread_id,
+            tool_call_id=call.id,
+            tool_name=call.name,
+            args=call.args,
+        )
+        for call in tool_calls
+    )
+
+
+async def list_pending_approvals(
+    session: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+) -> Tuple[List[PendingApprovalRead], int]:
+    """
+    List pending approvals across threads, oldest first.
+    
+    The page is read on the createdAt index joined to the thread by primary
+    key; the total is counted separately, so a page past the end still
+    reports it.
+    
+    Args:
+        session: Database session.
+        skip: Number of records to skip.
+        limit: Maximum number of records to return.
+        
+    Returns:
+        Tuple of (pending approvals, total count).
+    """
+    result = await session.execute(
+        select(PendingApproval, Thread.title)
+        .join(Thread, Thread.id == PendingApproval.thread_id)
+        .order_by(PendingApproval.created_at, PendingApproval.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    rows = result.all()
+    
+    approvals = [
+        PendingApprovalRead(
+            threadId=approval.thread_id,
+            threadTitle=title,
+            toolCall=ToolCall(id=approval.tool_call_id, name=approval.tool_name, args=approval.args),
+            createdAt=approval.created_at,
+        )
+        for approval, title in rows
+    ]
+    
+    count_result = await session.execute(
+        select(func.count(PendingApproval.id))
+        .join(Thread, Thread.id == PendingApproval.thread_id)
+    )
+    total = count_result.scalar_one()
+    
+    return approvals, total
@@ -0,0 +1,319 @@
+"""Idempotency keys coalescing duplicate stream requests into one agent run."""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import aclosing
+from datetime import timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.idempotency_key import IdempotencyKey
+from app.services.stream_buffer import StreamBuffer, StreamItem, merge_token
+
+logger = logging.getLogger(__name__)
+
+# Seconds between deletions of expired keys by a worker (done by its claims)
+PURGE_INTERVAL = 60.0
+
+# Monotonic time of this worker's last deletion of expired keys
+_last_purge: Optional[float] = None
+
+
+class IdempotencyKeyReusedError(ValueError):
+    """An idempotency key was sent again with a different request."""
+
+
+class IdempotencyKeyHeldError(ValueError):
+    """An idempotency key's run belongs to another worker, which alone can replay it."""
+
+
+async def claim_key(key: str, fingerprint: str) -> None:
+    """
+    Record an idempotency key in the database for this worker's new run.
+    
+    The row is inserted, or taken over once expired: IDEMPOTENCY_TTL seconds
+    after its run finished, or after it was claimed if the run never finished
+    (its worker stopped). Timestamps come from the database clock, shared by all
+    workers. At most every PURGE_INTERVAL seconds, the claim also deletes the
+    expired rows, since clients rarely send a key again once it expired. When
+    the database cannot be reached, the key is only held by this worker, as
+    without the table.
+    
+    Args:
+        key: Idempotency key sent by the client.
+        fingerprint: Identity of the request.
+        
+    Raises:
+        IdempotencyKeyReusedError: If another worker holds the key for a different request.
+        IdempotencyKeyHeldError: If another worker holds the key for this request.
+    """
+    global _last_purge
+    
+    expired = func.coalesce(IdempotencyKey.finished_at, IdempotencyKey.created_at) < (
+        func.now() - timedelta(seconds=settings.idempotency_ttl)
+    )
+    now = time.monotonic()
+    purge = _last_purge is None or now - _last_purge >= PURGE_INTERVAL
+    stmt = insert(IdempotencyKey).values(key=key, fingerprint=fingerprint, created_at=func.now())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IdempotencyKey.key],
+        set_={"fingerprint": stmt.excluded.fingerprint, "createdAt": func.now(), "finishedAt": None},
+        where=expired,
+    ).returning(IdempotencyKey.key)
+    
+    try:
+        async with AsyncSessionLocal() as session:
+            if purge:
+                purged = (await session.execute(delete(IdempotencyKey).where(expired))).rowcount
+                _last_purge = now
+                logger.debug(f"Deleted {purged} expired idempotency keys")
+            claimed = (await session.execute(stmt)).scalar_one_or_none()
+            held_for = None
+            if claimed is None:
+                held_for = (await session.execute(
+                    select(IdempotencyKey.fingerprint).where(IdempotencyKey.key == key)
+                )).scalar_one_or_none()
+            await session.commit()
+    except Exception as e:
+        logger.warning(f"Failed to record idempotency key {key}, holding it in this worker only: {e}")
+        return
+    
+    if claimed is None and held_for is not None:
+        if held_for != fingerprint:
+            raise IdempotencyKeyReusedError(f"Idempotency key {key} was used for a different request")
+        raise IdempotencyKeyHeldError(f"The run of idempotency key {key} is held by another worker")
+
+
+async def release_key(key: str, succeeded: bool) -> None:
+    """
+    Mark a key's run as finished, or delete the key so that a retry executes again.
+    
+    Failures are logged; the row then expires like an abandoned claim.
+    """
+    try:
+        async with AsyncSessionLocal() as session:
+            if succeeded:
+                await session.execute(
+                    update(IdempotencyKey).where(IdempotencyKey.key == key).values(finished_at=func.now())
+                )
+            else:
+                await session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+            await session.commit()
+    except Exception as e:
+        logger.warning(f"Failed to release idempotency key {key}: {e}")
+
+
+class IdempotentRun:
+    """
+    One agent run shared by every request carrying the same idempotency key.
+    
+    The run's items are produced by a task independent of any request, so a
+    client going away does not stop the run. They are recorded for requests
+    attaching mid-run or after it finished, with the tokens of each message
+    merged into one chunk: the record grows with the run's text, tool calls and
+    events, not with its token count.
+    
+    Each request follows the run through its own StreamBuffer: it first gets the
+    record (never merged further or dropped), then the items produced since,
+    under the slow consumer policy of any stream. With "disconnect", a request
+    falling behind fails alone; the run goes on for the other requests.
+    """
+    
+    def __init__(
+        self,
+        key: str,
+        fingerprint: str,
+        items: AsyncIterator[StreamItem],
+        on_finish: Optional[Callable[[str, bool], Awaitable[None]]] = None,
+    ):
+        """
+        Start the run.
+        
+        Args:
+            key: Idempotency key.
+            fingerprint: Identity of the request the key was first sent with.
+            items: Stream items of the run.
+            on_finish: Awaited with the key and whether the run succeeded, before
+                the followers see the run end (so a retry finds the key released).
+        """
+        self.key = key
+        self.fingerprint = fingerprint
+        self.items: List[StreamItem] = []
+        self.error: Optional[Exception] = None
+        self.finished_at: Optional[float] = None
+        self._on_finish = on_finish
+        self._followers: Set[StreamBuffer] = set()
+        self.task = asyncio.create_task(self._produce(items))
+    
+    @property
+    def done(self) -> bool:
+        """Whether the run has finished (successfully or not)."""
+        return self.finished_at is not None
+    
+    def _record(self, item: StreamItem) -> None:
+        """Record an item and pass it to the followers."""
+        if not merge_token(self.items, item):
+            self.items.append(item)
+        for buffer in self._followers:
+            buffer.put(item)
+    
+    async def _produce(self, items: AsyncIterator[StreamItem]) -> None:
+        """Record the run's items as they are produced."""
+        succeeded = False
+        try:
+            async with aclosing(items):
+                async for item in items:
+                    self._record(item)
+            succeeded = True
+        except Exception as e:
+            self.error = e
+        finally:
+            if self._on_finish is not None:
+                await self._on_finish(self.key, succeeded)
+            self.finished_at = time.monotonic()
+            for buffer in self._followers:
+                buffer.close()
+    
+    async def follow(self) -> AsyncIterator[StreamItem]:
+        """
+        Iterate over the run's items from the first one until the run finishes.
+        
+        Yields:
+            Stream items; tokens produced before the request attached come merged.
+            
+        Raises:
+            SlowConsumerError: If the request fell behind under the "disconnect" policy.
+            Exception: The run's error, after its items were replayed.
+        """
+        buffer = StreamBuffer(settings.stream_buffer_size, settings.stream_slow_consumer_policy)
+        buffer.extend(self.items)
+        if self.done:
+            buffer.close()
+        else:
+            self._followers.add(buffer)
+        
+        try:
+            async for item in buffer:
+                yield item
+        finally:
+            self._followers.discard(buffer)
+        
+        if self.error is not None:
+            raise self.error
+
+
+class IdempotencyRegistry:
+    """
+    Runs by idempotency key for this worker.
+    
+    Finished runs are replayed for settings.idempotency_ttl seconds; failed runs
+    are forgotten as soon as they finish so that a retry executes again.
+    
+    Items are only held by the worker running the key, so only that worker can
+    attach a retry to the run or replay it. Keys are also recorded in the
+    IdempotencyKey table: a retry reaching another worker is rejected there
+    (IdempotencyKeyHeldError) instead of running the graph a second time.
+    """
+    
+    def __init__(self):
+        self._runs: "OrderedDict[str, IdempotentRun]" = OrderedDict()
+        # Keys being claimed in the database, awaited by their concurrent duplicates
+        self._claims: Dict[str, "asyncio.Future[IdempotentRun]"] = {}
+        # Releases of keys evicted from this worker
+        self._releases: Set[asyncio.Task] = set()
+    
+    def __len__(self) -> int:
+        return len(self._runs)
+    
+    def _expire(self) -> None:
+        """Forget expired runs, and the oldest finished runs beyond the size limit."""
+        now = time.monotonic()
+        for key, run in list(self._runs.items()):
+            if run.done and now - run.finished_at >= settings.idempotency_ttl:
+                del self._runs[key]
+        
+        finished = [key for key, run in self._runs.items() if run.done]
+        excess = len(self._runs) - settings.idempotency_max_keys
+        for key in finished[:max(excess, 0)]:
+            del self._runs[key]
+            # No replay is left here: let the key execute again on any worker
+            task = asyncio.create_task(release_key(key, succeeded=False))
+            self._releases.add(task)
+            task.add_done_callback(self._releases.discard)
+    
+    def _forget_failed(self, run: IdempotentRun) -> None:
+        """Forget a failed run so that the next request with its key executes again."""
+        if run.error is not None and self._runs.get(run.key) is run:
+            del self._runs[run.key]
+    
+    async def _claim(
+        self,
+        key: str,
+        fingerprint: str,
+        start: Callable[[], AsyncIterator[str]],
+    ) -> IdempotentRun:
+        """Claim a new key in the database and start its run."""
+        await claim_key(key, fingerprint)
+        
+        run = IdempotentRun(key, fingerprint, start(), on_finish=release_key)
+        run.task.add_done_callback(lambda _: self._forget_failed(run))
+        self._runs[key] = run
+        logger.debug(f"Started idempotent run {key}")
+        return run
+    
+    async def get_or_start(
+        self,
+        key: str,
+        fingerprint: str,
+        start: Callable[[], AsyncIterator[str]],
+    ) -> Tuple[IdempotentRun, bool]:
+        """
+        Get the run of an idempotency key, starting it if the key is new.
+        
+        Args:
+            key: Idempotency key sent by the client.
+            fingerprint: Identity of the request (thread, message and options).
+            start: Creates the stream items of a new run.
+            
+        Returns:
+            Tuple of (run, whether it was started by this call).
+            
+        Raises:
+            IdempotencyKeyReusedError: If the key belongs to a different request.
+            IdempotencyKeyHeldError: If another worker runs (or ran) the key.
+        """
+        self._expire()
+        
+        started = False
+        run = self._runs.get(key)
+        if run is None:
+            # Duplicates arriving while the key is claimed wait for the same claim
+            claim = self._claims.get(key)
+            if claim is None:
+                claim = asyncio.ensure_future(self._claim(key, fingerprint, start))
+                self._claims[key] = claim
+                claim.add_done_callback(lambda done: self._claims.pop(key) if self._claims.get(key) is done else None)
+                started = True
+            run = await asyncio.shield(claim)
+        
+        if run.fingerprint != fingerprint:
+            raise IdempotencyKeyReusedError(f"Idempotency key {key} was used for a different request")
+        return run, started
+    
+    async def close(self) -> None:
+        """Cancel the runs still in flight (at shutdown) and forget every key."""
+        tasks = [run.task for run in self._runs.values() if not run.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, *self._releases, return_exceptions=True)
+        self._runs.clear()
+
+
+# Runs by idempotency key for this worker
+idempotency_registry = IdempotencyRegistry()
@@ -0,0 +1,49 @@
+"""Cancellation handles of agent runs."""
+
+from typing import Callable, List, Optional
+
+# Why a run was cancelled (metric label values)
+CANCEL_REASONS = ("disconnected", "user", "superseded", "slow_consumer")
+
+
+class RunControl:
+    """
+    Cancellation handle of one agent run.
+    
+    Shared by the request that started the run (client disconnects), the thread
+    lock (a newer run superseding it) and the cancel endpoint. The run registers
+    a callback that cancels its task; cancelling is idempotent.
+    """
+    
+    def __init__(self):
+        self.reason: Optional[str] = None
+        self._callbacks: List[Callable[[], None]] = []
+    
+    @property
+    def cancelled(self) -> bool:
+        """Whether the run was asked to stop."""
+        return self.reason is not None
+    
+    def cancel(self, reason: str) -> bool:
+        """
+        Ask the run to stop.
+        
+        Args:
+            reason: One of CANCEL_REASONS.
+            
+        Returns:
+            True if this call cancelled the run, False if it already was.
+        """
+        if self.reason is not None:
+            return False
+        self.reason = reason
+        for callback in self._callbacks:
+            callback()
+        return True
+    
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Call `callback` when the run is cancelled (right away if it already was)."""
+        if self.reason is not None:
+            callback()
+        else:
+            self._callbacks.append(callback)
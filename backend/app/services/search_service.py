@@ -0,0 +1,187 @@
+"""Search service for indexing and querying thread content."""
+
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage
+from sqlalchemy import select, func, cast, literal
+from sqlalchemy.dialects.postgresql import REGCONFIG, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.thread import Thread
+from app.models.thread_search import ThreadSearchEntry, SEARCH_CONFIG, TITLE_ENTRY_ID
+
+logger = logging.getLogger(__name__)
+
+# Message types that carry user-visible conversation text
+INDEXED_MESSAGE_TYPES = ("human", "ai")
+
+# Upper bound on indexed characters per message (tsvector values are capped at 1MB)
+MAX_INDEXED_CHARS = 20000
+
+# ts_headline options for highlighted snippets
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+
+
+def _message_text(message: BaseMessage) -> str:
+    """Extract plain text from a message's string or content-block payload."""
+    if isinstance(message.content, str):
+        return message.content
+    if isinstance(message.content, list):
+        return "".join(
+            c if isinstance(c, str) else c.get("text", "")
+            for c in message.content
+        )
+    return ""
+
+
+async def index_thread_title(session: AsyncSession, thread_id: str, title: str) -> None:
+    """
+    Insert or refresh the search entry for a thread title.
+
+    The caller owns the transaction and must commit.
+
+    Args:
+        session: Database session.
+        thread_id: Thread ID.
+        title: Current thread title.
+    """
+    stmt = insert(ThreadSearchEntry).values(
+        thread_id=thread_id,
+        message_id=TITLE_ENTRY_ID,
+        role="title",
+        content=title[:MAX_INDEXED_CHARS],
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ThreadSearchEntry.thread_id, ThreadSearchEntry.message_id],
+        set_={"content": stmt.excluded.content},
+    )
+    await session.execute(stmt)
+
+
+async def index_messages(
+    session: AsyncSession,
+    thread_id: str,
+    messages: Sequence[BaseMessage],
+    title: Optional[str] = None,
+) -> int:
+    """
+    Add search entries for conversation messages that are not indexed yet.
+
+    Messages already indexed (same thread and message id) are skipped by the
+    database, so callers can pass an overlapping window of recent messages.
+    The caller owns the transaction and must commit.
+
+    Args:
+        session: Database session.
+        thread_id: Thread ID the messages belong to.
+        messages: Messages to index.
+        title: Optional thread title, indexed only if the thread has no title entry yet.
+
+    Returns:
+        Number of candidate rows sent to the database.
+    """
+    rows = []
+    if title:
+        rows.append({
+            "thread_id": thread_id,
+            "message_id": TITLE_ENTRY_ID,
+            "role": "title",
+            "content": title[:MAX_INDEXED_CHARS],
+        })
+
+    for message in messages:
+        if message.type not in INDEXED_MESSAGE_TYPES or not message.id:
+            continue
+
+        text = _message_text(message).strip()
+        if not text:
+            continue
+
+        rows.append({
+            "thread_id": thread_id,
+            "message_id": message.id,
+            "role": message.type,
+            "content": text[:MAX_INDEXED_CHARS],
+        })
+
+    if not rows:
+        return 0
+
+    await session.execute(
+        insert(ThreadSearchEntry)
+        .values(rows)
+        .on_conflict_do_nothing(
+            index_elements=[ThreadSearchEntry.thread_id, ThreadSearchEntry.message_id]
+        )
+    )
+    return len(rows)
+
+
+def current_turn(messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+    """
+    Return the messages of the latest turn, starting at the last human message.
+
+    Args:
+        messages: Full conversation history.
+
+    Returns:
+        Messages from the last human message to the end.
+    """
+    for index in range(len(messages) - 1, -1, -1):
+        if messages[index].type == "human":
+            return list(messages[index:])
+    return list(messages)
+
+
+async def search_threads(
+    session: AsyncSession,
+    query: str,
+    limit: int = 20,
+) -> List[Tuple[Thread, float, Optional[str]]]:
+    """
+    Full-text search over thread titles and message content.
+
+    Each thread is represented by its best-ranked matching entry, and snippets
+    are only computed for the returned page.
+
+    Args:
+        session: Database session.
+        query: User search text (websearch syntax: quotes, OR, -negation).
+        limit: Maximum number of threads to return.
+
+    Returns:
+        List of (thread, rank, snippet) tuples ordered by descending rank.
+    """
+    config = cast(literal(SEARCH_CONFIG), REGCONFIG)
+    ts_query = func.websearch_to_tsquery(config, query)
+    rank = func.ts_rank(ThreadSearchEntry.search_vector, ts_query)
+
+    best_per_thread = (
+        select(
+            ThreadSearchEntry.thread_id,
+            ThreadSearchEntry.content,
+            rank.label("rank"),
+        )
+        .where(ThreadSearchEntry.search_vector.op("@@")(ts_query))
+        .distinct(ThreadSearchEntry.thread_id)
+        .order_by(ThreadSearchEntry.thread_id, rank.desc())
+        .subquery()
+    )
+    top = (
+        select(best_per_thread)
+        .order_by(best_per_thread.c.rank.desc())
+        .limit(limit)
+        .subquery()
+    )
+
+    result = await session.execute(
+        select(
+            Thread,
+            top.c.rank,
+            func.ts_headline(config, top.c.content, ts_query, HEADLINE_OPTIONS),
+        )
+        .join(top, top.c.thread_id == Thread.id)
+        .order_by(top.c.rank.desc(), Thread.updated_at.desc())
+    )
+    return [(thread, float(score), snippet) for thread, score, snippet in result.all()]
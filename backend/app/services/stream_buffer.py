@@ -0,0 +1,171 @@
+"""Bounded buffer between an agent run and the response streaming it to a client."""
+
+import asyncio
+import weakref
+from collections import deque
+from typing import Callable, Deque, Iterable, MutableSequence, Optional, Union
+
+from app.schemas.message import MessageResponse, StreamEvent, StreamSummaryData
+from app.telemetry.metrics import STREAM_BUFFER_OVERFLOWS, STREAM_BUFFER_PEAK
+
+StreamItem = Union[MessageResponse, StreamEvent]
+
+# Buffers of the streams in progress, read by the metrics collector at scrape time
+live_buffers: "weakref.WeakSet[StreamBuffer]" = weakref.WeakSet()
+
+
+class SlowConsumerError(RuntimeError):
+    """The client fell a whole buffer behind its run (the "disconnect" policy)."""
+
+
+def _is_token(item: StreamItem) -> bool:
+    return isinstance(item, MessageResponse) and item.type == "ai" and not item.data.tool_calls
+
+
+def merge_token(items: MutableSequence[StreamItem], item: StreamItem) -> bool:
+    """
+    Merge a token into the last of `items` if that is a token of the same message.
+
+    Args:
+        items: Buffered items.
+        item: Item being added.
+
+    Returns:
+        Whether the item was merged (and must not be appended).
+    """
+    tail = items[-1] if items else None
+    if tail is None or not (_is_token(tail) and _is_token(item)) or tail.data.id != item.data.id:
+        return False
+    data = tail.data.model_copy(update={"content": tail.data.content + item.data.content})
+    items[-1] = tail.model_copy(update={"data": data})
+    return True
+
+
+class StreamBuffer:
+    """
+    Bounded queue of one stream's items, filled by the run and drained by the response.
+
+    The run never waits for the client, so a slow reader does not keep the run's
+    model and database connections busy. Once the client is `maxsize` items
+    behind, further tokens are handled by the policy:
+
+    - "coalesce": a token is merged into the last buffered token of its message;
+      the client gets fewer, larger chunks and no text is lost.
+    - "summary": tokens are dropped and counted in one stream_summary event per
+      message; the full text is in the thread history.
+    - "disconnect": the stream fails with SlowConsumerError and `on_overflow` is
+      called (to cancel the run).
+
+    Other items (tool calls, tool results, approval requests) are never merged or
+    dropped, so the buffer can exceed `maxsize` by those.
+    """
+
+    def __init__(self, maxsize: int, policy: str, on_overflow: Optional[Callable[[], None]] = None):
+        """
+        Initialize the buffer.
+
+        Args:
+            maxsize: Items buffered before the policy applies.
+            policy: "coalesce", "summary" or "disconnect".
+            on_overflow: Called once when the "disconnect" policy drops the client.
+        """
+        self.maxsize = maxsize
+        self.policy = policy
+        self.on_overflow = on_overflow
+        self.peak = 0
+        self.overflows = 0
+        self._items: Deque[StreamItem] = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+        self._failed = False
+        live_buffers.add(self)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def occupancy(self) -> float:
+        """Buffered items as a fraction of the buffer size."""
+        return len(self._items) / self.maxsize
+
+    def _absorb(self, item: StreamItem) -> Optional[StreamItem]:
+        """Apply the policy to a token arriving at a full buffer; returns the item to append, if any."""
+        if self.policy == "coalesce":
+            return None if merge_token(self._items, item) else item
+
+        tail = self._items[-1] if self._items else None
+        if (
+            isinstance(tail, StreamEvent)
+            and tail.event == "stream_summary"
+            and tail.data.message_id == item.data.id
+        ):
+            tail.data.tokens += 1
+            return None
+        return StreamEvent(event="stream_summary", data=StreamSummaryData(message_id=item.data.id, tokens=1))
+
+    def put(self, item: StreamItem) -> None:
+        """
+        Add an item without waiting.
+
+        Args:
+            item: Token, tool call message or stream event.
+        """
+        if self._closed or self._failed:
+            return
+
+        if len(self._items) >= self.maxsize and _is_token(item):
+            self.overflows += 1
+            STREAM_BUFFER_OVERFLOWS.labels(self.policy).inc()
+            if self.policy == "disconnect":
+                self._fail()
+                return
+            item = self._absorb(item)
+            if item is None:
+                return
+
+        self._items.append(item)
+        self.peak = max(self.peak, len(self._items))
+        self._ready.set()
+
+    def extend(self, items: Iterable[StreamItem]) -> None:
+        """
+        Add items the client has to receive whole, without applying the policy.
+
+        Args:
+            items: Items already produced by the run (a replay of its output).
+        """
+        if self._closed or self._failed:
+            return
+        self._items.extend(items)
+        self.peak = max(self.peak, len(self._items))
+        self._ready.set()
+
+    def _fail(self) -> None:
+        self._failed = True
+        self._items.clear()
+        self._ready.set()
+        live_buffers.discard(self)
+        if self.on_overflow is not None:
+            self.on_overflow()
+
+    def close(self) -> None:
+        """Mark the end of the stream; buffered items are still delivered."""
+        if self._closed:
+            return
+        self._closed = True
+        self._ready.set()
+        STREAM_BUFFER_PEAK.observe(self.peak / self.maxsize)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> StreamItem:
+        while not self._items:
+            if self._failed:
+                raise SlowConsumerError(f"Client fell {self.maxsize} items behind the stream")
+            if self._closed:
+                live_buffers.discard(self)
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+        return self._items.popleft()
@@ -0,0 +1,283 @@
+"""Per-thread run serialization within a worker and across workers."""
+
+import asyncio
+import hashlib
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.config import settings
+from app.database import lock_engine
+from app.services.run_control import RunControl
+
+logger = logging.getLogger(__name__)
+
+# Bounds of the backoff between attempts to take a lock held by another worker (seconds)
+ADVISORY_RETRY_MIN = 0.02
+ADVISORY_RETRY_MAX = 0.5
+
+# Upper bound of the backoff between attempts to take the locks of running threads
+# again after the lock connection was lost (seconds)
+RELOCK_RETRY_MAX = 5.0
+
+
+class ThreadBusyError(RuntimeError):
+    """A thread already has a run in progress (or the wait for it timed out)."""
+
+
+def advisory_lock_key(thread_id: str) -> int:
+    """
+    Postgres advisory lock key of a thread.
+
+    Args:
+        thread_id: Thread ID.
+
+    Returns:
+        Signed 64-bit key derived from the thread ID.
+    """
+    digest = hashlib.blake2b(thread_id.encode(), digest_size=8, person=b"thread-run").digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class ThreadLease:
+    """The right to run a thread's graph, held from lock acquisition until release."""
+
+    def __init__(self, thread_id: str, control: Optional[RunControl] = None):
+        self.thread_id = thread_id
+        self.control = control or RunControl()
+        self.waited = False
+        self.advisory = False
+
+
+class ThreadLocks:
+    """
+    Serializes the runs of each thread.
+
+    Within the worker, runs of a thread wait on an asyncio.Lock. Across workers,
+    the running worker holds a session-level Postgres advisory lock on the
+    thread's key. All advisory locks of the worker are held by one dedicated
+    connection, opened outside the pool, so a run does not keep a pooled
+    connection busy. If that connection dies, Postgres releases every lock it
+    held: the runs in progress lose their advisory flag until a new connection
+    takes their locks again.
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._refs: Dict[str, int] = {}
+        self._holders: Dict[str, ThreadLease] = {}
+        self._conn: Optional[AsyncConnection] = None
+        self._conn_lock = asyncio.Lock()
+        self._relock_task: Optional[asyncio.Task] = None
+
+    def holder(self, thread_id: str) -> Optional[ThreadLease]:
+        """Lease of the thread's run in progress in this worker, if any."""
+        return self._holders.get(thread_id)
+
+    async def _connection(self) -> AsyncConnection:
+        """Dedicated autocommit connection holding this worker's advisory locks."""
+        if self._conn is None or self._conn.closed:
+            conn = await lock_engine.connect()
+            self._conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        return self._conn
+
+    async def _close_connection(self) -> None:
+        """Close the lock connection; its locks are released by the server."""
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                await conn.close()
+            except Exception:
+                pass
+
+    async def _drop_connection(self) -> None:
+        """
+        Close a broken lock connection.
+
+        Every run in progress loses its advisory lock with it, and other workers may
+        now start runs on those threads, until _relock() takes the locks again.
+        """
+        await self._close_connection()
+        lost = [lease for lease in self._holders.values() if lease.advisory]
+        for lease in lost:
+            lease.advisory = False
+        if lost:
+            logger.warning(f"Lock connection lost: {len(lost)} running threads lost their advisory lock")
+            if self._relock_task is None or self._relock_task.done():
+                self._relock_task = asyncio.create_task(self._relock())
+
+    async def _relock(self) -> None:
+        """Take the advisory locks of this worker's running threads again, retrying with backoff."""
+        delay = ADVISORY_RETRY_MIN
+        while any(not lease.advisory for lease in self._holders.values()):
+            async with self._conn_lock:
+                try:
+                    conn = await self._connection()
+                    for thread_id, lease in list(self._holders.items()):
+                        if lease.advisory:
+                            continue
+                        key = advisory_lock_key(thread_id)
+                        result = await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})
+                        if not result.scalar():
+                            # Left without the lock: its run goes on, as with the database down at acquire()
+                            logger.warning(f"Thread={thread_id} was locked by another worker while its lock was lost")
+                        elif self._holders.get(thread_id) is lease:
+                            lease.advisory = True
+                        else:
+                            # Released meanwhile
+                            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                    return
+                except Exception as e:
+                    logger.warning(f"Failed to take the advisory locks of running threads again: {e}")
+                    await self._close_connection()
+                    for lease in self._holders.values():
+                        lease.advisory = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RELOCK_RETRY_MAX)
+
+    async def _try_advisory(self, key: int) -> bool:
+        """Try to take an advisory lock without waiting."""
+        async with self._conn_lock:
+            conn = await self._connection()
+            try:
+                result = await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})
+                return bool(result.scalar())
+            except Exception:
+                await self._drop_connection()
+                raise
+
+    async def _unlock_advisory(self, key: int) -> None:
+        """Release an advisory lock held by this worker."""
+        async with self._conn_lock:
+            if self._conn is None:
+                return
+            try:
+                await self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+            except Exception:
+                await self._drop_connection()
+                raise
+
+    async def _acquire_advisory(self, lease: ThreadLease, policy: str) -> None:
+        """Take the thread's advisory lock, waiting for other workers when queueing."""
+        key = advisory_lock_key(lease.thread_id)
+        delay = ADVISORY_RETRY_MIN
+
+        while True:
+            try:
+                if await self._try_advisory(key):
+                    lease.advisory = True
+                    return
+            except Exception as e:
+                # The run needs the database anyway; keep the in-process guarantee
+                logger.warning(f"Advisory lock unavailable for thread={lease.thread_id}: {e}")
+                return
+
+            if policy == "reject":
+                raise ThreadBusyError(f"Thread {lease.thread_id} has a run in progress on another worker")
+
+            # Runs on other workers cannot be cancelled from here; wait for them instead
+            lease.waited = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, ADVISORY_RETRY_MAX)
+
+    async def acquire(
+        self,
+        thread_id: str,
+        policy: Optional[str] = None,
+        control: Optional[RunControl] = None,
+    ) -> ThreadLease:
+        """
+        Wait for the right to run a thread.
+
+        Args:
+            thread_id: Thread ID.
+            policy: What to do when the thread is busy (defaults to settings.thread_run_policy):
+                "queue" waits, "reject" raises ThreadBusyError, "cancel" stops this worker's
+                run in progress and then waits for it.
+            control: Cancellation handle of the run, reachable through holder().
+
+        Returns:
+            Lease to pass to release().
+
+        Raises:
+            ThreadBusyError: If the thread is busy under the "reject" policy, or the wait
+                exceeded settings.thread_lock_timeout.
+        """
+        policy = policy or settings.thread_run_policy
+        lease = ThreadLease(thread_id, control)
+        lock = self._locks.setdefault(thread_id, asyncio.Lock())
+
+        if lock.locked():
+            if policy == "reject":
+                raise ThreadBusyError(f"Thread {thread_id} has a run in progress")
+            holder = self._holders.get(thread_id)
+            if policy == "cancel" and holder is not None:
+                logger.info(f"Cancelling the run in progress on thread={thread_id}")
+                holder.control.cancel("superseded")
+            lease.waited = True
+
+        self._refs[thread_id] = self._refs.get(thread_id, 0) + 1
+        try:
+            async with asyncio.timeout(settings.thread_lock_timeout):
+                await lock.acquire()
+                try:
+                    await self._acquire_advisory(lease, policy)
+                except BaseException:
+                    lock.release()
+                    raise
+        except TimeoutError:
+            self._unref(thread_id)
+            raise ThreadBusyError(f"Timed out waiting for the run in progress on thread {thread_id}")
+        except BaseException:
+            self._unref(thread_id)
+            raise
+
+        self._holders[thread_id] = lease
+        if lease.waited:
+            logger.info(f"Acquired thread={thread_id} after waiting for the previous run")
+        return lease
+
+    def _unref(self, thread_id: str) -> None:
+        """Drop a waiter or holder, forgetting the thread's lock when it was the last one."""
+        self._refs[thread_id] -= 1
+        if self._refs[thread_id] == 0:
+            del self._refs[thread_id]
+            del self._locks[thread_id]
+
+    async def release(self, lease: ThreadLease) -> None:
+        """
+        Release a thread for its next run.
+
+        Args:
+            lease: Lease returned by acquire().
+        """
+        thread_id = lease.thread_id
+        if self._holders.get(thread_id) is lease:
+            del self._holders[thread_id]
+
+        try:
+            if lease.advisory:
+                lease.advisory = False
+                # Shielded: a cancelled release must not leave the lock held by this session
+                await asyncio.shield(self._unlock_advisory(advisory_lock_key(thread_id)))
+        except Exception as e:
+            logger.warning(f"Failed to release the advisory lock of thread={thread_id}: {e}")
+        finally:
+            self._locks[thread_id].release()
+            self._unref(thread_id)
+
+    async def close(self) -> None:
+        """Close the lock connection, releasing this worker's advisory locks."""
+        if self._relock_task is not None:
+            self._relock_task.cancel()
+            await asyncio.gather(self._relock_task, return_exceptions=True)
+            self._relock_task = None
+        async with self._conn_lock:
+            await self._close_connection()
+        self._conn_lock = asyncio.Lock()
+
+
+# Run locks of this worker's threads
+thread_locks = ThreadLocks()
@@ -1,25 +1,71 @@
 """Thread service for managing conversation threads."""
 
 import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
 from typing import Optional
 from uuid import uuid4
 
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.thread import Thread
 from app.schemas.thread import ThreadCreate, ThreadUpdate
+from app.services.search_service import index_thread_title
 
 logger = logging.getLogger(__name__)
 
+# Seconds during which a registered thread's updatedAt is not bumped again
+THREAD_TOUCH_INTERVAL = 60.0
+
+# Maximum number of thread ids remembered by this process
+KNOWN_THREADS_MAX_SIZE = 10000
+
+# Thread ids registered by this process, mapped to the monotonic time of registration
+_known_threads: "OrderedDict[str, float]" = OrderedDict()
+
+
+def default_thread_title(initial_message: str = "") -> str:
+    """
+    Derive the title of a thread registered from its first message.
+    
+    Args:
+        initial_message: First user message of the thread.
+        
+    Returns:
+        Thread title.
+    """
+    return initial_message[:50] if initial_message else "New Conversation"
+
+
+def _remember_thread(thread_id: str, touched_at: float) -> None:
+    """Record a thread as registered, evicting the least recently used entries."""
+    _known_threads[thread_id] = touched_at
+    _known_threads.move_to_end(thread_id)
+    while len(_known_threads) > KNOWN_THREADS_MAX_SIZE:
+        _known_threads.popitem(last=False)
+
+
+def _forget_thread(thread_id: str) -> None:
+    """Drop a thread from the registration cache."""
+    _known_threads.pop(thread_id, None)
+
 
 async def ensure_thread(
     session: AsyncSession,
     thread_id: str,
     initial_message: str = ""
-) -> Thread:
+) -> Optional[Thread]:
     """
-    Ensure a thread exists, creating it if necessary.
+    Ensure a thread exists, creating it if necessary, and bump its updatedAt.
+    
+    Registration is a single INSERT ... ON CONFLICT DO UPDATE, so concurrent first
+    messages for the same thread cannot race on the primary key. Threads registered
+    by this process within THREAD_TOUCH_INTERVAL seconds are not bumped: their
+    INSERT does nothing on conflict, which neither writes nor locks the row, and
+    still recreates a thread deleted meanwhile (by another worker).
     
     Args:
         session: Database session.
@@ -27,29 +73,40 @@ async def ensure_thread(
         initial_message: Initial message to use as title if creating new thread.
         
     Returns:
-        Thread instance.
+        Thread instance, or None if the thread was recently registered by this
+        process and still exists.
     """
-    # Check if thread exists
-    result = await session.execute(
-        select(Thread).where(Thread.id == thread_id)
-    )
-    thread = result.scalar_one_or_none()
-    
-    if thread:
-        return thread
+    now = time.monotonic()
+    touched_at = _known_threads.get(thread_id)
+    recent = touched_at is not None and now - touched_at < THREAD_TOUCH_INTERVAL
     
-    # Create new thread
-    title = initial_message[:50] if initial_message else "New Conversation"
-    thread = Thread(
+    timestamp = datetime.utcnow()
+    stmt = insert(Thread).values(
         id=thread_id,
-        title=title,
+        title=default_thread_title(initial_message),
+        created_at=timestamp,
+        updated_at=timestamp,
     )
-    
-    session.add(thread)
+    if recent:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[Thread.id])
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Thread.id],
+            set_={"updatedAt": stmt.excluded.updatedAt},
+        )
+    
+    result = await session.execute(stmt.returning(Thread), execution_options={"populate_existing": True})
+    thread = result.scalar_one_or_none()
     await session.commit()
-    await session.refresh(thread)
     
-    logger.info(f"Created new thread: {thread_id}")
+    if thread is None:
+        _known_threads.move_to_end(thread_id)
+        return None
+    
+    if recent:
+        logger.info(f"Recreated thread deleted by another worker: {thread_id}")
+    _remember_thread(thread_id, now)
+    logger.debug(f"Registered thread: {thread_id}")
     return thread
 
 
@@ -108,6 +165,8 @@ async def create_thread(session: AsyncSession, thread_data: ThreadCreate) -> Thr
     )
     
     session.add(thread)
+    await session.flush()
+    await index_thread_title(session, thread.id, thread.title)
     await session.commit()
     await session.refresh(thread)
     
@@ -138,6 +197,7 @@ async def update_thread(
     
     if thread_data.title is not None:
         thread.title = thread_data.title
+        await index_thread_title(session, thread.id, thread.title)
     
     await session.commit()
     await session.refresh(thread)
@@ -164,6 +224,7 @@ async def delete_thread(session: AsyncSession, thread_id: str) -> bool:
     
     await session.delete(thread)
     await session.commit()
+    _forget_thread(thread_id)
     
     logger.info(f"Deleted thread: {thread_id}")
     return True
@@ -0,0 +1,5 @@
+"""Runtime telemetry: timings, metrics and diagnostics."""
+
+from app.telemetry.timing import PhaseTimer
+
+__all__ = ["PhaseTimer"]
@@ -0,0 +1,158 @@
+"""Event-loop lag monitor and blocking-call detector."""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from app.config import settings
+from app.telemetry.metrics import LOOP_BLOCKED, LOOP_LAG
+
+logger = logging.getLogger(__name__)
+
+# Blocking events kept for the admin endpoint
+MAX_BLOCKING_EVENTS = 50
+
+
+class LoopMonitor:
+    """
+    Measure event-loop lag and catch callbacks that block the loop.
+
+    A probe task sleeps for `interval` and records how late it wakes up; every
+    stream in the worker is delayed by the same amount. With `capture_stacks`, a
+    watchdog thread also notices when the probe is overdue by more than
+    `block_threshold` and records the loop thread's stack while it is still
+    blocked, which points at the offending callback.
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        block_threshold: Optional[float] = None,
+        capture_stacks: Optional[bool] = None,
+    ):
+        """
+        Initialize a stopped monitor.
+
+        Args:
+            interval: Seconds between probes (defaults to LOOP_MONITOR_INTERVAL).
+            block_threshold: Lag in seconds counted as blocking (defaults to LOOP_BLOCK_THRESHOLD).
+            capture_stacks: Capture stacks of blocking callbacks (defaults to LOOP_DEBUG).
+        """
+        self.interval = settings.loop_monitor_interval if interval is None else interval
+        self.block_threshold = settings.loop_block_threshold if block_threshold is None else block_threshold
+        self.capture_stacks = settings.loop_debug if capture_stacks is None else capture_stacks
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.blocking_events: Deque[Dict[str, Any]] = deque(maxlen=MAX_BLOCKING_EVENTS)
+        self._probe_due: Optional[float] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        """Whether the probe task is running."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> "LoopMonitor":
+        """Start probing the running event loop (and the watchdog in debug mode)."""
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+        if self.capture_stacks:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+        logger.info(
+            f"Event loop monitor started (interval={self.interval * 1000:.0f}ms, "
+            f"threshold={self.block_threshold * 1000:.0f}ms, stacks={self.capture_stacks})"
+        )
+        return self
+
+    async def stop(self) -> None:
+        """Stop the probe task and the watchdog."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _probe(self) -> None:
+        while True:
+            self._probe_due = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - self._probe_due, 0.0)
+            LOOP_LAG.observe(lag)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.block_threshold:
+                LOOP_BLOCKED.inc()
+                if not self.capture_stacks:
+                    logger.warning(f"Event loop was blocked for {lag * 1000:.0f}ms")
+
+    def _watch(self) -> None:
+        # Report each blocking episode once, identified by the overdue probe
+        reported_due = None
+        while not self._stop.wait(self.block_threshold / 2):
+            due = self._probe_due
+            if due is None or due == reported_due:
+                continue
+            blocked_for = time.perf_counter() - due
+            if blocked_for < self.block_threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            reported_due = due
+            self.blocking_events.append({
+                "at": time.time(),
+                "blocked_ms": round(blocked_for * 1000, 1),
+                "stack": stack,
+            })
+            logger.warning(f"Event loop blocked for over {blocked_for * 1000:.0f}ms in:\n{stack}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current lag figures and recent blocking events."""
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "block_threshold_ms": self.block_threshold * 1000,
+            "capture_stacks": self.capture_stacks,
+            "last_lag_ms": round(self.last_lag * 1000, 3),
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "blocking_events": list(self.blocking_events),
+        }
+
+
+# Monitor of this worker's event loop, started in the application lifespan
+loop_monitor: Optional[LoopMonitor] = None
+
+
+def start_loop_monitor() -> Optional[LoopMonitor]:
+    """Start the worker's loop monitor unless disabled by LOOP_MONITOR_ENABLED."""
+    global loop_monitor
+
+    if not settings.loop_monitor_enabled:
+        return None
+    loop_monitor = LoopMonitor().start()
+    return loop_monitor
+
+
+async def stop_loop_monitor() -> None:
+    """Stop the worker's loop monitor."""
+    global loop_monitor
+
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+        loop_monitor = None
@@ -0,0 +1,373 @@
+"""Prometheus metrics for streaming, graph execution and pool internals."""
+
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.exposition import CONTENT_TYPE_LATEST
+from prometheus_client.process_collector import ProcessCollector
+from prometheus_client.registry import Collector
+
+# Registry for the application's metrics (kept separate from the global default
+# registry so importing the module twice, e.g. in tests, cannot register twice)
+registry = CollectorRegistry()
+ProcessCollector(registry=registry)
+
+# Buckets in seconds, from single tokens up to long tool-using runs
+TOKEN_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+STREAM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+BUFFER_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0)
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Graph nodes with a duration series; other chains are ignored
+GRAPH_NODES = ("agent", "tool_approval", "tools")
+
+STREAM_TTFT = Histogram(
+    "agent_stream_ttft_seconds",
+    "Time from stream request to the first token",
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+STREAM_INTER_TOKEN = Histogram(
+    "agent_stream_inter_token_seconds",
+    "Gap between consecutive streamed tokens",
+    buckets=TOKEN_BUCKETS,
+    registry=registry,
+)
+STREAM_DURATION = Histogram(
+    "agent_stream_duration_seconds",
+    "Total duration of agent streams",
+    ["outcome"],
+    buckets=STREAM_BUCKETS,
+    registry=registry,
+)
+STREAMS_IN_FLIGHT = Gauge(
+    "agent_streams_in_flight",
+    "Agent streams currently running",
+    registry=registry,
+)
+NODE_DURATION = Histogram(
+    "agent_graph_node_duration_seconds",
+    "Duration of graph node executions",
+    ["node", "status"],
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+TOOL_DURATION = Histogram(
+    "agent_tool_call_duration_seconds",
+    "Duration of tool calls",
+    ["tool", "status"],
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+LLM_DURATION = Histogram(
+    "agent_llm_request_duration_seconds",
+    "Duration of chat model requests",
+    ["model", "status"],
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+IDEMPOTENT_REQUESTS = Counter(
+    "agent_idempotent_requests",
+    "Stream requests with an idempotency key, by whether they started, attached to or replayed a run",
+    ["result"],
+    registry=registry,
+)
+RUNS_CANCELLED = Counter(
+    "agent_runs_cancelled",
+    "Agent runs cancelled before finishing, by reason (disconnected, user, superseded, slow_consumer)",
+    ["reason"],
+    registry=registry,
+)
+TOKENS_SAVED = Counter(
+    "agent_cancel_tokens_saved",
+    "Estimated tokens not generated because runs were cancelled",
+    ["model"],
+    registry=registry,
+)
+COMPRESSION_BYTES = Counter(
+    "http_compression_bytes",
+    "Response bytes before (in) and after (out) compression, by content coding",
+    ["encoding", "stage"],
+    registry=registry,
+)
+WS_SESSIONS = Gauge(
+    "agent_ws_sessions",
+    "Agent WebSocket sessions currently open",
+    registry=registry,
+)
+WS_FRAMES = Counter(
+    "agent_ws_frames",
+    "Frames of agent WebSocket sessions, by direction (in, out)",
+    ["direction"],
+    registry=registry,
+)
+STREAM_BUFFER_PEAK = Histogram(
+    "agent_stream_buffer_peak_ratio",
+    "Highest occupancy of a stream's buffer, as a fraction of its size",
+    buckets=BUFFER_BUCKETS,
+    registry=registry,
+)
+STREAM_BUFFER_OVERFLOWS = Counter(
+    "agent_stream_buffer_overflow_tokens",
+    "Tokens that arrived at a full stream buffer, by slow consumer policy",
+    ["policy"],
+    registry=registry,
+)
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay of the event loop in running a scheduled wake-up",
+    buckets=LOOP_LAG_BUCKETS,
+    registry=registry,
+)
+LOOP_BLOCKED = Counter(
+    "event_loop_blocked",
+    "Times the event loop was blocked longer than the blocking threshold",
+    registry=registry,
+)
+
+
+def model_label(model: Optional[str]) -> str:
+    """
+    Label value for a model name, without options that would explode cardinality.
+
+    Args:
+        model: Model name as requested (e.g. "gpt-4o-mini", "fake:fast?tokens=5").
+
+    Returns:
+        Model name without query options, or "default".
+    """
+    if not model:
+        return "default"
+    return model.partition("?")[0]
+
+
+# Smoothing of the per-model mean of tokens streamed by a completed run
+RUN_TOKENS_SMOOTHING = 0.1
+
+# Exponential moving average of tokens streamed by completed runs, by model label
+_run_tokens: Dict[str, float] = {}
+
+
+def record_completed_run(model: Optional[str], tokens: int) -> None:
+    """
+    Update the mean length of completed runs used to estimate tokens saved.
+
+    Args:
+        model: Model name of the run.
+        tokens: Tokens the run streamed.
+    """
+    label = model_label(model)
+    mean = _run_tokens.get(label)
+    _run_tokens[label] = tokens if mean is None else mean + RUN_TOKENS_SMOOTHING * (tokens - mean)
+
+
+def record_cancelled_run(model: Optional[str], reason: str, tokens: int) -> float:
+    """
+    Count a cancelled run and the tokens it did not generate.
+
+    Tokens saved are estimated as the mean length of the model's completed runs
+    minus what the cancelled run had already streamed (0 before any run completed).
+
+    Args:
+        model: Model name of the run.
+        reason: Why the run was cancelled.
+        tokens: Tokens streamed before the cancellation.
+
+    Returns:
+        Estimated tokens saved.
+    """
+    label = model_label(model)
+    saved = max(_run_tokens.get(label, 0.0) - tokens, 0.0)
+    RUNS_CANCELLED.labels(reason).inc()
+    TOKENS_SAVED.labels(label).inc(saved)
+    return saved
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Callback handler recording graph node, tool and model latencies.
+
+    Runs inline on the event loop (no executor hop); each callback only records a
+    start time or observes one histogram sample.
+    """
+
+    run_inline = True
+
+    def __init__(self, model: Optional[str] = None):
+        """
+        Initialize the handler for one run.
+
+        Args:
+            model: Model name used by the run, recorded as the LLM latency label.
+        """
+        self.model = model_label(model)
+        self._started: Dict[UUID, Tuple[float, str]] = {}
+
+    def _start(self, run_id: UUID, label: str) -> None:
+        self._started[run_id] = (time.perf_counter(), label)
+
+    def _finish(self, run_id: UUID, histogram: Histogram, status: str) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            start, label = started
+            histogram.labels(label, status).observe(time.perf_counter() - start)
+
+    def on_chain_start(
+        self,
+        serialized: Dict[str, Any],
+        inputs: Dict[str, Any],
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        # Nested runnables inherit the node metadata; only time the node itself
+        if node in GRAPH_NODES and kwargs.get("name") == node:
+            self._start(run_id, node)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, NODE_DURATION, "ok")
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        # Interrupts (tool approval) surface as errors of the interrupted node
+        status = "interrupted" if type(error).__name__ == "GraphInterrupt" else "error"
+        self._finish(run_id, NODE_DURATION, status)
+
+    def on_tool_start(
+        self,
+        serialized: Dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        self._start(run_id, kwargs.get("name") or (serialized or {}).get("name", "unknown"))
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, TOOL_DURATION, "ok")
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, TOOL_DURATION, "error")
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: Any,
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        self._start(run_id, self.model)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, LLM_DURATION, "ok")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, LLM_DURATION, "error")
+
+
+class StreamMetrics:
+    """Record TTFT, inter-token gaps, duration and in-flight count of one stream."""
+
+    def __init__(self):
+        """Start measuring a stream and count it as in flight."""
+        self.started_at = time.perf_counter()
+        self.last_token_at: Optional[float] = None
+        STREAMS_IN_FLIGHT.inc()
+
+    def token(self) -> None:
+        """Record that a token was streamed."""
+        now = time.perf_counter()
+        if self.last_token_at is None:
+            STREAM_TTFT.observe(now - self.started_at)
+        else:
+            STREAM_INTER_TOKEN.observe(now - self.last_token_at)
+        self.last_token_at = now
+
+    def finish(self, outcome: str) -> None:
+        """
+        Record the stream duration and stop counting it as in flight.
+
+        Args:
+            outcome: "ok", "error", "cancelled", "rejected" or "ignored".
+        """
+        STREAM_DURATION.labels(outcome).observe(time.perf_counter() - self.started_at)
+        STREAMS_IN_FLIGHT.dec()
+
+
+class RuntimeCollector(Collector):
+    """Gauges read from live objects at scrape time instead of on every update."""
+
+    def describe(self) -> Iterable[Any]:
+        # Skip the registration-time collect(), which would import the services early
+        return []
+
+    def collect(self) -> Iterable[Any]:
+        from app.services import agent_service
+        from app.services.stream_buffer import live_buffers
+        from app.telemetry.pools import get_pool_stats
+
+        yield GaugeMetricFamily(
+            "agent_cache_size", "Compiled agent graphs in the cache",
+            value=int(agent_service._agent is not None),
+        )
+        yield GaugeMetricFamily(
+            "agent_model_cache_size", "Chat model instances in the cache",
+            value=len(agent_service._llm_cache),
+        )
+
+        buffers = list(live_buffers)
+        yield GaugeMetricFamily(
+            "agent_stream_buffer_items", "Items buffered for clients across streams",
+            value=sum(len(b) for b in buffers),
+        )
+        yield GaugeMetricFamily(
+            "agent_stream_buffer_max_occupancy", "Fullest stream buffer, as a fraction of its size",
+            value=max((b.occupancy for b in buffers), default=0.0),
+        )
+
+        stats = get_pool_stats()
+        size = GaugeMetricFamily("db_pool_size", "Maximum pool connections", labels=["pool"])
+        checked_out = GaugeMetricFamily(
+            "db_pool_checked_out", "Connections in use", labels=["pool"]
+        )
+        utilization = GaugeMetricFamily(
+            "db_pool_utilization", "Fraction of pool connections in use", labels=["pool"]
+        )
+        timeouts = CounterMetricFamily(
+            "db_pool_timeouts", "Connection acquisitions that timed out", labels=["pool"]
+        )
+        wait = CounterMetricFamily(
+            "db_pool_wait_seconds", "Time spent waiting for connections", labels=["pool"]
+        )
+
+        for pool in ("sqlalchemy", "checkpointer"):
+            pool_stats = stats.get(pool)
+            if pool_stats is None:
+                continue
+            size.add_metric([pool], pool_stats["size"])
+            checked_out.add_metric([pool], pool_stats["checked_out"])
+            utilization.add_metric([pool], pool_stats["utilization"])
+            timeouts.add_metric([pool], pool_stats["timeouts"])
+            wait.add_metric([pool], pool_stats["wait_ms_total"] / 1000)
+
+        yield from (size, checked_out, utilization, timeouts, wait)
+
+
+registry.register(RuntimeCollector())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text exposition format.
+
+    Returns:
+        Tuple of (payload, content type).
+    """
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,123 @@
+"""Connection pool instrumentation for the SQLAlchemy and checkpointer pools."""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolWaitStats:
+    """Accumulated connection acquisition statistics for a pool."""
+
+    def __init__(self):
+        """Initialize empty counters."""
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, wait_seconds: float, timed_out: bool = False) -> None:
+        """
+        Record one connection acquisition.
+
+        Args:
+            wait_seconds: Time spent acquiring the connection.
+            timed_out: Whether the acquisition failed with a pool timeout.
+        """
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            if wait_seconds > self.wait_seconds_max:
+                self.wait_seconds_max = wait_seconds
+            if timed_out:
+                self.timeouts += 1
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waits, in `wait_stats`."""
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the pool and its acquisition statistics."""
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def recreate(self) -> "TimedAsyncQueuePool":
+        """Create the pool replacing this one (engine.dispose()), keeping the statistics."""
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+    def connect(self):
+        """Check out a connection, recording the acquisition time."""
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+
+def _sqlalchemy_pool_stats() -> Dict[str, Any]:
+    """Snapshot of the SQLAlchemy engine pool."""
+    from app.database import engine
+
+    pool = engine.pool
+    size = pool.size()
+    checked_out = pool.checkedout()
+    wait_stats = pool.wait_stats
+    return {
+        "size": size,
+        "checked_out": checked_out,
+        "idle": pool.checkedin(),
+        "utilization": checked_out / size if size else 0.0,
+        "checkouts": wait_stats.checkouts,
+        "timeouts": wait_stats.timeouts,
+        "wait_ms_total": round(wait_stats.wait_seconds_total * 1000, 3),
+        "wait_ms_max": round(wait_stats.wait_seconds_max * 1000, 3),
+    }
+
+
+def _checkpointer_pool_stats() -> Optional[Dict[str, Any]]:
+    """Snapshot of the psycopg checkpointer pool, or None if it is not open yet."""
+    from app.agent import memory
+
+    pool = memory.get_connection_pool()
+    if pool is None:
+        return None
+
+    stats = pool.get_stats()
+    max_size = stats.get("pool_max", pool.max_size)
+    in_use = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+    return {
+        "size": max_size,
+        "open": stats.get("pool_size", 0),
+        "checked_out": in_use,
+        "idle": stats.get("pool_available", 0),
+        "utilization": in_use / max_size if max_size else 0.0,
+        "waiting": stats.get("requests_waiting", 0),
+        "checkouts": stats.get("requests_num", 0),
+        "queued": stats.get("requests_queued", 0),
+        "timeouts": stats.get("requests_errors", 0),
+        "wait_ms_total": stats.get("requests_wait_ms", 0),
+    }
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Collect utilization and wait-time statistics for both database pools.
+
+    Returns:
+        Dictionary with the per-process connection budget and per-pool stats.
+    """
+    from app.config import settings
+
+    return {
+        "budget": settings.db_connection_budget,
+        "sqlalchemy": _sqlalchemy_pool_stats(),
+        "checkpointer": _checkpointer_pool_stats(),
+    }
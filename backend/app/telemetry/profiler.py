@@ -0,0 +1,118 @@
+"""On-demand sampling profiler producing flamegraph-compatible collapsed stacks."""
+
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Optional, Set
+
+# Sampling frequency bounds (samples per second)
+DEFAULT_HZ = 100
+MAX_HZ = 1000
+
+# Finished profiles kept for retrieval by id
+MAX_STORED_PROFILES = 20
+
+
+def _frame_label(frame) -> str:
+    """Label a frame as 'file.py:qualified.name'."""
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling thread stacks from a background thread.
+
+    Nothing runs until start() is called; while running, a daemon thread reads
+    sys._current_frames() at the configured rate and counts each distinct stack.
+    By default only the thread that started the profiler (the event loop) is sampled.
+    """
+
+    def __init__(self, hz: int = DEFAULT_HZ, all_threads: bool = False):
+        """
+        Initialize a stopped profiler.
+
+        Args:
+            hz: Samples per second (capped at MAX_HZ).
+            all_threads: Sample every thread instead of only the starting thread.
+        """
+        self.id = uuid.uuid4().hex[:12]
+        self.interval = 1 / min(max(hz, 1), MAX_HZ)
+        self.all_threads = all_threads
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.duration = 0.0
+        self._target_threads: Set[int] = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the sampling thread is active."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "SamplingProfiler":
+        """Start sampling in a daemon thread."""
+        self._target_threads = {threading.get_ident()}
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        """Stop sampling and wait for the sampling thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.started_at is not None:
+            self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (not self.all_threads and thread_id not in self._target_threads):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """
+        Render the samples in collapsed-stack format ('root;...;leaf count' per line).
+
+        The output can be fed directly to flamegraph.pl or speedscope.
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Bounded store of finished profiles, retrievable by id."""
+
+    def __init__(self, max_size: int = MAX_STORED_PROFILES):
+        """Initialize an empty store."""
+        self.max_size = max_size
+        self._profiles: "OrderedDict[str, SamplingProfiler]" = OrderedDict()
+        self.active: Optional[SamplingProfiler] = None
+
+    def add(self, profiler: SamplingProfiler) -> None:
+        """Store a finished profile, evicting the oldest beyond max_size."""
+        self._profiles[profiler.id] = profiler
+        while len(self._profiles) > self.max_size:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[SamplingProfiler]:
+        """Get a stored profile by id."""
+        return self._profiles.get(profile_id)
+
+
+# Profiles of this worker
+profile_store = ProfileStore()
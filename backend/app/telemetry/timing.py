@@ -0,0 +1,63 @@
+"""Lightweight phase timing for request critical paths."""
+
+import time
+from typing import Awaitable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class PhaseTimer:
+    """
+    Record the duration of named phases of a single request.
+    
+    Phases may overlap (e.g. steps awaited concurrently); each one is measured
+    independently, and marks record the elapsed time since the timer started.
+    """
+    
+    def __init__(self):
+        """Start the timer."""
+        self.started_at = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+    
+    def elapsed(self) -> float:
+        """Seconds elapsed since the timer started."""
+        return time.perf_counter() - self.started_at
+    
+    def mark(self, name: str) -> float:
+        """
+        Record the elapsed time since start under the given name.
+        
+        Args:
+            name: Phase name.
+            
+        Returns:
+            Elapsed seconds.
+        """
+        elapsed = self.elapsed()
+        self.phases[name] = elapsed
+        return elapsed
+    
+    async def timed(self, name: str, awaitable: Awaitable[T]) -> T:
+        """
+        Await an awaitable and record how long it took.
+        
+        Args:
+            name: Phase name.
+            awaitable: Work to measure.
+            
+        Returns:
+            The awaitable's result.
+        """
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.phases[name] = time.perf_counter() - start
+    
+    def get(self, name: str) -> Optional[float]:
+        """Get a recorded phase duration in seconds."""
+        return self.phases.get(name)
+    
+    def summary(self) -> str:
+        """Format recorded phases as 'name=12.3ms' pairs."""
+        return " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.phases.items())
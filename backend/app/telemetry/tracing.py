@@ -0,0 +1,280 @@
+"""OpenTelemetry tracing for streams, graph runs, checkpoints and SQL."""
+
+import logging
+from typing import Any, Awaitable, Dict, Optional, TypeVar
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from opentelemetry.trace import Span, Status, StatusCode
+
+from app.config import settings
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Tracer used by the application; a no-op until setup_tracing() installs a provider
+tracer = trace.get_tracer("app")
+
+# Graph nodes traced as spans; other chains are folded into their node span
+GRAPH_NODES = ("agent", "tool_approval", "tools")
+
+_provider = None
+_exporter = None
+
+# Engines whose SQL statements are traced, for shutdown_tracing() to unhook
+_instrumented_engines = []
+
+
+def setup_tracing() -> bool:
+    """
+    Install a tracer provider exporting to the configured exporter.
+
+    With TRACING_EXPORTER=none (the default) nothing is installed and every span
+    is a no-op. "console" writes spans to stdout and "file" appends them as JSON
+    lines to TRACING_FILE. SQL statement spans are only hooked up when enabled.
+
+    Returns:
+        Whether tracing was enabled.
+    """
+    global _provider, _exporter
+
+    if settings.tracing_exporter == "none" or _provider is not None:
+        return _provider is not None
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    if settings.tracing_exporter == "file":
+        out = open(settings.tracing_file, "a", buffering=1)
+        _exporter = ConsoleSpanExporter(
+            out=out, formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+        # Kept on the exporter for shutdown_tracing() to close
+        _exporter.trace_file = out
+    else:
+        _exporter = ConsoleSpanExporter()
+
+    _provider = TracerProvider(resource=Resource.create({"service.name": settings.tracing_service_name}))
+    _provider.add_span_processor(BatchSpanProcessor(_exporter))
+    trace.set_tracer_provider(_provider)
+
+    instrument_sqlalchemy()
+    logger.info(f"Tracing enabled with the {settings.tracing_exporter} exporter")
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans, shut the tracer provider down and unhook SQL statement spans."""
+    global _provider, _exporter
+
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+    trace_file = getattr(_exporter, "trace_file", None)
+    if trace_file is not None:
+        trace_file.close()
+    _exporter = None
+    uninstrument_sqlalchemy()
+
+
+def instrument_sqlalchemy(engine=None) -> None:
+    """
+    Record a span for every SQL statement executed by an engine.
+
+    Args:
+        engine: Async engine to instrument (defaults to the application engine).
+    """
+    from sqlalchemy import event
+
+    if engine is None:
+        from app.database import engine
+
+    sync_engine = engine.sync_engine
+    for name, listener in _SQL_LISTENERS:
+        if not event.contains(sync_engine, name, listener):
+            event.listen(sync_engine, name, listener)
+    _instrumented_engines.append(sync_engine)
+
+
+def uninstrument_sqlalchemy() -> None:
+    """Stop recording SQL statement spans on every instrumented engine."""
+    from sqlalchemy import event
+
+    for sync_engine in _instrumented_engines:
+        for name, listener in _SQL_LISTENERS:
+            if event.contains(sync_engine, name, listener):
+                event.remove(sync_engine, name, listener)
+    _instrumented_engines.clear()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = tracer.start_span(
+        "sql " + statement.split(None, 1)[0].upper(),
+        attributes={"db.system": "postgresql", "db.statement": statement[:1000]},
+    )
+    context._otel_span = span
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, "_otel_span", None)
+    if span is not None:
+        span.end()
+
+
+def _handle_error(exception_context):
+    span = getattr(exception_context.execution_context, "_otel_span", None)
+    if span is not None:
+        span.record_exception(exception_context.original_exception)
+        span.set_status(Status(StatusCode.ERROR))
+        span.end()
+
+
+_SQL_LISTENERS = (
+    ("before_cursor_execute", _before_cursor_execute),
+    ("after_cursor_execute", _after_cursor_execute),
+    ("handle_error", _handle_error),
+)
+
+
+async def traced(name: str, awaitable: Awaitable[T], **attributes: Any) -> T:
+    """
+    Await an awaitable inside a span.
+
+    Args:
+        name: Span name.
+        awaitable: Work to trace.
+        attributes: Span attributes.
+
+    Returns:
+        The awaitable's result.
+    """
+    with tracer.start_as_current_span(name, attributes=attributes):
+        return await awaitable
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Callback handler turning graph nodes, model calls and tool calls into spans.
+
+    Spans are parented through LangChain run ids, rooted at the span that was
+    current when the handler was created, and carry the thread and run ids.
+    """
+
+    run_inline = True
+
+    def __init__(self, thread_id: str, model: Optional[str] = None):
+        """
+        Initialize the handler for one run.
+
+        Args:
+            thread_id: Thread of the run, added to every span.
+            model: Model name of the run, used when the model does not report one.
+        """
+        self.thread_id = thread_id
+        self.model = model
+        self.root_context = otel_context.get_current()
+        self.root_run_id: Optional[str] = None
+        self._spans: Dict[UUID, Span] = {}
+        self._parents: Dict[UUID, Optional[UUID]] = {}
+
+    def _parent_context(self, parent_run_id: Optional[UUID]):
+        # Walk up runs that have no span of their own (nested chains)
+        while parent_run_id is not None:
+            span = self._spans.get(parent_run_id)
+            if span is not None:
+                return trace.set_span_in_context(span, self.root_context)
+            parent_run_id = self._parents.get(parent_run_id)
+        return self.root_context
+
+    def _track(self, run_id: UUID, parent_run_id: Optional[UUID]) -> None:
+        self._parents[run_id] = parent_run_id
+        if parent_run_id is None and self.root_run_id is None:
+            self.root_run_id = str(run_id)
+            trace.get_current_span(self.root_context).set_attribute("run_id", self.root_run_id)
+
+    def _start(self, name: str, run_id: UUID, parent_run_id: Optional[UUID], **attributes: Any) -> None:
+        attributes.update({"thread_id": self.thread_id, "langchain.run_id": str(run_id)})
+        if self.root_run_id:
+            attributes["run_id"] = self.root_run_id
+        self._spans[run_id] = tracer.start_span(
+            name,
+            context=self._parent_context(parent_run_id),
+            attributes=attributes,
+        )
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None) -> None:
+        self._parents.pop(run_id, None)
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        if error is not None:
+            if type(error).__name__ == "GraphInterrupt":
+                span.set_attribute("interrupted", True)
+            else:
+                span.record_exception(error)
+                span.set_status(Status(StatusCode.ERROR, str(error)))
+        span.end()
+
+    def on_chain_start(
+        self,
+        serialized: Dict[str, Any],
+        inputs: Dict[str, Any],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._track(run_id, parent_run_id)
+        node = (metadata or {}).get("langgraph_node")
+        if node in GRAPH_NODES and kwargs.get("name") == node:
+            self._start(f"node {node}", run_id, parent_run_id, **{"langgraph.node": node})
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._track(run_id, parent_run_id)
+        model = (metadata or {}).get("ls_model_name") or self.model or "chat_model"
+        self._start(f"llm {model}", run_id, parent_run_id, **{"llm.model": model})
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_tool_start(
+        self,
+        serialized: Dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._track(run_id, parent_run_id)
+        name = kwargs.get("name") or (serialized or {}).get("name", "unknown")
+        self._start(f"tool {name}", run_id, parent_run_id, **{"tool.name": name})
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
@@ -0,0 +1,75 @@
+"""Startup warm-up of pools, MCP sessions and the default agent."""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.agent.mcp import get_mcp_tools
+from app.agent.memory import get_checkpointer
+from app.services.agent_service import prebuild_default_agent
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupState:
+    """Progress of the startup warm-up, used to gate readiness."""
+
+    def __init__(self):
+        """Initialize an empty, not-started state."""
+        self.task: Optional[asyncio.Task] = None
+        self.steps: Dict[str, str] = {}
+        self.duration: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether warm-up has finished (successfully or not)."""
+        return self.duration is not None
+
+
+# Global warm-up state for this process
+warmup_state = WarmupState()
+
+
+async def _run_step(name: str, step: Callable[[], Awaitable]) -> None:
+    """Run one warm-up step, recording its outcome instead of raising."""
+    start = time.perf_counter()
+    try:
+        await step()
+        warmup_state.steps[name] = "ok"
+        logger.info(f"Warm-up step '{name}' done in {(time.perf_counter() - start) * 1000:.1f}ms")
+    except Exception as e:
+        warmup_state.steps[name] = f"failed: {e}"
+        logger.warning(f"Warm-up step '{name}' failed: {e}")
+
+
+async def warm_up() -> None:
+    """
+    Open the checkpointer pool, start MCP sessions and pre-build the default agent.
+
+    The checkpointer pool and MCP tools are loaded concurrently; the default agent
+    is built afterwards so it reuses both. Failed steps are logged and fall back to
+    lazy initialization on the first request.
+    """
+    start = time.perf_counter()
+    warmup_state.steps = {"checkpointer": "pending", "mcp": "pending", "agent": "pending"}
+
+    await asyncio.gather(
+        _run_step("checkpointer", get_checkpointer),
+        _run_step("mcp", get_mcp_tools),
+    )
+    await _run_step("agent", prebuild_default_agent)
+
+    warmup_state.duration = time.perf_counter() - start
+    logger.info(f"Warm-up finished in {warmup_state.duration * 1000:.1f}ms: {warmup_state.steps}")
+
+
+def start_warm_up() -> asyncio.Task:
+    """
+    Start warm-up in the background so liveness checks answer while it runs.
+
+    Returns:
+        The warm-up task.
+    """
+    warmup_state.task = asyncio.create_task(warm_up())
+    return warmup_state.task
@@ -0,0 +1 @@
+"""Benchmarks and load tests for the backend (run from the backend directory)."""
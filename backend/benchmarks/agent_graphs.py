@@ -0,0 +1,168 @@
+"""
+Memory and build time of per-combination graphs versus one configurable graph.
+
+Before, the service compiled a StateGraph for every distinct model, tool list and
+approval flag a request picked. Now one graph is compiled with every tool and the
+model, enabled tools and approval mode come from config["configurable"]. This
+builds the agents for the same combinations both ways with the fake model (no
+provider, database or HTTP) and reports the memory they retain and the time
+spent building them. Each combination then runs one turn on the shared graph to
+check that the overrides take effect.
+
+Usage (from the backend directory):
+    python -m benchmarks.agent_graphs
+    python -m benchmarks.agent_graphs --combinations 50 --tools 12 --output graphs.json
+"""
+
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import BaseTool, StructuredTool
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.agent.builder import AgentBuilder
+from app.agent.fake_llm import create_fake_model
+
+MODEL_NAMES = [f"fake:instant?tokens={n}&script=tool:tool_0,text" for n in (2, 3, 4, 5, 6)]
+
+
+def build_tools(count: int) -> List[BaseTool]:
+    """Tools with distinct names and argument schemas, like a set of MCP tools."""
+    def make(i: int) -> BaseTool:
+        def run(query: str, limit: int = 10) -> str:
+            return f"tool_{i}: {query[:limit]}"
+        return StructuredTool.from_function(run, name=f"tool_{i}", description=f"Benchmark tool {i}.")
+    return [make(i) for i in range(count)]
+
+
+def combinations(count: int, tools: List[BaseTool]) -> List[Tuple[str, List[str], bool]]:
+    """(model name, enabled tool names, approve all) for `count` distinct combinations."""
+    names = [t.name for t in tools]
+    subsets = [names[:k] for k in range(1, len(names) + 1)]
+    combos = itertools.product(MODEL_NAMES, subsets, (False, True))
+    return list(itertools.islice(combos, count))
+
+
+def _measure(build) -> Tuple[Any, int, float]:
+    """Run `build` and return its result, the memory it retains and the seconds it took."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, retained, elapsed
+
+
+def build_per_combination(combos, tools: List[BaseTool]) -> List[Any]:
+    """The old scheme: one model instance and one compiled graph per combination."""
+    by_name = {t.name: t for t in tools}
+    return [
+        AgentBuilder(
+            tools=[by_name[n] for n in enabled],
+            llm=create_fake_model(model),
+            checkpointer=MemorySaver(),
+            approve_all_tools=approve_all,
+        ).build()
+        for model, enabled, approve_all in combos
+    ]
+
+
+def build_shared(combos, tools: List[BaseTool]) -> Tuple[Any, List[Dict[str, Any]]]:
+    """The new scheme: one compiled graph, models cached by name, one configurable per combination."""
+    models = {}
+    configurables = []
+    for model, enabled, approve_all in combos:
+        if model not in models:
+            models[model] = create_fake_model(model)
+        configurables.append({"llm": models[model], "tools": enabled, "approve_all_tools": approve_all})
+    agent = AgentBuilder(tools=tools, checkpointer=MemorySaver()).build()
+    return agent, configurables
+
+
+async def run_combinations(agent, configurables: List[Dict[str, Any]]) -> int:
+    """Run one turn per combination on the shared graph; return how many paused for approval."""
+    paused = 0
+    for i, configurable in enumerate(configurables):
+        config = {"configurable": {"thread_id": f"combo-{i}", **configurable}}
+        await agent.ainvoke({"messages": [HumanMessage(content="benchmark")]}, config)
+        if (await agent.aget_state(config)).next:
+            paused += 1
+    return paused
+
+
+def run_benchmark(count: int, tool_count: int) -> Dict[str, Any]:
+    """
+    Build the agents for `count` combinations both ways.
+    
+    Args:
+        count: Number of (model, tools, approval) combinations.
+        tool_count: Number of available tools.
+        
+    Returns:
+        Retained KiB and build milliseconds per scheme, and the approval check.
+    """
+    tools = build_tools(tool_count)
+    combos = combinations(count, tools)
+    # Warm up imports and caches outside the measurement
+    build_per_combination(combos[:1], tools)
+
+    graphs, before_bytes, before_s = _measure(lambda: build_per_combination(combos, tools))
+    del graphs
+    (agent, configurables), after_bytes, after_s = _measure(lambda: build_shared(combos, tools))
+    paused = asyncio.run(run_combinations(agent, configurables))
+
+    return {
+        "combinations": len(combos),
+        "tools": tool_count,
+        "per_combination": {"retained_kib": round(before_bytes / 1024, 1), "build_ms": round(before_s * 1000, 1)},
+        "shared": {"retained_kib": round(after_bytes / 1024, 1), "build_ms": round(after_s * 1000, 1)},
+        # Only runs that don't auto-approve stop at the approval of tool_0
+        "paused_runs": paused,
+        "expected_paused_runs": sum(1 for _, _, approve_all in combos if not approve_all),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--combinations", type=int, default=50, help="Distinct model/tools/approval combinations")
+    parser.add_argument("--tools", type=int, default=10, help="Available tools")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.combinations, args.tools)
+    before, after = results["per_combination"], results["shared"]
+    print(
+        f"{results['combinations']} combinations: per-combination graphs {before['retained_kib']:.0f} KiB "
+        f"in {before['build_ms']:.0f} ms, shared graph {after['retained_kib']:.0f} KiB "
+        f"in {after['build_ms']:.0f} ms ({after['retained_kib'] / before['retained_kib'] - 1:+.0%} memory)"
+    )
+
+    if args.output:
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
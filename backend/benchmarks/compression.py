@@ -0,0 +1,201 @@
+"""
+Bytes on the wire and CPU cost of response compression, per content coding.
+
+Sends representative responses through CompressionMiddleware in process: a long
+thread history (tool outputs and response_metadata), an MCP tool schema listing,
+and an SSE stream of token frames compressed frame by frame (COMPRESSION_SSE).
+Reports the encoded size, the ratio against the identity response and the CPU
+time per response (per frame for SSE).
+
+Usage (from the backend directory):
+    python -m benchmarks.compression
+    python -m benchmarks.compression --repeat 200 --output compression.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import string
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.compression import CompressionMiddleware, available_encoders
+from app.config import settings
+from app.routers.agent import _encode_sse_frame
+from app.schemas.message import AIMessageData, MessageResponse
+
+# Seeded vocabulary: text compresses like prose, not like a repeated sentence
+_rng = random.Random(0)
+WORDS = ["".join(_rng.choices(string.ascii_lowercase, k=_rng.randint(2, 9))) for _ in range(3000)]
+
+
+def _text(n: int, seed: int) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def history_payload(turns: int = 40) -> bytes:
+    """History of a tool-using thread, as the history endpoint returns it."""
+    messages: List[Dict[str, Any]] = []
+    for t in range(turns):
+        call_id = f"call_{t:04d}"
+        results = [
+            {"title": _text(6, t * 100 + r), "url": f"https://example.com/{t}/{r}", "snippet": _text(30, t * 200 + r)}
+            for r in range(8)
+        ]
+        messages += [
+            {"type": "human", "data": {"id": f"h{t}", "content": _text(20, t + 2000)}},
+            {"type": "ai", "data": {
+                "id": f"a{t}", "content": "",
+                "tool_calls": [{"id": call_id, "name": "search", "args": {"query": _text(5, t + 1000)}}],
+                "response_metadata": {"finish_reason": "tool_calls", "model_name": "gpt-4o-mini",
+                                      "token_usage": {"prompt_tokens": 1200 + t, "completion_tokens": 24}},
+            }},
+            {"type": "tool", "data": {"id": f"t{t}", "content": json.dumps(results), "tool_call_id": call_id,
+                                      "name": "search", "status": "success"}},
+            {"type": "ai", "data": {
+                "id": f"b{t}", "content": _text(150, t + 3000),
+                "response_metadata": {"finish_reason": "stop", "model_name": "gpt-4o-mini",
+                                      "token_usage": {"prompt_tokens": 2400 + t, "completion_tokens": 150}},
+            }},
+        ]
+    return json.dumps({"messages": messages, "total": len(messages)}).encode()
+
+
+def tool_listing_payload(tools: int = 60) -> bytes:
+    """MCP tool schemas, as the MCP tools endpoint returns them."""
+    listing = [{
+        "name": f"server__tool_{i}",
+        "description": _text(25, i + 4000),
+        "schema": {"type": "object", "required": ["query"], "properties": {
+            "query": {"type": "string", "description": _text(10, i + 5000)},
+            "limit": {"type": "integer", "minimum": 1, "maximum": 100, "default": 10},
+            "filters": {"type": "object", "additionalProperties": {"type": "string"}},
+        }},
+    } for i in range(tools)]
+    return json.dumps({"tools": listing, "total": tools}).encode()
+
+
+def sse_frames(tokens: int = 300) -> List[bytes]:
+    """Token frames of one streamed answer."""
+    return [
+        _encode_sse_frame(MessageResponse(
+            type="ai", data=AIMessageData(id="run-0001", content=" " + word),
+        )).encode()
+        for word in _text(tokens, 6000).split()
+    ]
+
+
+async def _respond(middleware_app, coding: Optional[str]) -> List[bytes]:
+    """Send one request through the middleware and return the body chunks."""
+    chunks: List[bytes] = []
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message["body"])
+
+    headers = [(b"accept-encoding", coding.encode())] if coding else []
+    await middleware_app({"type": "http", "headers": headers}, None, send)
+    return chunks
+
+
+def _json_app(body: bytes):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body, "more_body": False})
+    return app
+
+
+def _sse_app(frames: List[bytes]):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]})
+        for frame in frames:
+            await send({"type": "http.response.body", "body": frame, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+    return app
+
+
+async def _measure(app, coding: Optional[str], repeat: int) -> Dict[str, float]:
+    """Encoded size and CPU seconds per response."""
+    middleware = CompressionMiddleware(app)
+    chunks = await _respond(middleware, coding)
+    start = time.process_time()
+    for _ in range(repeat):
+        await _respond(middleware, coding)
+    cpu = (time.process_time() - start) / repeat
+    return {"bytes": sum(len(c) for c in chunks), "cpu_s": cpu, "chunks": len(chunks)}
+
+
+async def _run(repeat: int) -> Dict[str, Any]:
+    codings = ["identity"] + sorted(available_encoders())
+    frames = sse_frames()
+    payloads = {"history": history_payload(), "tool_listing": tool_listing_payload()}
+    results: Dict[str, Any] = {"codings": codings, "scenarios": {}}
+
+    previous_sse = settings.compression_sse
+    settings.compression_sse = True
+    try:
+        for name, body in payloads.items():
+            scenario = {}
+            for coding in codings:
+                m = await _measure(_json_app(body), None if coding == "identity" else coding, repeat)
+                scenario[coding] = {
+                    "bytes": m["bytes"],
+                    "ratio": round(len(body) / m["bytes"], 2),
+                    "cpu_us": round(m["cpu_s"] * 1e6, 1),
+                }
+            results["scenarios"][name] = scenario
+
+        raw = sum(len(f) for f in frames)
+        scenario = {}
+        for coding in codings:
+            m = await _measure(_sse_app(frames), None if coding == "identity" else coding, max(repeat // 10, 1))
+            scenario[coding] = {
+                "bytes": m["bytes"],
+                "ratio": round(raw / m["bytes"], 2),
+                "bytes_per_frame": round(m["bytes"] / len(frames), 1),
+                "cpu_us_per_frame": round(m["cpu_s"] * 1e6 / len(frames), 2),
+            }
+        results["scenarios"]["sse_per_frame"] = scenario
+    finally:
+        settings.compression_sse = previous_sse
+    return results
+
+
+def run_benchmark(repeat: int = 100) -> Dict[str, Any]:
+    """
+    Measure every scenario with every available coding.
+
+    Args:
+        repeat: Responses per measurement (a tenth of it for the SSE stream).
+
+    Returns:
+        Sizes, ratios and CPU cost by scenario and coding.
+    """
+    return asyncio.run(_run(repeat))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=100, help="Responses per measurement")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.repeat)
+    for name, scenario in results["scenarios"].items():
+        for coding, m in scenario.items():
+            cpu = f"{m['cpu_us']}us" if "cpu_us" in m else f"{m['cpu_us_per_frame']}us/frame"
+            print(f"{name:<14} {coding:<9} bytes={m['bytes']:<8} ratio={m['ratio']:<6} cpu={cpu}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""
+Load test for the SSE streaming endpoint.
+
+Drives many concurrent SSE clients against /api/agent/stream using the offline fake
+model and reports time-to-first-token, inter-token latency, stream duration and
+throughput per concurrency level, compared against stored baselines.
+
+By default a uvicorn worker is started on a free port with the current environment
+(point DATABASE_URL at a local Postgres) and fake models enabled; pass --url to
+target a running server, started with FAKE_MODELS_ENABLED=true.
+
+Usage (from the backend directory):
+    python -m benchmarks.load_stream --levels 1,50,200
+    python -m benchmarks.load_stream --url http://localhost:8000 --levels 100
+    python -m benchmarks.load_stream --save-baseline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.stats import compare, distribution, load_baselines, save_baselines
+
+DEFAULT_MODEL = "fake:realistic?tokens=50"
+DEFAULT_LEVELS = "1,10,50,100,200"
+BASELINE_PATH = Path(__file__).parent / "baselines" / "load_stream.json"
+STREAM_PATH = "/api/agent/stream"
+
+# Below uvicorn's 5s keep-alive timeout: a connection left idle between levels is
+# dropped by the client, instead of being reused while the server closes it
+KEEPALIVE_EXPIRY = 2.0
+
+
+@dataclass
+class StreamResult:
+    """Timings of one SSE stream, in seconds relative to the request start."""
+
+    ok: bool = False
+    error: Optional[str] = None
+    first_token_at: Optional[float] = None
+    token_times: List[float] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def inter_token_gaps(self) -> List[float]:
+        """Gaps between consecutive tokens."""
+        return [b - a for a, b in zip(self.token_times, self.token_times[1:])]
+
+
+async def run_stream(client: httpx.AsyncClient, model: str, content: str) -> StreamResult:
+    """
+    Run one stream on a fresh thread and record when each token frame arrives.
+
+    Args:
+        client: HTTP client pointing at the server.
+        model: Model option sent with the request.
+        content: User message.
+
+    Returns:
+        Timings of the stream.
+    """
+    result = StreamResult()
+    params = {"content": content, "threadId": f"load-{uuid.uuid4().hex}", "model": model}
+    start = time.perf_counter()
+
+    try:
+        async with client.stream("GET", STREAM_PATH, params=params) as response:
+            if response.status_code != 200:
+                result.error = f"HTTP {response.status_code}"
+                return result
+
+            event = None
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                    if event == "done":
+                        result.ok = True
+                elif line.startswith("data: "):
+                    if event == "error":
+                        result.error = json.loads(line[len("data: "):]).get("message", "error")
+                    elif event is None:
+                        result.token_times.append(time.perf_counter() - start)
+                elif not line:
+                    event = None
+
+        if not result.ok and result.error is None:
+            result.error = "stream ended without a done event"
+    except httpx.HTTPError as e:
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        result.duration = time.perf_counter() - start
+
+    if result.token_times:
+        result.first_token_at = result.token_times[0]
+    return result
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    concurrency: int,
+    model: str = DEFAULT_MODEL,
+    streams_per_client: int = 1,
+) -> Dict[str, Any]:
+    """
+    Run `concurrency` clients, each opening `streams_per_client` streams back to back.
+
+    Args:
+        client: HTTP client pointing at the server (its pool must allow `concurrency`
+            connections).
+        concurrency: Number of concurrent clients.
+        model: Model option sent with every request.
+        streams_per_client: Sequential streams per client.
+
+    Returns:
+        Aggregated metrics for the level.
+    """
+    async def worker(index: int) -> List[StreamResult]:
+        return [
+            await run_stream(client, model, f"load test client {index} request {n}")
+            for n in range(streams_per_client)
+        ]
+
+    start = time.perf_counter()
+    per_worker = await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    results = [r for rs in per_worker for r in rs]
+    ok = [r for r in results if r.ok]
+    tokens = sum(len(r.token_times) for r in ok)
+    errors = sorted({r.error for r in results if r.error})
+
+    metrics: Dict[str, Any] = {
+        "concurrency": concurrency,
+        "streams": len(results),
+        "errors": len(results) - len(ok),
+        "wall_s": round(wall, 3),
+        "tokens": tokens,
+        "tokens_per_s": round(tokens / wall, 1) if wall else 0.0,
+        "streams_per_s": round(len(ok) / wall, 2) if wall else 0.0,
+    }
+    metrics.update(distribution([r.first_token_at for r in ok if r.first_token_at], "ttft_ms"))
+    metrics.update(distribution([g for r in ok for g in r.inter_token_gaps], "itl_ms"))
+    metrics.update(distribution([r.duration for r in ok], "stream_ms"))
+    if errors:
+        metrics["error_samples"] = errors[:5]
+    return metrics
+
+
+def _free_port() -> int:
+    """Return a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_ready(url: str, timeout: float) -> None:
+    """Poll the readiness endpoint until the server has warmed up."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/ready")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"Server at {url} not ready after {timeout}s")
+
+
+def start_server(port: int, log_path: Optional[Path] = None) -> subprocess.Popen:
+    """Start a single uvicorn worker serving the app on a local port."""
+    log = open(log_path, "w") if log_path else subprocess.DEVNULL
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=Path(__file__).resolve().parent.parent,
+        # Not "development", which logs every SQL statement
+        env={**os.environ, "ENVIRONMENT": "benchmark", "FAKE_MODELS_ENABLED": "true"},
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Run every concurrency level and return the metrics keyed by scenario."""
+    levels = [int(level) for level in args.levels.split(",") if level.strip()]
+    server = None
+    url = args.url
+
+    if url is None:
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = start_server(port, args.server_log)
+
+    try:
+        await _wait_ready(url, args.startup_timeout)
+
+        limits = httpx.Limits(
+            max_connections=max(levels), max_keepalive_connections=max(levels), keepalive_expiry=KEEPALIVE_EXPIRY,
+        )
+        timeout = httpx.Timeout(args.request_timeout)
+        results = {}
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+            # One untimed stream so lazy initialization does not skew the first level
+            await run_stream(client, args.model, "warm up")
+
+            for concurrency in levels:
+                metrics = await run_level(client, concurrency, args.model, args.streams_per_client)
+                results[f"c{concurrency}"] = metrics
+                print(
+                    f"c={concurrency:<4} streams={metrics['streams']:<5} errors={metrics['errors']:<4} "
+                    f"ttft p50/p95/p99={metrics['ttft_ms_p50']}/{metrics['ttft_ms_p95']}/"
+                    f"{metrics['ttft_ms_p99']}ms itl p50/p99={metrics['itl_ms_p50']}/"
+                    f"{metrics['itl_ms_p99']}ms tokens/s={metrics['tokens_per_s']}",
+                    flush=True,
+                )
+        return results
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+# Metrics stored in baselines; the others are informational
+BASELINE_METRICS = (
+    "errors", "tokens_per_s", "ttft_ms_p50", "ttft_ms_p95", "ttft_ms_p99",
+    "itl_ms_p50", "itl_ms_p99", "stream_ms_p95",
+)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point; returns a non-zero exit code on regressions."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument("--levels", default=DEFAULT_LEVELS, help="Comma-separated concurrency levels")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Model option for every stream")
+    parser.add_argument("--streams-per-client", type=int, default=1)
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Store results as the new baseline")
+    parser.add_argument("--output", type=Path, help="Write the full results as JSON")
+    parser.add_argument("--server-log", type=Path, help="Write the started server's output to a file")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+
+    if args.output:
+        args.output.write_text(json.dumps({"model": args.model, "results": results}, indent=2) + "\n")
+
+    baselines = load_baselines(args.baseline)
+    if args.save_baseline:
+        scenarios = baselines.get("scenarios", {}) if baselines.get("model") == args.model else {}
+        for name, metrics in results.items():
+            scenarios[name] = {m: metrics[m] for m in BASELINE_METRICS if metrics.get(m) is not None}
+        save_baselines(args.baseline, {"model": args.model, "scenarios": scenarios})
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if baselines.get("model") != args.model:
+        print(f"No baseline for model {args.model!r} in {args.baseline}, skipping comparison")
+        return 0
+
+    regressions = compare(results, baselines["scenarios"], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
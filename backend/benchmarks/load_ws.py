@@ -0,0 +1,337 @@
+"""
+Load test of WebSocket agent sessions against SSE requests on tool approval turns.
+
+Each client runs a number of turns on its own thread. A turn is a message whose
+run stops for the approval of a tool call, then the approval resuming it: two
+requests over SSE, two frames on one connection over a session. Reports turn
+duration, resume latency (approval sent to the first frame of the resumed run),
+time to the first message frame and throughput per transport and concurrency level.
+
+By default a uvicorn worker is started on a free port with the current environment
+(point DATABASE_URL at a local Postgres); pass --url to target a running server.
+
+Usage (from the backend directory):
+    python -m benchmarks.load_ws --levels 1,50
+    python -m benchmarks.load_ws --transports ws,sse --turns 5
+    python -m benchmarks.load_ws --url http://localhost:8000 --levels 100
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import ormsgpack
+
+from benchmarks.load_stream import _free_port, _wait_ready, start_server
+from benchmarks.stats import compare, distribution, load_baselines, save_baselines
+
+DEFAULT_MODEL = "fake:fast?tokens=20&script=tool:lookup,text"
+DEFAULT_LEVELS = "1,10,50"
+DEFAULT_TRANSPORTS = "ws,ws-msgpack,sse"
+BASELINE_PATH = Path(__file__).parent / "baselines" / "load_ws.json"
+STREAM_PATH = "/api/agent/stream"
+SESSION_PATH = "/api/agent/ws"
+
+
+@dataclass
+class ClientResult:
+    """Timings of one client's turns, in seconds."""
+
+    ok: bool = False
+    error: Optional[str] = None
+    tokens: int = 0
+    turn_times: List[float] = field(default_factory=list)
+    resume_latencies: List[float] = field(default_factory=list)
+    first_frame_latencies: List[float] = field(default_factory=list)
+
+
+async def _session_frames(conn, frame_format: str):
+    """Decode the server frames of a session until the connection closes."""
+    while True:
+        raw = await conn.recv()
+        yield ormsgpack.unpackb(raw) if frame_format == "msgpack" else json.loads(raw)
+
+
+async def run_ws_client(connect: Callable, model: str, turns: int, frame_format: str = "json") -> ClientResult:
+    """
+    Run approval turns on one session.
+
+    Args:
+        connect: Opens a connection to a path (an async context manager whose
+            connection has send() and recv(), like websockets.connect).
+        model: Model option of the session.
+        turns: Turns to run.
+        frame_format: "json" or "msgpack".
+
+    Returns:
+        Timings of the client.
+    """
+    result = ClientResult()
+    thread_id = f"load-ws-{uuid.uuid4().hex}"
+    path = f"{SESSION_PATH}/{thread_id}?{httpx.QueryParams(model=model, format=frame_format)}"
+
+    def encode(frame: Dict[str, Any]):
+        return ormsgpack.packb(frame) if frame_format == "msgpack" else json.dumps(frame)
+
+    try:
+        async with connect(path) as conn:
+            frames = _session_frames(conn, frame_format)
+            if (await anext(frames))["event"] != "session":
+                raise RuntimeError("session frame expected first")
+
+            for n in range(turns):
+                start = time.perf_counter()
+                await conn.send(encode({"type": "message", "content": f"load test turn {n}"}))
+                approval, first_message = False, True
+                async for frame in frames:
+                    if frame["event"] == "message" and first_message:
+                        result.first_frame_latencies.append(time.perf_counter() - start)
+                        first_message = False
+                    approval = approval or frame["event"] == "approval_required"
+                    if frame["event"] in ("done", "error"):
+                        break
+                if frame["event"] == "error" or not approval:
+                    raise RuntimeError(frame["data"].get("message") or "no approval request")
+
+                resumed = time.perf_counter()
+                await conn.send(encode({"type": "approval", "action": "allow"}))
+                first = True
+                async for frame in frames:
+                    if first and frame["event"] != "ping":
+                        result.resume_latencies.append(time.perf_counter() - resumed)
+                        first = False
+                    if frame["event"] == "message" and frame["data"]["type"] == "ai":
+                        result.tokens += not frame["data"]["data"].get("tool_calls")
+                    if frame["event"] in ("done", "error"):
+                        break
+                if frame["event"] == "error":
+                    raise RuntimeError(frame["data"].get("message", "error"))
+                result.turn_times.append(time.perf_counter() - start)
+
+        result.ok = True
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+async def _sse_request(client: httpx.AsyncClient, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one SSE request; returns the time to its first frame, events and token count."""
+    start = time.perf_counter()
+    summary: Dict[str, Any] = {"first_frame": None, "first_message": None, "events": set(), "tokens": 0}
+    event = None
+    async with client.stream("GET", STREAM_PATH, params=params) as response:
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+                summary["events"].add(event)
+            elif line.startswith("data: "):
+                if summary["first_frame"] is None:
+                    summary["first_frame"] = time.perf_counter() - start
+                if event == "error":
+                    raise RuntimeError(json.loads(line[len("data: "):]).get("message", "error"))
+                if event is None:
+                    if summary["first_message"] is None:
+                        summary["first_message"] = time.perf_counter() - start
+                    if '"type": "ai"' in line and '"tool_calls": null' in line:
+                        summary["tokens"] += 1
+            elif not line:
+                event = None
+    return summary
+
+
+async def run_sse_client(client: httpx.AsyncClient, model: str, turns: int) -> ClientResult:
+    """
+    Run approval turns as SSE requests: one per message, one per approval.
+
+    Args:
+        client: HTTP client pointing at the server.
+        model: Model option sent with every request.
+        turns: Turns to run.
+
+    Returns:
+        Timings of the client.
+    """
+    result = ClientResult()
+    params = {"threadId": f"load-sse-{uuid.uuid4().hex}", "model": model}
+
+    try:
+        for n in range(turns):
+            start = time.perf_counter()
+            first = await _sse_request(client, {**params, "content": f"load test turn {n}"})
+            if "approval_required" not in first["events"]:
+                raise RuntimeError("no approval request")
+            if first["first_message"] is not None:
+                result.first_frame_latencies.append(first["first_message"])
+
+            resumed = await _sse_request(client, {**params, "content": "", "allowTool": "allow"})
+            result.resume_latencies.append(resumed["first_frame"])
+            result.tokens += resumed["tokens"]
+            result.turn_times.append(time.perf_counter() - start)
+
+        result.ok = True
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+async def run_level(
+    transport: str,
+    concurrency: int,
+    model: str = DEFAULT_MODEL,
+    turns: int = 3,
+    client: Optional[httpx.AsyncClient] = None,
+    connect: Optional[Callable] = None,
+) -> Dict[str, Any]:
+    """
+    Run `concurrency` clients of one transport, each running `turns` approval turns.
+
+    Args:
+        transport: "ws", "ws-msgpack" or "sse".
+        concurrency: Number of concurrent clients.
+        model: Model option of every run.
+        turns: Turns per client.
+        client: HTTP client for SSE.
+        connect: Connection factory for sessions (see run_ws_client).
+
+    Returns:
+        Aggregated metrics for the level.
+    """
+    if transport == "sse":
+        run_client = lambda: run_sse_client(client, model, turns)  # noqa: E731
+    else:
+        frame_format = "msgpack" if transport == "ws-msgpack" else "json"
+        run_client = lambda: run_ws_client(connect, model, turns, frame_format)  # noqa: E731
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_client() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    ok = [r for r in results if r.ok]
+    turns_done = sum(len(r.turn_times) for r in ok)
+    tokens = sum(r.tokens for r in ok)
+    errors = sorted({r.error for r in results if r.error})
+
+    metrics: Dict[str, Any] = {
+        "transport": transport,
+        "concurrency": concurrency,
+        "clients": len(results),
+        "errors": len(results) - len(ok),
+        "wall_s": round(wall, 3),
+        "turns": turns_done,
+        "tokens": tokens,
+        "turns_per_s": round(turns_done / wall, 2) if wall else 0.0,
+        "tokens_per_s": round(tokens / wall, 1) if wall else 0.0,
+    }
+    metrics.update(distribution([t for r in ok for t in r.first_frame_latencies], "first_frame_ms"))
+    metrics.update(distribution([t for r in ok for t in r.resume_latencies], "resume_ms"))
+    metrics.update(distribution([t for r in ok for t in r.turn_times], "turn_ms"))
+    if errors:
+        metrics["error_samples"] = errors[:5]
+    return metrics
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Run every transport and concurrency level and return the metrics keyed by scenario."""
+    import websockets
+
+    levels = [int(level) for level in args.levels.split(",") if level.strip()]
+    transports = [t.strip() for t in args.transports.split(",") if t.strip()]
+    server = None
+    url = args.url
+
+    if url is None:
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = start_server(port, args.server_log)
+
+    ws_url = url.replace("http", "ws", 1)
+
+    def connect(path: str):
+        return websockets.connect(ws_url + path, max_size=None, open_timeout=args.request_timeout)
+
+    try:
+        await _wait_ready(url, args.startup_timeout)
+
+        limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+        results = {}
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.request_timeout) as client:
+            # One untimed turn per transport so lazy initialization does not skew the first level
+            for transport in transports:
+                await run_level(transport, 1, args.model, 1, client, connect)
+
+            for concurrency in levels:
+                for transport in transports:
+                    metrics = await run_level(transport, concurrency, args.model, args.turns, client, connect)
+                    results[f"{transport}-c{concurrency}"] = metrics
+                    print(
+                        f"{transport:<10} c={concurrency:<4} turns={metrics['turns']:<5} "
+                        f"errors={metrics['errors']:<4} resume p50/p95/p99={metrics['resume_ms_p50']}/"
+                        f"{metrics['resume_ms_p95']}/{metrics['resume_ms_p99']}ms turn p50/p95="
+                        f"{metrics['turn_ms_p50']}/{metrics['turn_ms_p95']}ms turns/s={metrics['turns_per_s']}",
+                        flush=True,
+                    )
+        return results
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+# Metrics stored in baselines; the others are informational
+BASELINE_METRICS = ("errors", "turns_per_s", "resume_ms_p50", "resume_ms_p95", "turn_ms_p95")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point; returns a non-zero exit code on regressions."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument("--levels", default=DEFAULT_LEVELS, help="Comma-separated concurrency levels")
+    parser.add_argument("--transports", default=DEFAULT_TRANSPORTS, help="Comma-separated: ws, ws-msgpack, sse")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Model option for every run")
+    parser.add_argument("--turns", type=int, default=3, help="Approval turns per client")
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Store results as the new baseline")
+    parser.add_argument("--output", type=Path, help="Write the full results as JSON")
+    parser.add_argument("--server-log", type=Path, help="Write the started server's output to a file")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+
+    if args.output:
+        args.output.write_text(json.dumps({"model": args.model, "results": results}, indent=2) + "\n")
+
+    baselines = load_baselines(args.baseline)
+    if args.save_baseline:
+        scenarios = baselines.get("scenarios", {}) if baselines.get("model") == args.model else {}
+        for name, metrics in results.items():
+            scenarios[name] = {m: metrics[m] for m in BASELINE_METRICS if metrics.get(m) is not None}
+        save_baselines(args.baseline, {"model": args.model, "scenarios": scenarios})
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if baselines.get("model") != args.model:
+        print(f"No baseline for model {args.model!r} in {args.baseline}, skipping comparison")
+        return 0
+
+    regressions = compare(results, baselines["scenarios"], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
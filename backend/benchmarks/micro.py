@@ -0,0 +1,209 @@
+"""
+Micro-benchmarks for per-request hot functions.
+
+Each benchmark times a pure function on synthetic in-memory data (no database or
+network), so results are stable enough to track per commit. Results are printed
+and can be written as JSON and compared with stored baselines.
+
+Usage (from the backend directory):
+    python -m benchmarks.micro
+    python -m benchmarks.micro -k history --output micro.json
+    python -m benchmarks.micro --save-baseline
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from app.agent.mcp import build_mcp_server_configs
+from app.models.mcp_server import MCPServer, MCPServerType
+from app.routers.agent import _encode_sse_frame
+from app.schemas.message import AIMessageData, MessageResponse
+from app.serialization import mcp_server_reads
+from app.services.agent_service import _history_to_responses, _process_ai_message
+from benchmarks.stats import compare, load_baselines, save_baselines
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "micro.json"
+
+# Metrics stored in baselines; the others are informational
+BASELINE_METRICS = ("median_us",)
+
+
+def _ai_text_message() -> AIMessage:
+    """A typical streamed answer message."""
+    return AIMessage(
+        id="run-1",
+        content="The lighthouse keeper trimmed the wick before the storm arrived. " * 4,
+        response_metadata={"model_name": "gpt-4o-mini", "finish_reason": "stop"},
+    )
+
+
+def _ai_tool_call_message(index: int = 0) -> AIMessage:
+    """An AI message requesting one tool call."""
+    return AIMessage(
+        id=f"run-tool-{index}",
+        content="",
+        tool_calls=[{
+            "id": f"call_{index}",
+            "name": "search",
+            "args": {"query": "lighthouse history", "limit": 5},
+        }],
+        additional_kwargs={"tool_calls": [{"id": f"call_{index}", "type": "function"}]},
+    )
+
+
+def _history(size: int) -> List[BaseMessage]:
+    """A conversation of `size` messages cycling human, tool call, tool result, answer."""
+    messages: List[BaseMessage] = []
+    for i in range(size):
+        kind = i % 4
+        if kind == 0:
+            messages.append(HumanMessage(id=f"h{i}", content=f"Question number {i} about lighthouses"))
+        elif kind == 1:
+            messages.append(_ai_tool_call_message(i))
+        elif kind == 2:
+            messages.append(ToolMessage(id=f"t{i}", content="result " * 20, tool_call_id=f"call_{i - 1}"))
+        else:
+            messages.append(_ai_text_message())
+    return messages
+
+
+def _mcp_servers(count: int) -> List[MCPServer]:
+    """Transient MCP server rows, half stdio and half HTTP."""
+    now = datetime.now(timezone.utc)
+    servers = []
+    for i in range(count):
+        if i % 2:
+            servers.append(MCPServer(
+                id=f"server-{i}", name=f"http-{i}", type=MCPServerType.http, enabled=True,
+                url=f"https://mcp{i}.example.com/mcp", headers={"Authorization": "Bearer x"},
+                created_at=now, updated_at=now,
+            ))
+        else:
+            servers.append(MCPServer(
+                id=f"server-{i}", name=f"stdio-{i}", type=MCPServerType.stdio, enabled=True,
+                command="npx", args=["@modelcontextprotocol/server-filesystem", "/tmp"],
+                env={"LOG_LEVEL": "info"}, created_at=now, updated_at=now,
+            ))
+    return servers
+
+
+def build_benchmarks() -> Dict[str, Callable[[], Any]]:
+    """Return the benchmark callables keyed by name, with their inputs prepared."""
+    text_message = _ai_text_message()
+    tool_message = _ai_tool_call_message()
+    token_frame = MessageResponse(type="ai", data=AIMessageData(id="msg-1", content=" lighthouse"))
+    servers = _mcp_servers(20)
+    server_page = _mcp_servers(100)
+
+    benchmarks: Dict[str, Callable[[], Any]] = {
+        "process_ai_message.text": lambda: _process_ai_message(text_message),
+        "process_ai_message.tool_call": lambda: _process_ai_message(tool_message),
+        "sse_frame.token": lambda: _encode_sse_frame(token_frame),
+        "mcp_server_configs.20": lambda: build_mcp_server_configs(servers),
+        "mcp_server_read_list.100": lambda: mcp_server_reads(server_page),
+    }
+    for size in (10, 100, 1000):
+        history = _history(size)
+        benchmarks[f"history_to_responses.{size}"] = lambda history=history: _history_to_responses(history)
+    return benchmarks
+
+
+def measure(func: Callable[[], Any], rounds: int = 5, min_time: float = 0.2) -> Dict[str, Any]:
+    """
+    Time a callable with timeit, auto-ranging the loop count per round.
+
+    Args:
+        func: Callable to time.
+        rounds: Number of timed rounds.
+        min_time: Minimum duration of one round in seconds.
+
+    Returns:
+        Per-call timings in microseconds and calls per second.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2 if number < 8 else 4
+
+    per_call = [t / number * 1e6 for t in timer.repeat(repeat=rounds, number=number)]
+    median = statistics.median(per_call)
+    return {
+        "number": number,
+        "rounds": rounds,
+        "median_us": round(median, 3),
+        "min_us": round(min(per_call), 3),
+        "mean_us": round(statistics.mean(per_call), 3),
+        "stdev_us": round(statistics.stdev(per_call), 3) if rounds > 1 else 0.0,
+        "ops_per_s": round(1e6 / median, 1) if median else None,
+    }
+
+
+def run_benchmarks(
+    pattern: Optional[str] = None,
+    rounds: int = 5,
+    min_time: float = 0.2,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the benchmarks whose name contains `pattern` (all by default).
+
+    Returns:
+        Results keyed by benchmark name.
+    """
+    results = {}
+    for name, func in build_benchmarks().items():
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure(func, rounds=rounds, min_time=min_time)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point; returns a non-zero exit code on regressions."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-k", dest="pattern", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per round")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed relative regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Store results as the new baseline")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.pattern, args.rounds, args.min_time)
+    for name, metrics in results.items():
+        print(f"{name:<32} {metrics['median_us']:>12.3f}us  (+/- {metrics['stdev_us']:.3f})  {metrics['ops_per_s']:>12,.0f}/s")
+
+    if args.output:
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    baselines = load_baselines(args.baseline)
+    if args.save_baseline:
+        for name, metrics in results.items():
+            baselines[name] = {m: metrics[m] for m in BASELINE_METRICS}
+        save_baselines(args.baseline, baselines)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baselines, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
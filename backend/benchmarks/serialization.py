@@ -0,0 +1,177 @@
+"""
+CPU time of large list responses, per serialization path.
+
+Serves in-memory rows through FastAPI in process (no database), so only
+serialization is measured:
+
+- per_row: schemas built field by field and returned to FastAPI, which
+  validates them again against the response_model and encodes them with its
+  default JSON response (the previous code of the routers)
+- orjson: the same route with ORJSONResponse as the response class
+- adapter: rows validated with a precompiled TypeAdapter (from_attributes) and
+  the response written by pydantic-core (schema_response)
+
+For history, the previous route returned a dict of message schemas, encoded
+by jsonable_encoder.
+
+Usage (from the backend directory):
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --rows 10000 --repeat 10 --output serialization.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.models.thread import Thread
+from app.schemas.mcp import MCPServerListResponse, MCPServerRead
+from app.schemas.message import HistoryResponse
+from app.schemas.thread import ThreadListResponse, ThreadRead
+from app.serialization import mcp_server_reads, schema_response, thread_reads
+from app.services.agent_service import _history_to_responses
+from benchmarks.micro import _history, _mcp_servers
+
+
+def _threads(count: int) -> List[Thread]:
+    """Transient thread rows."""
+    now = datetime.now(timezone.utc)
+    return [
+        Thread(id=f"thread-{i:05d}", title=f"Conversation about lighthouses #{i}", created_at=now, updated_at=now)
+        for i in range(count)
+    ]
+
+
+def _per_row_thread(t: Thread) -> ThreadRead:
+    return ThreadRead(id=t.id, title=t.title, createdAt=t.created_at, updatedAt=t.updated_at)
+
+
+def _per_row_server(s) -> MCPServerRead:
+    return MCPServerRead(
+        id=s.id, name=s.name, type=s.type.value, enabled=s.enabled, command=s.command, args=s.args,
+        env=s.env, url=s.url, headers=s.headers, createdAt=s.created_at, updatedAt=s.updated_at,
+    )
+
+
+def build_app(rows: int) -> FastAPI:
+    """App serving the same rows through every serialization path."""
+    app = FastAPI()
+    threads = _threads(rows)
+    servers = _mcp_servers(rows)
+    messages = _history(rows)
+
+    for variant, response_class in (("per_row", JSONResponse), ("orjson", ORJSONResponse)):
+        @app.get(f"/threads/{variant}", response_model=ThreadListResponse, response_class=response_class)
+        async def list_threads_per_row():
+            reads = [_per_row_thread(t) for t in threads]
+            return ThreadListResponse(threads=reads, total=len(reads))
+
+        @app.get(f"/mcp_servers/{variant}", response_model=MCPServerListResponse, response_class=response_class)
+        async def list_servers_per_row():
+            reads = [_per_row_server(s) for s in servers]
+            return MCPServerListResponse(servers=reads, total=len(reads))
+
+        @app.get(f"/history/{variant}", response_class=response_class)
+        async def history_encoder():
+            history = _history_to_responses(messages)
+            return {"messages": history, "total": len(history)}
+
+    @app.get("/threads/adapter", response_model=ThreadListResponse)
+    async def list_threads_adapter():
+        reads = thread_reads(threads)
+        return schema_response(ThreadListResponse(threads=reads, total=len(reads)))
+
+    @app.get("/mcp_servers/adapter", response_model=MCPServerListResponse)
+    async def list_servers_adapter():
+        reads = mcp_server_reads(servers)
+        return schema_response(MCPServerListResponse(servers=reads, total=len(reads)))
+
+    @app.get("/history/adapter", response_model=HistoryResponse)
+    async def history_adapter():
+        history = _history_to_responses(messages)
+        return schema_response(HistoryResponse(messages=history, total=len(history)))
+
+    return app
+
+
+async def _measure(client: httpx.AsyncClient, path: str, repeat: int) -> Dict[str, Any]:
+    """Body and CPU seconds per request."""
+    body = (await client.get(path)).content
+    start = time.process_time()
+    for _ in range(repeat):
+        await client.get(path)
+    return {"body": body, "cpu_s": (time.process_time() - start) / repeat}
+
+
+async def _run(rows: int, repeat: int) -> Dict[str, Any]:
+    app = build_app(rows)
+    results: Dict[str, Any] = {"rows": rows, "scenarios": {}}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for scenario in ("threads", "mcp_servers", "history"):
+            measured = {
+                variant: await _measure(client, f"/{scenario}/{variant}", repeat)
+                for variant in ("per_row", "orjson", "adapter")
+            }
+            bodies = [json.loads(m["body"]) for m in measured.values()]
+            baseline = measured["per_row"]["cpu_s"]
+            results["scenarios"][scenario] = {
+                "identical": all(b == bodies[0] for b in bodies),
+                **{
+                    variant: {
+                        "cpu_ms": round(m["cpu_s"] * 1e3, 2),
+                        "bytes": len(m["body"]),
+                        "speedup": round(baseline / m["cpu_s"], 2) if m["cpu_s"] else None,
+                    }
+                    for variant, m in measured.items()
+                },
+            }
+    return results
+
+
+def run_benchmark(rows: int = 10000, repeat: int = 5) -> Dict[str, Any]:
+    """
+    Measure every scenario through every serialization path.
+
+    Args:
+        rows: Rows (messages for history) in each response.
+        repeat: Requests per measurement.
+
+    Returns:
+        CPU milliseconds, body size and speedup over per_row, by scenario and
+        path, and whether all paths returned the same JSON.
+    """
+    return asyncio.run(_run(rows, repeat))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10000, help="Rows per response")
+    parser.add_argument("--repeat", type=int, default=5, help="Requests per measurement")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.rows, args.repeat)
+    for name, scenario in results["scenarios"].items():
+        for variant in ("per_row", "orjson", "adapter"):
+            m = scenario[variant]
+            print(f"{name:<12} {variant:<8} cpu={m['cpu_ms']:>9.2f}ms  bytes={m['bytes']:<9} x{m['speedup']}")
+        if not scenario["identical"]:
+            print(f"{name:<12} MISMATCH: the paths returned different JSON")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Statistics and baseline comparison shared by the benchmarks."""
+
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+# Metric name suffixes where a higher value is better (everything else is a latency)
+HIGHER_IS_BETTER = ("_per_s", "throughput")
+
+# Metrics that fail whenever they are above zero, whatever the baseline recorded
+MUST_BE_ZERO = ("errors",)
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of a sequence of values.
+
+    Args:
+        values: Sample values (any order).
+        pct: Percentile between 0 and 100.
+
+    Returns:
+        The percentile, or None for an empty sample.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def distribution(values: Sequence[float], prefix: str, scale: float = 1000.0) -> Dict[str, Any]:
+    """
+    Summarize a sample as p50/p95/p99/max metrics.
+
+    Args:
+        values: Sample values in seconds.
+        prefix: Metric name prefix (e.g. "ttft_ms").
+        scale: Factor applied to each value (seconds to milliseconds by default).
+
+    Returns:
+        Dictionary like {"ttft_ms_p50": ..., "ttft_ms_p95": ..., ...}.
+    """
+    result: Dict[str, Any] = {}
+    for name, pct in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100)):
+        value = percentile(values, pct)
+        result[f"{prefix}_{name}"] = round(value * scale, 3) if value is not None else None
+    return result
+
+
+def load_baselines(path: Path) -> Dict[str, Any]:
+    """Load a baselines file, returning an empty mapping if it does not exist."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baselines(path: Path, baselines: Dict[str, Any]) -> None:
+    """Write a baselines file with stable formatting."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baselines: Dict[str, Dict[str, Any]],
+    tolerance: float,
+) -> List[str]:
+    """
+    Compare benchmark results with stored baselines.
+
+    Only metrics present in both are compared. Latencies regress when they exceed
+    the baseline by more than the tolerance; throughputs when they fall below it.
+    Errors regress whenever there are any, so a baseline recorded from a failing
+    service cannot make failures acceptable.
+
+    Args:
+        results: Results keyed by scenario, each a mapping of metric to value.
+        baselines: Baselines with the same shape.
+        tolerance: Allowed relative deviation (0.25 = 25%).
+
+    Returns:
+        Human readable descriptions of every regression (empty if none).
+    """
+    regressions = []
+    for scenario, metrics in results.items():
+        for metric in MUST_BE_ZERO:
+            value = metrics.get(metric)
+            if isinstance(value, (int, float)) and value > 0:
+                regressions.append(f"{scenario} {metric}: {value:g} (must be 0)")
+
+        for metric, baseline in baselines.get(scenario, {}).items():
+            value = metrics.get(metric)
+            if metric in MUST_BE_ZERO:
+                continue
+            if not isinstance(value, (int, float)) or not isinstance(baseline, (int, float)):
+                continue
+
+            if metric.endswith(HIGHER_IS_BETTER):
+                limit = baseline * (1 - tolerance)
+                failed = value < limit
+            else:
+                limit = baseline * (1 + tolerance)
+                failed = value > limit
+
+            if failed:
+                regressions.append(
+                    f"{scenario} {metric}: {value:g} vs baseline {baseline:g} (limit {limit:g})"
+                )
+    return regressions
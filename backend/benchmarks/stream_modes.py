@@ -0,0 +1,136 @@
+"""
+Per-token overhead of the agent streaming modes.
+
+Runs the agent graph in-process with the fake model (no provider, database or
+HTTP) at several concurrency levels, streaming each run through the "lean" mode
+(graph stream modes) and the "events" mode (astream_events v2), and reports CPU
+and wall time per streamed token.
+
+Usage (from the backend directory):
+    python -m benchmarks.stream_modes
+    python -m benchmarks.stream_modes --levels 1,50,200 --tokens 200 --output modes.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.agent.builder import AgentBuilder
+from app.agent.fake_llm import create_fake_model
+from app.services.agent_service import is_token, iter_agent_stream
+
+MODES = ("events", "lean")
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look a query up."""
+    return query.upper()
+
+
+def build_agent(tokens: int):
+    """Agent answering every turn with one tool call and then `tokens` tokens of text."""
+    return AgentBuilder(
+        tools=[lookup],
+        llm=create_fake_model(f"fake:instant?tokens={tokens}&script=tool:lookup,text"),
+        checkpointer=MemorySaver(),
+        approve_all_tools=True,
+    ).build()
+
+
+async def _run_stream(agent, mode: str, thread_id: str) -> int:
+    """Stream one run and return the number of tokens received."""
+    config = {"configurable": {"thread_id": thread_id}}
+    inputs = {"messages": [HumanMessage(content="benchmark the stream")]}
+    tokens = 0
+    async for message in iter_agent_stream(agent, inputs, config, f"msg-{thread_id}", mode=mode):
+        if is_token(message):
+            tokens += 1
+    return tokens
+
+
+async def run_mode(mode: str, concurrency: int, tokens: int) -> Dict[str, Any]:
+    """
+    Run `concurrency` streams at once in one mode.
+
+    Args:
+        mode: "lean" or "events".
+        concurrency: Number of simultaneous streams.
+        tokens: Tokens per answer.
+
+    Returns:
+        Tokens streamed, CPU and wall microseconds per token.
+    """
+    agent = build_agent(tokens)
+    # Warm up imports and the compiled graph outside the measurement
+    await _run_stream(agent, mode, f"warmup-{mode}")
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    counts = await asyncio.gather(*(
+        _run_stream(agent, mode, f"{mode}-{concurrency}-{i}") for i in range(concurrency)
+    ))
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+    total = sum(counts)
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "tokens": total,
+        "cpu_us_per_token": round(cpu / total * 1e6, 2) if total else None,
+        "wall_us_per_token": round(wall / total * 1e6, 2) if total else None,
+        "tokens_per_s": round(total / wall, 1) if wall else None,
+    }
+
+
+async def run_benchmark(levels: List[int], tokens: int) -> Dict[str, Dict[str, Any]]:
+    """Run both modes at every concurrency level, keyed as "<mode>.c<level>"."""
+    results = {}
+    for concurrency in levels:
+        for mode in MODES:
+            results[f"{mode}.c{concurrency}"] = await run_mode(mode, concurrency, tokens)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--levels", default="1,50,200", help="Comma-separated concurrency levels")
+    parser.add_argument("--tokens", type=int, default=200, help="Tokens per answer")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    levels = [int(level) for level in args.levels.split(",")]
+    results = asyncio.run(run_benchmark(levels, args.tokens))
+
+    for concurrency in levels:
+        events, lean = results[f"events.c{concurrency}"], results[f"lean.c{concurrency}"]
+        change = lean["cpu_us_per_token"] / events["cpu_us_per_token"] - 1
+        print(
+            f"c={concurrency:<4} events {events['cpu_us_per_token']:>8.1f}us/token  "
+            f"lean {lean['cpu_us_per_token']:>8.1f}us/token  ({change:+.0%} CPU per token)"
+        )
+
+    if args.output:
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tokens_per_answer": args.tokens,
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Test the shared agent graph configured per run."""
+
+from collections import OrderedDict
+
+import pytest
+from httpx import AsyncClient
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.agent.builder import AgentBuilder
+from app.agent.fake_llm import create_fake_model
+from app.config import settings
+from app.services import agent_service
+
+
+@tool
+def lookup(input: str) -> str:
+    """Look the input up."""
+    return input.upper()
+
+
+@tool
+def remove(input: str) -> str:
+    """Remove the input path."""
+    return f"removed {input}"
+
+
+@pytest.mark.asyncio
+async def test_one_graph_serves_models_tools_and_approval_modes():
+    """Test that the model, enabled tools and approval mode come from the run config."""
+    builder = AgentBuilder(tools=[lookup, remove], checkpointer=MemorySaver())
+    agent = builder.build()
+
+    # Enabled tools are bound in registration order, whatever the request's order
+    enabled = builder._enabled_tools({"configurable": {"tools": ["remove", "lookup"]}})
+    assert [t.name for t in enabled] == ["lookup", "remove"]
+
+    async def run(thread_id: str, model: str, **options):
+        config = {"configurable": {"thread_id": thread_id, "llm": create_fake_model(model), **options}}
+        await agent.ainvoke({"messages": [HumanMessage(content="hi")]}, config)
+        return await agent.aget_state(config)
+
+    state = await run("short", "fake:instant?tokens=2")
+    assert len(state.values["messages"][-1].content.split()) == 2
+
+    state = await run("review", "fake:instant?tokens=2&script=tool:lookup,text")
+    assert state.next == ("tool_approval",)
+
+    state = await run("auto", "fake:instant?tokens=2&script=tool:lookup,text", approve_all_tools=True)
+    assert [m.type for m in state.values["messages"]] == ["human", "ai", "tool", "ai"]
+    assert state.values["messages"][2].content == "HI"
+
+    state = await run(
+        "subset", "fake:instant?tokens=2&script=tool:remove,text",
+        tools=["lookup"], approve_all_tools=True,
+    )
+    tool_message = state.values["messages"][2]
+    assert tool_message.status == "error"
+    assert tool_message.content == "Tool call denied: remove is not enabled"
+
+
+@pytest.mark.asyncio
+async def test_stream_requests_share_one_graph(client: AsyncClient, agent_runtime):
+    """Test that requests with different options reuse the compiled graph."""
+    for i, model in enumerate(["fake:instant?tokens=2", "fake:instant?tokens=3"]):
+        for approve in ("true", "false"):
+            response = await client.get("/api/agent/stream", params={
+                "threadId": f"thread-shared-{i}-{approve}", "content": "hi",
+                "model": model, "approveAllTools": approve, "tools": "lookup",
+            })
+            assert '"status": "completed"' in response.text
+
+    agent = agent_service._agent
+    assert agent is not None
+    assert await agent_service._ensure_agent() is agent
+    assert set(agent_service._llm_cache) == {"fake:instant?tokens=2", "fake:instant?tokens=3"}
+
+
+def test_model_cache_is_bounded(monkeypatch):
+    """Test that distinct model names evict the least recently used instances."""
+    monkeypatch.setattr(settings, "llm_cache_size", 2)
+    monkeypatch.setattr(agent_service, "_llm_cache", OrderedDict())
+    
+    first = agent_service._get_llm_instance("fake:instant?seed=1")
+    agent_service._get_llm_instance("fake:instant?seed=2")
+    assert agent_service._get_llm_instance("fake:instant?seed=1") is first
+    agent_service._get_llm_instance("fake:instant?seed=3")
+    assert list(agent_service._llm_cache) == ["fake:instant?seed=1", "fake:instant?seed=3"]
@@ -0,0 +1,79 @@
+"""Test WebSocket agent sessions."""
+
+import json
+
+import ormsgpack
+import pytest
+
+from app.config import settings
+from app.services.agent_session import HEARTBEAT_TIMEOUT_CODE
+
+MODEL = "fake:instant?tokens=3&script=tool:lookup,text"
+
+
+async def _until_done(conn, decode=json.loads) -> list:
+    frames = []
+    while not frames or frames[-1]["event"] not in ("done", "error"):
+        frames.append(decode(await conn.recv()))
+    return frames
+
+
+@pytest.mark.asyncio
+async def test_session_runs_and_approvals(ws_connect, agent_runtime):
+    """Test a message, its approval and a second turn on one connection."""
+    async with ws_connect(f"/api/agent/ws/thread-ws?model={MODEL.replace('&', '%26')}") as conn:
+        assert json.loads(await conn.recv()) == {
+            "event": "session", "data": {"threadId": "thread-ws", "format": "json"},
+        }
+
+        await conn.send(json.dumps({"type": "message", "content": "look it up"}))
+        frames = await _until_done(conn)
+        events = [f["event"] for f in frames]
+        assert "approval_required" in events
+        assert frames[-2]["data"]["status"] == "interrupted"
+
+        await conn.send(json.dumps({"type": "approval", "action": "allow"}))
+        frames = await _until_done(conn)
+        events = [f["event"] for f in frames]
+        assert "tool_result" in events and events[-1] == "done"
+        assert frames[-2]["data"]["status"] == "completed"
+        assert any(f["event"] == "message" and f["data"]["type"] == "ai" for f in frames)
+
+        # Frames overriding the session options, a heartbeat and invalid frames
+        await conn.send(json.dumps({"type": "message", "content": "again", "model": "fake:instant?tokens=2"}))
+        await conn.send(json.dumps({"type": "message", "content": "too soon"}))
+        frames = await _until_done(conn)
+        assert "A run is in progress" in frames[-1]["data"]["message"]
+        frames = await _until_done(conn)
+        assert frames[-2]["data"] == {"thread_id": "thread-ws", "status": "completed", "tokens": 2}
+
+        await conn.send(json.dumps({"type": "ping"}))
+        assert json.loads(await conn.recv())["event"] == "pong"
+        await conn.send("not json")
+        assert "Malformed frame" in json.loads(await conn.recv())["data"]["message"]
+        await conn.send(json.dumps({"type": "approval", "action": "maybe"}))
+        assert json.loads(await conn.recv())["event"] == "error"
+
+
+@pytest.mark.asyncio
+async def test_msgpack_frames_and_heartbeat(ws_connect, agent_runtime, monkeypatch):
+    """Test binary frames, and that a silent client is disconnected."""
+    async with ws_connect("/api/agent/ws/thread-ws-bin?format=msgpack&model=fake:instant") as conn:
+        assert ormsgpack.unpackb(await conn.recv())["data"]["format"] == "msgpack"
+        await conn.send(ormsgpack.packb({"type": "message", "content": "hi"}))
+        frames = await _until_done(conn, ormsgpack.unpackb)
+        assert frames[-2]["data"]["status"] == "completed"
+
+    with pytest.raises(ConnectionError):
+        async with ws_connect("/api/agent/ws/thread-ws-bin?format=xml"):
+            pass
+
+    monkeypatch.setattr(settings, "ws_heartbeat_interval", 0.05)
+    monkeypatch.setattr(settings, "ws_heartbeat_timeout", 0.12)
+    async with ws_connect("/api/agent/ws/thread-ws-idle") as conn:
+        events = []
+        with pytest.raises(ConnectionError):
+            while True:
+                events.append(json.loads(await conn.recv())["event"])
+        assert "ping" in events
+        assert conn.close_code == HEARTBEAT_TIMEOUT_CODE
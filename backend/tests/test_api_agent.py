@@ -0,0 +1,102 @@
+"""Test agent streaming endpoints with the offline fake model."""
+
+import json
+
+import pytest
+from httpx import AsyncClient
+
+
+def _data_frames(body: str) -> list:
+    """Decode the default (unnamed) SSE data frames of a stream body."""
+    frames = []
+    for block in body.split("\n\n"):
+        if block.startswith("data: "):
+            frames.append(json.loads(block[len("data: "):]))
+    return frames
+
+
+def _named_events(body: str) -> list:
+    """Decode the named SSE events of a stream body as (event, data) pairs."""
+    events = []
+    for block in body.split("\n\n"):
+        if block.startswith("event: "):
+            name, data = block.split("\n", 1)
+            events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_stream_and_history(client: AsyncClient, agent_runtime):
+    """Test streaming a reply, then reading it back from history and search."""
+    response = await client.get("/api/agent/stream", params={
+        "content": "Tell me about lighthouses",
+        "threadId": "thread-stream",
+        "model": "fake:instant?tokens=6",
+    })
+
+    assert response.status_code == 200
+    assert "event: done" in response.text
+    frames = _data_frames(response.text)
+    assert len(frames) == 6
+    assert all(f["type"] == "ai" for f in frames)
+    answer = "".join(f["data"]["content"] for f in frames)
+
+    history = (await client.get("/api/agent/history/thread-stream")).json()
+    assert [m["type"] for m in history["messages"]] == ["human", "ai"]
+    assert history["messages"][1]["data"]["content"] == answer
+
+    search = (await client.get("/api/agent/threads/search", params={"q": "lighthouses"})).json()
+    assert [r["id"] for r in search["results"]] == ["thread-stream"]
+
+
+@pytest.mark.asyncio
+async def test_stream_unknown_model(client: AsyncClient, agent_runtime):
+    """Test that an unknown model is reported as an SSE error event."""
+    response = await client.get("/api/agent/stream", params={
+        "content": "hi",
+        "threadId": "thread-unknown-model",
+        "model": "llama-3",
+    })
+
+    assert "event: error" in response.text
+    assert "Unknown model" in response.text
+
+
+@pytest.mark.asyncio
+async def test_stream_tool_approval_events(client: AsyncClient, agent_runtime):
+    """Test that tool calls, approval requests and tool results arrive as named events."""
+    params = {
+        "content": "look it up",
+        "threadId": "thread-events",
+        "model": "fake:instant?tokens=2&script=tool:lookup,text",
+    }
+    response = await client.get("/api/agent/stream", params=params)
+
+    events = _named_events(response.text)
+    assert [name for name, _ in events] == [
+        "tool_call", "tool_call_delta", "tool_call_delta", "approval_required", "run_end", "done",
+    ]
+    tool_call_id = events[0][1]["id"]
+    assert events[0][1]["name"] == "lookup"
+    assert events[3][1]["tool_call"]["id"] == tool_call_id
+    assert events[3][1]["value"]["question"]
+    assert events[4][1] == {"thread_id": "thread-events", "status": "interrupted", "tokens": 0}
+    frames = _data_frames(response.text)
+    assert [f["data"]["tool_calls"][0]["id"] for f in frames] == [tool_call_id]
+
+    response = await client.get("/api/agent/stream", params={**params, "content": "", "allowTool": "allow"})
+
+    events = _named_events(response.text)
+    assert [name for name, _ in events] == ["tool_result", "run_end", "done"]
+    assert events[0][1]["tool_call_id"] == tool_call_id
+    assert events[1][1]["status"] == "completed"
+    assert events[1][1]["tokens"] == 2
+    assert len(_data_frames(response.text)) == 2
+
+    # Nothing is waiting for approval any more: the resume is ignored, and says so
+    response = await client.get("/api/agent/stream", params={**params, "content": "", "allowTool": "allow"})
+
+    events = _named_events(response.text)
+    assert events == [
+        ("run_end", {"thread_id": "thread-events", "status": "ignored", "tokens": 0}), ("done", {}),
+    ]
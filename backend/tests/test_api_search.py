@@ -0,0 +1,78 @@
+"""Test thread search API endpoints."""
+
+import pytest
+from httpx import AsyncClient
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from sqlalchemy import select, func
+
+from app.models.thread_search import ThreadSearchEntry
+from app.services.search_service import index_messages
+
+
+@pytest.mark.asyncio
+async def test_search_by_title(client: AsyncClient):
+    """Test that thread titles are searchable right after creation."""
+    await client.post("/api/agent/threads", json={"title": "Quarterly budget planning"})
+    await client.post("/api/agent/threads", json={"title": "Holiday itinerary"})
+
+    response = await client.get("/api/agent/threads/search", params={"q": "budgets"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert data["results"][0]["title"] == "Quarterly budget planning"
+    assert "<mark>budget</mark>" in data["results"][0]["snippet"]
+
+
+@pytest.mark.asyncio
+async def test_search_by_message_content(client: AsyncClient, db_session):
+    """Test that indexed messages are searchable and ranked below title matches."""
+    first = (await client.post("/api/agent/threads", json={"title": "Kubernetes upgrade"})).json()
+    second = (await client.post("/api/agent/threads", json={"title": "Misc questions"})).json()
+
+    await index_messages(db_session, second["id"], [
+        HumanMessage(id="h1", content="How do I drain a kubernetes node?"),
+        AIMessage(id="a1", content="Use kubectl drain with --ignore-daemonsets."),
+    ])
+    await db_session.commit()
+
+    response = await client.get("/api/agent/threads/search", params={"q": "kubernetes"})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["id"] for r in results] == [first["id"], second["id"]]
+    assert "<mark>kubernetes</mark>" in results[1]["snippet"]
+
+
+@pytest.mark.asyncio
+async def test_index_messages_is_incremental(client: AsyncClient, db_session):
+    """Test that re-indexing overlapping messages does not duplicate entries."""
+    thread = (await client.post("/api/agent/threads", json={"title": "Indexing"})).json()
+    turn = [
+        HumanMessage(id="h1", content="first question"),
+        AIMessage(id="a1", content="first answer"),
+        ToolMessage(id="t1", content="tool output", tool_call_id="call-1"),
+    ]
+
+    await index_messages(db_session, thread["id"], turn)
+    await index_messages(db_session, thread["id"], turn + [AIMessage(id="a2", content="more")])
+    await db_session.commit()
+
+    result = await db_session.execute(
+        select(func.count(ThreadSearchEntry.id)).where(ThreadSearchEntry.thread_id == thread["id"])
+    )
+    # title + h1 + a1 + a2 (tool output is not indexed)
+    assert result.scalar() == 4
+
+
+@pytest.mark.asyncio
+async def test_search_reflects_title_update(client: AsyncClient):
+    """Test that renaming a thread updates its searchable title."""
+    thread = (await client.post("/api/agent/threads", json={"title": "Draft"})).json()
+    await client.put(f"/api/agent/threads/{thread['id']}", json={"title": "Release checklist"})
+
+    response = await client.get("/api/agent/threads/search", params={"q": "checklist"})
+    assert [r["id"] for r in response.json()["results"]] == [thread["id"]]
+
+    response = await client.get("/api/agent/threads/search", params={"q": "draft"})
+    assert response.json()["total"] == 0
@@ -0,0 +1,120 @@
+"""Test the benchmark helpers and the streaming load harness."""
+
+import pytest
+from httpx import AsyncClient
+
+from benchmarks.agent_graphs import run_benchmark as run_graph_benchmark
+from benchmarks.compression import run_benchmark as run_compression_benchmark
+from benchmarks.load_stream import run_level
+from benchmarks.load_ws import run_level as run_session_level
+from benchmarks.micro import build_benchmarks, run_benchmarks
+from benchmarks.serialization import run_benchmark as run_serialization_benchmark
+from benchmarks.stats import compare, distribution, percentile
+from benchmarks.stream_modes import run_mode
+
+
+def test_percentile_and_distribution():
+    """Test nearest-rank percentiles and their millisecond summary."""
+    values = [i / 1000 for i in range(1, 101)]
+
+    assert percentile([], 50) is None
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    assert distribution(values, "ttft_ms") == {
+        "ttft_ms_p50": 50.0,
+        "ttft_ms_p95": 95.0,
+        "ttft_ms_p99": 99.0,
+        "ttft_ms_max": 100.0,
+    }
+
+
+def test_compare_against_baseline():
+    """Test that latencies regress upwards, throughputs downwards and errors whenever there are any."""
+    baselines = {"c10": {"ttft_ms_p95": 100.0, "tokens_per_s": 1000.0, "errors": 0}}
+
+    assert compare({"c10": {"ttft_ms_p95": 120.0, "tokens_per_s": 800.0, "errors": 0}}, baselines, 0.25) == []
+
+    regressions = compare(
+        {"c10": {"ttft_ms_p95": 130.0, "tokens_per_s": 700.0, "errors": 2}, "c50": {"errors": 9}},
+        baselines,
+        0.25,
+    )
+    assert len(regressions) == 4
+    assert sum(r.startswith("c10 ") for r in regressions) == 3
+    assert "c50 errors: 9 (must be 0)" in regressions
+
+    # A baseline with errors does not make them acceptable
+    assert compare({"c10": {"errors": 1}}, {"c10": {"errors": 95}}, 0.25) == ["c10 errors: 1 (must be 0)"]
+
+
+@pytest.mark.asyncio
+async def test_run_level_in_process(client: AsyncClient, agent_runtime):
+    """Test a small load level against the app with the fake model."""
+    metrics = await run_level(client, concurrency=3, model="fake:instant?tokens=4")
+
+    assert metrics["streams"] == 3
+    assert metrics["errors"] == 0
+    assert metrics["tokens"] == 12
+    assert metrics["ttft_ms_p50"] is not None
+    assert metrics["itl_ms_p99"] is not None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("transport", ["ws", "ws-msgpack", "sse"])
+async def test_session_load_level_in_process(transport, client: AsyncClient, ws_connect, agent_runtime):
+    """Test a small approval-turn load level over sessions and over SSE."""
+    metrics = await run_session_level(
+        transport, 2, "fake:instant?tokens=3&script=tool:lookup,text", turns=2, client=client, connect=ws_connect,
+    )
+
+    assert metrics["errors"] == 0, metrics.get("error_samples")
+    assert metrics["turns"] == 4
+    assert metrics["tokens"] == 12
+    assert metrics["resume_ms_p50"] is not None
+
+
+def test_micro_benchmarks_run():
+    """Test that every micro-benchmark runs and reports per-call timings."""
+    results = run_benchmarks(rounds=2, min_time=0.001)
+
+    assert set(results) == set(build_benchmarks())
+    assert all(r["median_us"] > 0 and r["ops_per_s"] > 0 for r in results.values())
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["lean", "events"])
+async def test_stream_modes_benchmark_runs(mode):
+    """Test the stream mode benchmark on a small level."""
+    result = await run_mode(mode, concurrency=2, tokens=5)
+
+    assert result["tokens"] == 10
+    assert result["cpu_us_per_token"] > 0
+
+
+def test_agent_graphs_benchmark_runs():
+    """Test the shared graph benchmark on a few combinations."""
+    results = run_graph_benchmark(count=4, tool_count=3)
+
+    assert results["combinations"] == 4
+    assert results["shared"]["retained_kib"] < results["per_combination"]["retained_kib"]
+    assert results["paused_runs"] == results["expected_paused_runs"] == 2
+
+
+def test_compression_benchmark_runs():
+    """Test the compression benchmark: every coding shrinks every scenario."""
+    results = run_compression_benchmark(repeat=2)
+
+    assert {"identity", "gzip"} <= set(results["codings"])
+    for scenario in results["scenarios"].values():
+        assert scenario["identity"]["ratio"] == 1.0
+        assert scenario["gzip"]["ratio"] > 1
+    assert results["scenarios"]["sse_per_frame"]["gzip"]["cpu_us_per_frame"] > 0
+
+
+def test_serialization_benchmark_runs():
+    """Test the serialization benchmark: every path returns the same JSON."""
+    results = run_serialization_benchmark(rows=40, repeat=1)
+
+    for scenario in results["scenarios"].values():
+        assert scenario["identical"]
+        assert scenario["adapter"]["cpu_ms"] > 0
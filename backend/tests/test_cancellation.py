@@ -0,0 +1,138 @@
+"""Test cancelling runs on client disconnect and through the cancel endpoint."""
+
+import asyncio
+import json
+
+import pytest
+from httpx import AsyncClient
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.agent.builder import AgentBuilder
+from app.agent.fake_llm import create_fake_model
+from app.main import app
+from app.services.agent_service import _checkpoint_cancelled_run
+from app.telemetry.metrics import RUNS_CANCELLED, registry
+
+
+@tool
+def echo(input: str) -> str:
+    """Echo the input back."""
+    return f"echo: {input}"
+
+
+def _cancelled(reason: str) -> float:
+    return RUNS_CANCELLED.labels(reason)._value.get()
+
+
+def _first_tokens() -> float:
+    return registry.get_sample_value("agent_stream_ttft_seconds_count") or 0.0
+
+
+async def _wait_first_token(before: float) -> None:
+    while _first_tokens() == before:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_cancel_endpoint(client: AsyncClient, agent_runtime):
+    """Test that a cancelled run ends early and keeps the answer streamed so far."""
+    params = {"threadId": "thread-cancel", "model": "fake:fast?tokens=200", "content": "hello"}
+    before = _cancelled("user")
+
+    assert (await client.post("/api/agent/cancel/thread-cancel")).status_code == 404
+
+    first_tokens = _first_tokens()
+    run = asyncio.create_task(client.get("/api/agent/stream", params=params))
+    # Cancel once the answer started, so there is a partial answer to keep
+    await asyncio.wait_for(_wait_first_token(first_tokens), 5)
+    response = await client.post("/api/agent/cancel/thread-cancel")
+    assert response.json() == {"threadId": "thread-cancel", "cancelled": True}
+
+    text = (await asyncio.wait_for(run, 2)).text
+    assert '"status": "cancelled"' in text
+    assert "event: done" in text
+    assert _cancelled("user") == before + 1
+
+    history = (await client.get("/api/agent/history/thread-cancel")).json()["messages"]
+    assert [m["type"] for m in history] == ["human", "ai"]
+    streamed = "".join(
+        json.loads(line[6:])["data"]["content"]
+        for line in text.splitlines() if line.startswith('data: {"type": "ai"')
+    )
+    assert streamed and history[1]["data"]["content"] == streamed
+
+    # The thread was released and continues from the saved state
+    response = await client.get("/api/agent/stream", params={**params, "model": "fake:instant?tokens=2"})
+    assert '"status": "completed"' in response.text
+    assert (await client.post("/api/agent/cancel/thread-cancel")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_cancelled_run_checkpoint_is_consistent():
+    """Test that tool calls left without a result get one, and the partial answer is kept."""
+    agent = AgentBuilder(
+        tools=[echo],
+        llm=create_fake_model("fake:instant?tokens=2"),
+        checkpointer=MemorySaver(),
+    ).build()
+    config = {"configurable": {"thread_id": "cancel-tools"}}
+    await agent.aupdate_state(config, {"messages": [
+        HumanMessage(content="do things"),
+        AIMessage(content="", id="ai-1", tool_calls=[
+            {"id": "c1", "name": "echo", "args": {"input": "a"}},
+            {"id": "c2", "name": "echo", "args": {"input": "b"}},
+        ]),
+        ToolMessage(content="echo: a", tool_call_id="c1"),
+    ]}, as_node="tools")
+
+    partial = AIMessage(content="Half an", id="ai-2")
+    await _checkpoint_cancelled_run(agent, "cancel-tools", partial)
+    await _checkpoint_cancelled_run(agent, "cancel-tools", partial)
+
+    state = await agent.aget_state(config)
+    assert state.next == ()
+    messages = state.values["messages"]
+    assert [m.type for m in messages] == ["human", "ai", "tool", "tool", "ai"]
+    assert messages[3].tool_call_id == "c2" and messages[3].status == "error"
+    assert messages[4].content == "Half an"
+
+    # The thread continues from there
+    await agent.ainvoke({"messages": [HumanMessage(content="again")]}, config)
+    assert (await agent.aget_state(config)).values["messages"][-1].type == "ai"
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_cancels_the_run(client: AsyncClient, agent_runtime):
+    """Test that a disconnect stops the run before its next write (ASGI 2.4 servers)."""
+    before = _cancelled("disconnected")
+    first_token = asyncio.Event()
+    sent = []
+
+    async def receive():
+        if not sent:
+            sent.append(None)
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await first_token.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and b'"type": "ai"' in message.get("body", b""):
+            first_token.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/api/agent/stream", "raw_path": b"/api/agent/stream",
+        "query_string": b"threadId=thread-gone&content=hi&model=fake:fast%3Ftokens%3D2000",
+        "headers": [], "server": ("test", 80), "client": ("test", 1), "root_path": "",
+    }
+
+    # 2000 tokens take ~10s; the run stops right after the disconnect instead
+    await asyncio.wait_for(app(scope, receive, send), 3)
+    assert _cancelled("disconnected") == before + 1
+
+    response = await client.get("/api/agent/stream", params={
+        "threadId": "thread-gone", "content": "again", "model": "fake:instant?tokens=2",
+    })
+    assert '"status": "completed"' in response.text
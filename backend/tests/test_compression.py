@@ -0,0 +1,106 @@
+"""Test response compression negotiation, thresholds and per-frame SSE flushing."""
+
+import gzip
+import json
+import zlib
+
+import pytest
+import zstandard
+from httpx import AsyncClient
+
+from app.compression import CompressionMiddleware, negotiate_encoding
+from app.config import settings
+
+
+def test_negotiation():
+    """Test q-values, wildcards and the server's preference order."""
+    preference = ["zstd", "br", "gzip"]
+
+    assert negotiate_encoding("gzip, deflate, br, zstd", preference) == "zstd"
+    assert negotiate_encoding("gzip;q=1, zstd;q=0.5", preference) == "gzip"
+    assert negotiate_encoding("zstd;q=0, *;q=0.1", preference) == "gzip"
+    assert negotiate_encoding("identity, deflate", preference) is None
+    assert negotiate_encoding("gzip, zstd", ["gzip"]) == "gzip"
+
+
+@pytest.mark.asyncio
+async def test_json_responses_above_the_threshold(client: AsyncClient):
+    """Test that large JSON bodies are compressed in the negotiated coding and small ones are not."""
+    for i in range(30):
+        await client.post("/api/agent/threads", json={"title": f"Compressed thread {i} " + "x" * 40})
+
+    response = await client.get("/api/agent/threads", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.json()["total"] == 30
+
+    response = await client.get("/api/agent/threads", headers={"Accept-Encoding": "zstd"})
+    assert response.headers["content-encoding"] == "zstd"
+    assert response.json()["total"] == 30
+
+    response = await client.get("/api/agent/threads", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+    small = await client.get("/api/agent/threads?limit=1", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert "Accept-Encoding" in small.headers["vary"]
+
+
+async def _sse_app(scope, receive, send):
+    await send({
+        "type": "http.response.start", "status": 200,
+        "headers": [(b"content-type", b"text/event-stream")],
+    })
+    for i in range(3):
+        await send({"type": "http.response.body", "body": f"data: token {i}\n\n".encode(), "more_body": True})
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("coding", ["gzip", "zstd"])
+async def test_sse_frames_are_flushed_one_by_one(coding, monkeypatch):
+    """Test that each SSE frame decodes as soon as its chunk arrives."""
+    monkeypatch.setattr(settings, "compression_sse", True)
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", coding.encode())]}
+    await CompressionMiddleware(_sse_app)(scope, None, send)
+
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-encoding"] == coding.encode()
+    if coding == "gzip":
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    else:
+        decoder = zstandard.ZstdDecompressor().decompressobj()
+    frames = [decoder.decompress(m["body"]) for m in sent[1:]]
+    assert frames[:3] == [f"data: token {i}\n\n".encode() for i in range(3)]
+
+    # Off by default: event streams pass through
+    monkeypatch.setattr(settings, "compression_sse", False)
+    sent.clear()
+    await CompressionMiddleware(_sse_app)(scope, None, send)
+    assert b"content-encoding" not in dict(sent[0]["headers"])
+    assert sent[1]["body"] == b"data: token 0\n\n"
+
+
+@pytest.mark.asyncio
+async def test_multipart_json_body():
+    """Test a JSON body sent in several parts."""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b'{"items": [', "more_body": True})
+        await send({"type": "http.response.body", "body": b",".join([b'"item"'] * 500), "more_body": True})
+        await send({"type": "http.response.body", "body": b"]}", "more_body": False})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await CompressionMiddleware(app)({"type": "http", "headers": [(b"accept-encoding", b"gzip")]}, None, send)
+    body = gzip.decompress(b"".join(m["body"] for m in sent[1:]))
+    assert json.loads(body) == {"items": ["item"] * 500}
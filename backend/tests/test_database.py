@@ -1,8 +1,12 @@
 """Test database models and operations."""
 
+import re
+from pathlib import Path
+
 import pytest
 from sqlalchemy import select
 
+from app.database import Base
 from app.models.thread import Thread
 from app.models.mcp_server import MCPServer, MCPServerType
 
@@ -98,3 +102,14 @@ async def test_query_enabled_servers(db_session):
     assert len(servers) == 1
     assert servers[0].name == "enabled-server"
 
+
+def test_migrations_create_every_model():
+    """Test that the Prisma migrations (the schema outside development) create every model's table and index."""
+    migrations = Path(__file__).resolve().parents[2] / "frontend" / "prisma" / "migrations"
+    sql = "\n".join(p.read_text() for p in sorted(migrations.glob("*/migration.sql")))
+    
+    tables = set(re.findall(r'CREATE TABLE "(\w+)"', sql))
+    indexes = set(re.findall(r'CREATE (?:UNIQUE )?INDEX "(\w+)"', sql))
+    assert set(Base.metadata.tables) <= tables
+    assert {i.name for t in Base.metadata.tables.values() for i in t.indexes} <= indexes
+    assert 'GENERATED ALWAYS AS' in sql and 'USING GIN ("searchVector")' in sql
@@ -0,0 +1,95 @@
+"""Test the offline fake chat model provider."""
+
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.types import Command
+
+from app.agent.builder import AgentBuilder
+from app.agent.fake_llm import FakeChatModel, create_fake_model
+from app.agent.providers import get_chat_model
+from app.config import settings
+
+
+@tool
+def echo(input: str) -> str:
+    """Echo the input back."""
+    return f"echo: {input}"
+
+
+def test_create_fake_model_from_name():
+    """Test that profiles and query parameters configure the model."""
+    model = get_chat_model("fake:realistic?tokens=5&itl_ms=2&script=tool:echo,text")
+
+    assert isinstance(model, FakeChatModel)
+    assert model.ttft_ms == 400
+    assert model.itl_ms == 2
+    assert model.tokens == 5
+    assert model.script == ["tool:echo", "text"]
+
+    with pytest.raises(ValueError):
+        create_fake_model("fake:unknown")
+    with pytest.raises(ValueError):
+        create_fake_model("fake:fast?bogus=1")
+
+
+def test_unknown_model_is_rejected(monkeypatch):
+    """Test that unknown model names no longer fall back to OpenAI, and fake models need enabling."""
+    with pytest.raises(ValueError, match="Unknown model"):
+        get_chat_model("llama-3")
+
+    monkeypatch.setattr(settings, "fake_models_enabled", False)
+    with pytest.raises(ValueError, match="fake models are disabled"):
+        get_chat_model("fake:instant")
+
+
+@pytest.mark.asyncio
+async def test_fake_model_streams_deterministically():
+    """Test that the same input yields the same tokens after the configured TTFT."""
+    model = create_fake_model("fake:instant?tokens=8&ttft_ms=50")
+    messages = [HumanMessage(content="hello")]
+
+    start = time.perf_counter()
+    first_at = None
+    tokens = []
+    async for chunk in model.astream(messages):
+        if first_at is None:
+            first_at = time.perf_counter() - start
+        tokens.append(chunk.content)
+
+    assert first_at >= 0.05
+    assert len(tokens) == 8
+    assert (await model.ainvoke(messages)).content == "".join(tokens)
+
+
+@pytest.mark.asyncio
+async def test_fake_model_drives_tool_approval():
+    """Test a full approval round trip through the agent graph without network access."""
+    agent = AgentBuilder(
+        tools=[echo],
+        llm=create_fake_model("fake:instant?tokens=3&script=tool:echo"),
+        checkpointer=MemorySaver(),
+    ).build()
+    config = {"configurable": {"thread_id": "fake-thread"}}
+
+    tokens = []
+    async for event in agent.astream_events(
+        {"messages": [HumanMessage(content="ping")]}, config, version="v2"
+    ):
+        if event["event"] == "on_chat_model_stream":
+            tokens.append(event["data"]["chunk"])
+
+    state = await agent.aget_state(config)
+    assert state.next == ("tool_approval",)
+    assert state.tasks[0].interrupts[0].value["toolCall"]["name"] == "echo"
+    assert any(chunk.tool_call_chunks for chunk in tokens)
+
+    await agent.ainvoke(Command(resume={"action": "continue"}), config)
+
+    messages = (await agent.aget_state(config)).values["messages"]
+    assert [m.type for m in messages] == ["human", "ai", "tool", "ai"]
+    assert messages[2].content == 'echo: ping'
+    assert len(messages[3].content.split()) == 3
@@ -0,0 +1,152 @@
+"""Test idempotency keys on stream requests."""
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.config import settings
+from app.models.idempotency_key import IdempotencyKey
+from app.schemas.message import AIMessageData, MessageResponse
+from app.services import idempotency
+from app.services.idempotency import IdempotentRun, idempotency_registry
+from app.services.stream_buffer import SlowConsumerError
+
+PARAMS = {"threadId": "thread-idem", "content": "hello there", "model": "fake:fast?tokens=5"}
+
+
+def _output(text: str) -> tuple:
+    """The answer's text and the named events of an SSE response, however its tokens are chunked."""
+    answer, events = [], []
+    for frame in text.split("\n\n"):
+        if frame.startswith("data: "):
+            answer.append(json.loads(frame[len("data: "):])["data"]["content"])
+        elif frame.startswith("event: "):
+            events.append(frame.split("\n")[0])
+    return "".join(answer), events
+
+
+def _token(content: str, message_id: str = "m1") -> MessageResponse:
+    return MessageResponse(type="ai", data=AIMessageData(id=message_id, content=content))
+
+
+async def _human_turns(client: AsyncClient, thread_id: str) -> int:
+    history = (await client.get(f"/api/agent/history/{thread_id}")).json()["messages"]
+    return sum(1 for m in history if m["type"] == "human")
+
+
+@pytest.mark.asyncio
+async def test_duplicate_requests_share_one_run(client: AsyncClient, agent_runtime):
+    """Test that in-flight and finished duplicates attach to the run instead of re-executing."""
+    first, second = await asyncio.gather(
+        client.get("/api/agent/stream", params=PARAMS, headers={"Idempotency-Key": "key-1"}),
+        client.get("/api/agent/stream", params={**PARAMS, "idempotencyKey": "key-1"}),
+    )
+    assert _output(first.text) == _output(second.text)
+    assert "event: done" in first.text
+    assert [r.headers.get("Idempotent-Replayed") for r in (first, second)] == [None, "true"]
+
+    replay = await client.get("/api/agent/stream", params=PARAMS, headers={"Idempotency-Key": "key-1"})
+    assert _output(replay.text) == _output(first.text)
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert await _human_turns(client, "thread-idem") == 1
+
+    conflict = await client.get(
+        "/api/agent/stream", params={**PARAMS, "content": "other"}, headers={"Idempotency-Key": "key-1"}
+    )
+    assert conflict.status_code == 422
+
+    await client.get("/api/agent/stream", params=PARAMS, headers={"Idempotency-Key": "key-2"})
+    assert await _human_turns(client, "thread-idem") == 2
+
+
+@pytest.mark.asyncio
+async def test_keys_expire_and_failures_are_not_replayed(client: AsyncClient, agent_runtime, monkeypatch):
+    """Test that expired keys and failed runs execute again."""
+    params = {**PARAMS, "threadId": "thread-idem-expiry", "model": "fake:instant?tokens=2"}
+    await client.get("/api/agent/stream", params=params, headers={"Idempotency-Key": "key-3"})
+
+    monkeypatch.setattr(settings, "idempotency_ttl", 0.0)
+    response = await client.get("/api/agent/stream", params=params, headers={"Idempotency-Key": "key-3"})
+    assert "Idempotent-Replayed" not in response.headers
+    assert await _human_turns(client, "thread-idem-expiry") == 2
+
+    monkeypatch.setattr(settings, "idempotency_ttl", 600.0)
+    failed = {**params, "model": "unknown-model"}
+    response = await client.get("/api/agent/stream", params=failed, headers={"Idempotency-Key": "key-4"})
+    assert "event: error" in response.text
+    retry = await client.get("/api/agent/stream", params=failed, headers={"Idempotency-Key": "key-4"})
+    assert "Idempotent-Replayed" not in retry.headers
+    assert len(idempotency_registry) == 1
+
+
+@pytest.mark.asyncio
+async def test_keys_are_recorded_for_other_workers(client: AsyncClient, agent_runtime, db_session):
+    """Test that a key run by another worker is refused there instead of running again."""
+    params = {**PARAMS, "threadId": "thread-idem-workers", "model": "fake:instant?tokens=2"}
+    await client.get("/api/agent/stream", params=params, headers={"Idempotency-Key": "key-5"})
+    row = await db_session.get(IdempotencyKey, "key-5")
+    assert row is not None and row.finished_at is not None
+
+    # Another worker: the key is in the database but its frames are not here
+    await idempotency_registry.close()
+    held = await client.get("/api/agent/stream", params=params, headers={"Idempotency-Key": "key-5"})
+    assert held.status_code == 409
+    reused = await client.get(
+        "/api/agent/stream", params={**params, "content": "other"}, headers={"Idempotency-Key": "key-5"}
+    )
+    assert reused.status_code == 422
+    assert await _human_turns(client, "thread-idem-workers") == 1
+
+
+@pytest.mark.asyncio
+async def test_claims_delete_expired_keys(client: AsyncClient, agent_runtime, db_session, monkeypatch):
+    """Test that expired keys are deleted even when they are never sent again."""
+    now = datetime.now(timezone.utc)
+    db_session.add_all([
+        IdempotencyKey(key="finished-long-ago", fingerprint="[]", created_at=now, finished_at=now - timedelta(hours=1)),
+        IdempotencyKey(key="abandoned", fingerprint="[]", created_at=now - timedelta(hours=1)),
+        IdempotencyKey(key="recent", fingerprint="[]", created_at=now, finished_at=now),
+    ])
+    await db_session.commit()
+
+    monkeypatch.setattr(idempotency, "_last_purge", None)
+    params = {**PARAMS, "threadId": "thread-idem-purge", "model": "fake:instant?tokens=2"}
+    await client.get("/api/agent/stream", params=params, headers={"Idempotency-Key": "key-6"})
+
+    keys = set((await db_session.execute(select(IdempotencyKey.key))).scalars())
+    assert keys == {"recent", "key-6"}
+
+
+@pytest.mark.asyncio
+async def test_run_records_merged_tokens_and_followers_have_their_own_buffer(monkeypatch):
+    """Test that a run keeps one chunk per message and a slow follower is dropped alone."""
+    monkeypatch.setattr(settings, "stream_buffer_size", 2)
+    monkeypatch.setattr(settings, "stream_slow_consumer_policy", "disconnect")
+
+    async def items():
+        for i in range(20):
+            yield _token(str(i))
+            await asyncio.sleep(0.001)
+        yield _token("x", "m2")
+        yield _token("y", "m3")
+
+    async def follow(delay: float) -> str:
+        text = ""
+        async for item in run.follow():
+            text += item.data.content
+            await asyncio.sleep(delay)
+        return text
+
+    run = IdempotentRun("key", "fingerprint", items())
+    slow, fast = await asyncio.gather(follow(0.01), follow(0), return_exceptions=True)
+    await run.task
+
+    assert isinstance(slow, SlowConsumerError)
+    assert fast == "".join(str(i) for i in range(20)) + "xy"
+    assert [item.data.content for item in run.items] == ["".join(str(i) for i in range(20)), "x", "y"]
+    # The replay of a finished run is never dropped, whatever the buffer size
+    assert await follow(0.01) == fast
@@ -0,0 +1,59 @@
+"""Cold-start import budget for the application."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Cumulative import time budget for app.main, overridable for slow CI machines
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", "2500"))
+
+# Provider SDKs that must only be imported when a model from them is first used
+PROVIDER_MODULES = ("langchain_openai", "langchain_google_genai", "openai", "google.ai")
+
+
+def _run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+
+def _app_main_import_ms() -> float:
+    """Measure the cumulative import time of app.main with -X importtime."""
+    result = _run_python("-X", "importtime", "-c", "import app.main")
+    assert result.returncode == 0, result.stderr
+
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and line.rstrip().endswith("| app.main"):
+            return int(line.split("|")[1]) / 1000
+    pytest.fail("app.main not found in -X importtime output")
+
+
+def test_provider_sdks_not_imported_at_startup():
+    """Test that importing the app does not load any model provider SDK."""
+    result = _run_python(
+        "-c",
+        "import sys, app.main; "
+        f"print(','.join(m for m in sys.modules if m.startswith({PROVIDER_MODULES!r})))",
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+
+def test_app_import_time_budget():
+    """Test that cold-start import time of app.main stays within budget."""
+    # Best of three runs to reduce noise from the machine
+    import_ms = min(_app_main_import_ms() for _ in range(3))
+
+    assert import_ms <= IMPORT_TIME_BUDGET_MS, (
+        f"app.main imports in {import_ms:.0f}ms, over the {IMPORT_TIME_BUDGET_MS:.0f}ms budget"
+    )
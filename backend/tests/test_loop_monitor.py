@@ -0,0 +1,83 @@
+"""Test the event-loop lag monitor and blocking-call detector."""
+
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from app.config import settings
+from app.telemetry import loop_monitor as loop_monitoring
+from app.telemetry.loop_monitor import LoopMonitor
+from app.telemetry.metrics import registry
+
+
+def _blocking_call(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def _sample(name: str) -> float:
+    return registry.get_sample_value(name) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_monitor_records_lag_and_blocking_stack():
+    """Test that a blocking call shows up as lag, a metric and a captured stack."""
+    lag_count_before = _sample("event_loop_lag_seconds_count")
+    blocked_before = _sample("event_loop_blocked_total")
+
+    monitor = LoopMonitor(interval=0.01, block_threshold=0.05, capture_stacks=True).start()
+    try:
+        await asyncio.sleep(0.05)
+        _blocking_call(0.3)
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    assert not monitor.running
+    assert monitor.max_lag >= 0.2
+    assert _sample("event_loop_lag_seconds_count") > lag_count_before
+    assert _sample("event_loop_blocked_total") == blocked_before + 1
+
+    assert len(monitor.blocking_events) == 1
+    assert "_blocking_call" in monitor.blocking_events[0]["stack"]
+
+
+@pytest.mark.asyncio
+async def test_monitor_without_stacks_has_no_watchdog():
+    """Test that outside debug mode only the probe task runs."""
+    monitor = LoopMonitor(interval=0.01, block_threshold=0.05, capture_stacks=False).start()
+    try:
+        await asyncio.sleep(0.02)
+        _blocking_call(0.1)
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    assert monitor._watchdog is None
+    assert monitor.max_lag >= 0.05
+    assert not monitor.blocking_events
+
+
+@pytest.mark.asyncio
+async def test_loop_endpoint(client: AsyncClient, monkeypatch):
+    """Test the admin endpoint reporting the worker's loop monitor."""
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    headers = {"X-Admin-Token": "secret"}
+
+    monkeypatch.setattr(loop_monitoring, "loop_monitor", None)
+    response = await client.get("/api/admin/loop", headers=headers)
+    assert response.json() == {"running": False}
+
+    monitor = LoopMonitor(interval=0.01, block_threshold=0.5, capture_stacks=False).start()
+    monkeypatch.setattr(loop_monitoring, "loop_monitor", monitor)
+    try:
+        await asyncio.sleep(0.05)
+        response = await client.get("/api/admin/loop", headers=headers)
+    finally:
+        await monitor.stop()
+
+    data = response.json()
+    assert data["running"] is True
+    assert data["interval_ms"] == 10
+    assert data["blocking_events"] == []
@@ -0,0 +1,92 @@
+"""Test the Prometheus metrics endpoint and collectors."""
+
+import pytest
+from httpx import AsyncClient
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.agent.builder import AgentBuilder
+from app.agent.fake_llm import create_fake_model
+from app.telemetry.metrics import MetricsCallbackHandler, model_label, registry
+
+
+@tool
+def lookup(input: str) -> str:
+    """Look the input up."""
+    return input.upper()
+
+
+def _sample(name: str, **labels) -> float:
+    return registry.get_sample_value(name, labels) or 0.0
+
+
+def test_model_label_drops_options():
+    """Test that model options are not used as label values."""
+    assert model_label("fake:fast?tokens=5&seed=3") == "fake:fast"
+    assert model_label("gpt-4o-mini") == "gpt-4o-mini"
+    assert model_label(None) == "default"
+
+
+@pytest.mark.asyncio
+async def test_callback_handler_records_nodes_tools_and_model():
+    """Test node, tool and model latencies recorded during a tool-using run."""
+    before = {
+        "agent": _sample("agent_graph_node_duration_seconds_count", node="agent", status="ok"),
+        "tools": _sample("agent_graph_node_duration_seconds_count", node="tools", status="ok"),
+        "tool": _sample("agent_tool_call_duration_seconds_count", tool="lookup", status="ok"),
+        "llm": _sample("agent_llm_request_duration_seconds_count", model="fake:instant", status="ok"),
+    }
+
+    agent = AgentBuilder(
+        tools=[lookup],
+        llm=create_fake_model("fake:instant?script=tool:lookup"),
+        checkpointer=MemorySaver(),
+        approve_all_tools=True,
+    ).build()
+    config = {
+        "configurable": {"thread_id": "metrics-thread"},
+        "callbacks": [MetricsCallbackHandler("fake:instant?script=tool:lookup")],
+    }
+    await agent.ainvoke({"messages": [HumanMessage(content="abc")]}, config)
+
+    assert _sample("agent_graph_node_duration_seconds_count", node="agent", status="ok") == before["agent"] + 2
+    assert _sample("agent_graph_node_duration_seconds_count", node="tools", status="ok") == before["tools"] + 1
+    assert _sample("agent_tool_call_duration_seconds_count", tool="lookup", status="ok") == before["tool"] + 1
+    assert _sample("agent_llm_request_duration_seconds_count", model="fake:instant", status="ok") == before["llm"] + 2
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client: AsyncClient, agent_runtime):
+    """Test stream metrics and scrape-time gauges exposed on /metrics."""
+    ttft_before = _sample("agent_stream_ttft_seconds_count")
+    gaps_before = _sample("agent_stream_inter_token_seconds_count")
+    ok_before = _sample("agent_stream_duration_seconds_count", outcome="ok")
+
+    await client.get("/api/agent/stream", params={
+        "content": "count these tokens",
+        "threadId": "thread-metrics",
+        "model": "fake:instant?tokens=5",
+    })
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    body = response.text
+    assert _sample("agent_cache_size") >= 1
+    assert 'db_pool_size{pool="sqlalchemy"}' in body
+    assert 'db_pool_utilization{pool="checkpointer"}' in body
+    assert "agent_streams_in_flight 0.0" in body
+
+    assert _sample("agent_stream_ttft_seconds_count") == ttft_before + 1
+    assert _sample("agent_stream_inter_token_seconds_count") == gaps_before + 4
+    assert _sample("agent_stream_duration_seconds_count", outcome="ok") == ok_before + 1
+
+    # Streams ending during start-up are measured too
+    ignored_before = _sample("agent_stream_duration_seconds_count", outcome="ignored")
+    await client.get("/api/agent/stream", params={
+        "content": "", "threadId": "thread-metrics", "model": "fake:instant", "allowTool": "allow",
+    })
+    assert _sample("agent_stream_duration_seconds_count", outcome="ignored") == ignored_before + 1
+    assert _sample("agent_streams_in_flight") == 0
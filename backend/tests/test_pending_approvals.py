@@ -0,0 +1,72 @@
+"""Test the index of tool calls waiting for human review."""
+
+import pytest
+from httpx import AsyncClient
+
+from app.services import agent_service
+
+
+async def _pending(client: AsyncClient, **params) -> dict:
+    response = await client.get("/api/agent/approvals", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_pending_approvals_follow_interrupts_and_resumes(client: AsyncClient, agent_runtime):
+    """Test that approvals are listed while a run waits and dropped once it is answered."""
+    model = "fake:instant?tokens=2&script=tool:lookup,text"
+    for thread_id in ("thread-wait-1", "thread-wait-2"):
+        await client.get("/api/agent/stream", params={
+            "threadId": thread_id, "model": model, "content": f"look up {thread_id}",
+        })
+
+    pending = await _pending(client)
+    assert pending["total"] == 2
+    assert [a["threadId"] for a in pending["approvals"]] == ["thread-wait-1", "thread-wait-2"]
+    first = pending["approvals"][0]
+    assert first["threadTitle"] == "look up thread-wait-1"
+    assert first["toolCall"]["name"] == "lookup"
+    assert first["toolCall"]["id"]
+
+    page = await _pending(client, skip=1, limit=1)
+    assert [a["threadId"] for a in page["approvals"]] == ["thread-wait-2"]
+    assert page["total"] == 2
+    assert await _pending(client, skip=5) == {"approvals": [], "total": 2}
+
+    await client.get("/api/agent/stream", params={
+        "threadId": "thread-wait-1", "model": model, "content": "", "allowTool": "allow",
+    })
+    # A new message discards the pending interrupt; the run stops at a new one
+    await client.get("/api/agent/stream", params={
+        "threadId": "thread-wait-2", "model": model, "content": "never mind",
+    })
+
+    pending = await _pending(client)
+    assert [a["threadId"] for a in pending["approvals"]] == ["thread-wait-2"]
+    assert pending["approvals"][0]["toolCall"]["id"] != first["toolCall"]["id"]
+
+    assert (await client.delete("/api/agent/threads/thread-wait-2")).status_code == 204
+    assert await _pending(client) == {"approvals": [], "total": 0}
+
+
+@pytest.mark.asyncio
+async def test_failed_resume_keeps_pending_approval(client: AsyncClient, agent_runtime, monkeypatch):
+    """Test that a resume whose graph fails leaves the approval listed, as in its checkpoint."""
+    model = "fake:instant?tokens=2&script=tool:lookup,text"
+    await client.get("/api/agent/stream", params={
+        "threadId": "thread-fail", "model": model, "content": "look it up",
+    })
+    pending = await _pending(client)
+    assert pending["total"] == 1
+
+    async def failing_stream(*args, **kwargs):
+        raise RuntimeError("provider down")
+        yield
+
+    monkeypatch.setattr(agent_service, "iter_agent_stream", failing_stream)
+    response = await client.get("/api/agent/stream", params={
+        "threadId": "thread-fail", "model": model, "content": "", "allowTool": "allow",
+    })
+    assert "event: error" in response.text
+    assert await _pending(client) == pending
@@ -0,0 +1,101 @@
+"""Test the sampling profiler and admin profiling endpoints."""
+
+import json
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from app.config import settings
+from app.telemetry.profiler import ProfileStore, SamplingProfiler
+
+
+def _busy_loop(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profiler_samples_calling_thread():
+    """Test that collapsed stacks include the function the thread was busy in."""
+    profiler = SamplingProfiler(hz=500).start()
+    _busy_loop(0.2)
+    profiler.stop()
+
+    assert not profiler.running
+    assert profiler.samples > 0
+    lines = profiler.collapsed().splitlines()
+    assert any("test_profiler.py:_busy_loop" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_profile_store_evicts_oldest():
+    """Test that the store keeps only the most recent profiles."""
+    store = ProfileStore(max_size=2)
+    profiles = [SamplingProfiler() for _ in range(3)]
+    for profiler in profiles:
+        store.add(profiler)
+
+    assert store.get(profiles[0].id) is None
+    assert store.get(profiles[2].id) is profiles[2]
+
+
+@pytest.mark.asyncio
+async def test_admin_endpoints_require_token(client: AsyncClient, monkeypatch):
+    """Test that admin endpoints are hidden without ADMIN_TOKEN and reject bad tokens."""
+    monkeypatch.setattr(settings, "admin_token", "")
+    response = await client.post("/api/admin/profile", params={"seconds": 0.1})
+    assert response.status_code == 404
+
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    response = await client.post(
+        "/api/admin/profile", params={"seconds": 0.1}, headers={"X-Admin-Token": "wrong"}
+    )
+    assert response.status_code == 403
+
+    response = await client.get("/api/agent/stream", params={
+        "content": "hi", "threadId": "thread-profile-denied", "profile": True,
+    })
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_profile_worker(client: AsyncClient, monkeypatch):
+    """Test a timed worker profile returned as collapsed stacks."""
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    headers = {"X-Admin-Token": "secret"}
+
+    response = await client.post("/api/admin/profile", params={"seconds": 0.2, "hz": 200}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert int(response.headers["X-Profile-Samples"]) > 0
+    assert response.text.strip()
+
+    profile_id = response.headers["X-Profile-Id"]
+    stored = await client.get(f"/api/admin/profiles/{profile_id}", headers=headers)
+    assert stored.text == response.text
+
+    missing = await client.get("/api/admin/profiles/unknown", headers=headers)
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_stream_profile(client: AsyncClient, agent_runtime, monkeypatch):
+    """Test profiling a single stream and fetching its profile by id."""
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    headers = {"X-Admin-Token": "secret"}
+
+    response = await client.get("/api/agent/stream", headers=headers, params={
+        "content": "profile this",
+        "threadId": "thread-profiled",
+        "model": "fake:fast?tokens=5",
+        "profile": True,
+    })
+    assert response.status_code == 200
+    assert "event: done" in response.text
+
+    profile_line = response.text.split("event: profile\ndata: ", 1)[1].split("\n", 1)[0]
+    profile = json.loads(profile_line)
+    stored = await client.get(f"/api/admin/profiles/{profile['id']}", headers=headers)
+    assert stored.status_code == 200
+    assert int(stored.headers["X-Profile-Samples"]) == profile["samples"]
@@ -0,0 +1,47 @@
+"""Test the serialization layer: rows to schemas, schemas to JSON and the default response class."""
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from httpx import AsyncClient
+
+from app.main import app
+from app.serialization import DefaultJSONResponse, mcp_server_reads, schema_response, thread_reads
+from app.schemas.message import HistoryResponse
+from app.services.agent_service import _history_to_responses
+from benchmarks.micro import _history, _mcp_servers
+from benchmarks.serialization import _per_row_server, _per_row_thread, _threads
+
+
+def test_rows_match_per_row_construction():
+    """Test that validating rows from attributes gives the schemas built field by field."""
+    threads = _threads(3)
+    servers = _mcp_servers(4)
+
+    assert thread_reads(threads) == [_per_row_thread(t) for t in threads]
+    assert mcp_server_reads(servers) == [_per_row_server(s) for s in servers]
+    assert set(thread_reads(threads)[0].model_dump(by_alias=True)) == {"id", "title", "createdAt", "updatedAt"}
+
+    # History serialized in one pass is the JSON jsonable_encoder produced
+    history = _history_to_responses(_history(12))
+    response = schema_response(HistoryResponse(messages=history, total=len(history)))
+    assert response.media_type == "application/json"
+    assert DefaultJSONResponse(jsonable_encoder({"messages": history, "total": len(history)})).body == response.body
+
+
+@pytest.mark.asyncio
+async def test_list_endpoints(client: AsyncClient, sample_mcp_server_stdio):
+    """Test the list endpoints written by schema_response, and the app's default response class."""
+    await client.post("/api/agent/threads", json={"title": "Serialized"})
+    await client.post("/api/mcp-servers", json=sample_mcp_server_stdio)
+
+    threads = (await client.get("/api/agent/threads")).json()
+    assert threads["total"] == 1
+    assert set(threads["threads"][0]) == {"id", "title", "createdAt", "updatedAt"}
+
+    servers = await client.get("/api/mcp-servers")
+    assert servers.headers["content-type"] == "application/json"
+    server = servers.json()["servers"][0]
+    assert server["type"] == "stdio" and server["args"] == sample_mcp_server_stdio["args"]
+    assert "createdAt" in server and "created_at" not in server
+
+    assert app.router.default_response_class is DefaultJSONResponse
@@ -0,0 +1,89 @@
+"""Test the bounded stream buffer and its slow consumer policies."""
+
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.schemas.message import AIMessageData, MessageResponse, MessageOptions, StreamEvent, RunEndData
+from app.services.agent_service import fetch_thread_history, is_token, stream_response
+from app.services.stream_buffer import SlowConsumerError, StreamBuffer, live_buffers
+from app.telemetry.metrics import RUNS_CANCELLED
+
+
+def _token(content: str, message_id: str = "m1") -> MessageResponse:
+    return MessageResponse(type="ai", data=AIMessageData(id=message_id, content=content))
+
+
+async def _drain(buffer: StreamBuffer) -> list:
+    buffer.close()
+    return [item async for item in buffer]
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_policies():
+    """Test that a full buffer coalesces or summarizes tokens but keeps other events."""
+    end = StreamEvent(event="run_end", data=RunEndData(thread_id="t", status="completed"))
+
+    buffer = StreamBuffer(2, "coalesce")
+    for item in [_token("a"), _token("b"), _token("c"), _token("d"), _token("e", "m2"), end]:
+        buffer.put(item)
+    assert buffer.peak == 4 and buffer.overflows == 3
+    items = await _drain(buffer)
+    assert [i.data.content for i in items[:3]] == ["a", "bcd", "e"]
+    assert items[3] is end
+
+    buffer = StreamBuffer(2, "summary")
+    for item in [_token("a"), _token("b"), _token("c"), _token("d"), end]:
+        buffer.put(item)
+    items = await _drain(buffer)
+    assert [i.data.content for i in items[:2]] == ["a", "b"]
+    assert items[2].event == "stream_summary" and items[2].data.tokens == 2
+    assert items[3] is end
+
+    overflowed = []
+    buffer = StreamBuffer(2, "disconnect", on_overflow=lambda: overflowed.append(True))
+    for item in [_token("a"), _token("b"), _token("c"), _token("d")]:
+        buffer.put(item)
+    assert overflowed == [True] and len(buffer) == 0
+    with pytest.raises(SlowConsumerError):
+        await buffer.__anext__()
+    assert buffer not in live_buffers
+
+
+async def _read_slowly(thread_id: str, tokens: int) -> list:
+    items = []
+    async for item in stream_response(thread_id, "hi", MessageOptions(model=f"fake:fast?tokens={tokens}")):
+        items.append(item)
+        await asyncio.sleep(0.02)
+    return items
+
+
+@pytest.mark.asyncio
+async def test_slow_client_gets_coalesced_tokens(agent_runtime, monkeypatch):
+    """Test that a slow reader gets the whole answer in fewer chunks, without stalling the run."""
+    monkeypatch.setattr(settings, "stream_buffer_size", 4)
+
+    items = await _read_slowly("thread-slow", 60)
+
+    tokens = [i for i in items if is_token(i)]
+    assert len(tokens) < 60
+    assert items[-1].event == "run_end" and items[-1].data.tokens == 60
+    history = await fetch_thread_history("thread-slow")
+    assert "".join(t.data.content for t in tokens) == history[-1].data.content
+
+
+@pytest.mark.asyncio
+async def test_slow_client_is_disconnected(agent_runtime, monkeypatch):
+    """Test that the disconnect policy fails the stream and cancels its run."""
+    monkeypatch.setattr(settings, "stream_buffer_size", 4)
+    monkeypatch.setattr(settings, "stream_slow_consumer_policy", "disconnect")
+    before = RUNS_CANCELLED.labels("slow_consumer")._value.get()
+
+    with pytest.raises(SlowConsumerError):
+        await _read_slowly("thread-slow-drop", 60)
+    assert RUNS_CANCELLED.labels("slow_consumer")._value.get() == before + 1
+
+    # The cancelled run released the thread
+    items = await _read_slowly("thread-slow-drop", 2)
+    assert items[-1].data.status == "completed"
@@ -0,0 +1,89 @@
+"""Test the lean and astream_events streaming modes of agent runs."""
+
+import json
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.agent.builder import AgentBuilder
+from app.agent.fake_llm import create_fake_model
+from app.schemas.message import StreamEvent
+from app.services.agent_service import is_token, iter_agent_stream
+
+
+@tool
+def echo(input: str) -> str:
+    """Echo the input back."""
+    return f"echo: {input}"
+
+
+def _agent(approve_all_tools: bool = True):
+    return AgentBuilder(
+        tools=[echo],
+        llm=create_fake_model("fake:instant?tokens=3&script=tool:echo,text"),
+        checkpointer=MemorySaver(),
+        approve_all_tools=approve_all_tools,
+    ).build()
+
+
+def _kind(item) -> str:
+    if isinstance(item, StreamEvent):
+        return item.event
+    return "token" if is_token(item) else "ai_tool_calls"
+
+
+async def _collect(agent, mode: str, thread_id: str):
+    config = {"configurable": {"thread_id": thread_id}}
+    inputs = {"messages": [HumanMessage(content="ping")]}
+    return [m async for m in iter_agent_stream(agent, inputs, config, "msg-fallback", mode=mode)]
+
+
+@pytest.mark.asyncio
+async def test_lean_mode_streams_tokens_tool_calls_and_results():
+    """Test the event sequence of a tool-using run in lean mode."""
+    events = await _collect(_agent(), "lean", "lean-thread")
+
+    assert [_kind(e) for e in events] == [
+        "tool_call", "tool_call_delta", "tool_call_delta", "ai_tool_calls", "tool_result",
+        "token", "token", "token",
+    ]
+    start, first_delta, second_delta, tool_call, tool_result, *tokens = events
+    call = tool_call.data.tool_calls[0]
+    assert (start.data.id, start.data.name, start.data.message_id) == (call.id, "echo", tool_call.data.id)
+    assert json.loads(first_delta.data.args + second_delta.data.args) == call.args
+    assert second_delta.data.id == call.id
+    assert tool_call.data.content == ""
+    assert (tool_result.data.content, tool_result.data.tool_call_id) == ("echo: ping", call.id)
+    assert len({t.data.id for t in tokens}) == 1
+    assert tokens[0].data.id.startswith("run-")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["lean", "events"])
+async def test_stream_ends_with_approval_request(mode):
+    """Test that a run waiting for approval streams the interrupt payload."""
+    events = await _collect(_agent(approve_all_tools=False), mode, f"{mode}-approval")
+
+    approval = events[-1]
+    assert approval.event == "approval_required"
+    assert approval.data.thread_id == f"{mode}-approval"
+    assert approval.data.tool_call.name == "echo"
+    assert approval.data.value["toolCall"]["args"] == {"input": "ping"}
+    assert not any(_kind(e) in ("token", "tool_result") for e in events)
+
+
+@pytest.mark.asyncio
+async def test_events_mode_streams_the_same_tokens():
+    """Test that both modes stream identical tokens and tool call deltas."""
+    lean = await _collect(_agent(), "lean", "tokens-lean")
+    events = await _collect(_agent(), "events", "tokens-events")
+
+    def tokens(items):
+        return [e.data.content for e in items if is_token(e)]
+
+    assert tokens(events) == tokens(lean)
+    assert [_kind(e) for e in events if _kind(e).startswith("tool_call")] == [
+        "tool_call", "tool_call_delta", "tool_call_delta",
+    ]
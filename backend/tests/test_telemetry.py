@@ -0,0 +1,70 @@
+"""Test telemetry helpers."""
+
+import asyncio
+
+import pytest
+
+from app.telemetry.timing import PhaseTimer
+
+
+@pytest.mark.asyncio
+async def test_phase_timer_measures_concurrent_phases():
+    """Test that concurrently awaited phases are measured independently."""
+    timer = PhaseTimer()
+
+    results = await asyncio.gather(
+        timer.timed("fast", asyncio.sleep(0.04, result="a")),
+        timer.timed("slow", asyncio.sleep(0.06, result="b")),
+    )
+    startup = timer.mark("startup")
+
+    assert results == ["a", "b"]
+    assert timer.get("fast") < timer.get("slow") <= startup
+    # Concurrent phases overlap, so start-up is bounded by the slowest one
+    assert startup < timer.get("fast") + timer.get("slow")
+    assert "fast=" in timer.summary() and "startup=" in timer.summary()
+
+
+def test_connection_budget_split():
+    """Test that both pools share a single per-process connection budget."""
+    from app.config import Settings
+
+    settings = Settings(db_connection_budget=13, db_checkpointer_pool_share=0.25)
+    assert settings.checkpointer_pool_size == 3
+    assert settings.sqlalchemy_pool_size == 9
+
+    small = Settings(db_connection_budget=3, db_checkpointer_pool_share=0.9)
+    assert small.checkpointer_pool_size == 1
+    assert small.sqlalchemy_pool_size == 1
+
+    with pytest.raises(ValueError):
+        Settings(db_connection_budget=2)
+
+
+@pytest.mark.asyncio
+async def test_timed_pool_records_checkouts():
+    """Test that the instrumented pool counts its own checkouts and wait time."""
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from app.database import engine as app_engine
+    from app.telemetry.pools import TimedAsyncQueuePool
+    from tests.conftest import TEST_DATABASE_URL
+
+    engine = create_async_engine(
+        TEST_DATABASE_URL, poolclass=TimedAsyncQueuePool, pool_size=1, max_overflow=0
+    )
+    app_checkouts = app_engine.pool.wait_stats.checkouts
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            assert engine.pool.checkedout() == 1
+        stats = engine.pool.wait_stats
+    finally:
+        await engine.dispose()
+
+    assert stats.checkouts == 1
+    assert stats.wait_seconds_max > 0
+    # Disposing replaces the pool but keeps its statistics; other engines are not counted
+    assert engine.pool.wait_stats is stats
+    assert app_engine.pool.wait_stats.checkouts == app_checkouts
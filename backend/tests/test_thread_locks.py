@@ -0,0 +1,105 @@
+"""Test per-thread run serialization."""
+
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from app.config import settings
+from app.services.thread_locks import ThreadBusyError, ThreadLocks
+
+
+async def _history_types(client: AsyncClient, thread_id: str) -> list:
+    history = (await client.get(f"/api/agent/history/{thread_id}")).json()["messages"]
+    return [m["type"] for m in history]
+
+
+@pytest.mark.asyncio
+async def test_advisory_lock_serializes_workers(agent_runtime):
+    """Test that a thread locked by one worker is rejected or waited for by another."""
+    worker_a, worker_b = ThreadLocks(), ThreadLocks()
+    try:
+        lease = await worker_a.acquire("thread-workers")
+        assert lease.advisory
+
+        with pytest.raises(ThreadBusyError):
+            await worker_b.acquire("thread-workers", policy="reject")
+
+        waiting = asyncio.create_task(worker_b.acquire("thread-workers", policy="queue"))
+        await asyncio.sleep(0.1)
+        assert not waiting.done()
+
+        await worker_a.release(lease)
+        other = await asyncio.wait_for(waiting, 2)
+        assert other.waited and other.advisory
+        await worker_b.release(other)
+
+        # Released locks are reusable, and no per-thread state is left behind
+        await worker_a.release(await worker_a.acquire("thread-workers"))
+        assert worker_a._locks == {} and worker_b._locks == {}
+    finally:
+        await worker_a.close()
+        await worker_b.close()
+
+
+@pytest.mark.asyncio
+async def test_lost_lock_connection_takes_the_locks_again(agent_runtime):
+    """Test that runs losing their advisory locks with the connection get them back."""
+    worker_a, worker_b = ThreadLocks(), ThreadLocks()
+    try:
+        lease = await worker_a.acquire("thread-relock")
+        pid = (await worker_a._conn.execute(text("SELECT pg_backend_pid()"))).scalar()
+        conn = await worker_b._connection()
+        await conn.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": pid})
+
+        # The next lock call finds the connection dead: the running thread's lock is gone too
+        other = await worker_a.acquire("thread-relock-2")
+        assert not other.advisory
+
+        await asyncio.wait_for(worker_a._relock_task, 5)
+        assert lease.advisory and other.advisory
+        with pytest.raises(ThreadBusyError):
+            await worker_b.acquire("thread-relock", policy="reject")
+
+        await worker_a.release(lease)
+        await worker_a.release(other)
+        await worker_b.release(await worker_b.acquire("thread-relock", policy="reject"))
+    finally:
+        await worker_a.close()
+        await worker_b.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_streams_on_one_thread_are_serialized(client: AsyncClient, agent_runtime):
+    """Test that queued runs on a thread produce whole turns in order."""
+    async def send(content: str):
+        return await client.get("/api/agent/stream", params={
+            "threadId": "thread-race", "content": content, "model": "fake:fast?tokens=5",
+        })
+
+    responses = await asyncio.gather(*(send(f"message {i}") for i in range(3)))
+
+    assert all('"status": "completed"' in r.text for r in responses)
+    assert await _history_types(client, "thread-race") == ["human", "ai"] * 3
+
+
+@pytest.mark.asyncio
+async def test_reject_and_cancel_policies(client: AsyncClient, agent_runtime, monkeypatch):
+    """Test that a busy thread rejects a run, or stops the run in progress."""
+    params = {"threadId": "thread-busy", "model": "fake:fast?tokens=40"}
+
+    monkeypatch.setattr(settings, "thread_run_policy", "reject")
+    first = asyncio.create_task(client.get("/api/agent/stream", params={**params, "content": "first"}))
+    await asyncio.sleep(0.1)
+    rejected = await client.get("/api/agent/stream", params={**params, "content": "second"})
+    assert "event: error" in rejected.text
+    assert "has a run in progress" in rejected.text
+    assert '"status": "completed"' in (await first).text
+
+    monkeypatch.setattr(settings, "thread_run_policy", "cancel")
+    first = asyncio.create_task(client.get("/api/agent/stream", params={**params, "content": "third"}))
+    await asyncio.sleep(0.1)
+    second = await client.get("/api/agent/stream", params={**params, "content": "fourth"})
+    assert '"status": "cancelled"' in (await first).text
+    assert '"status": "completed"' in second.text
@@ -0,0 +1,76 @@
+"""Test thread registration on the stream hot path."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import delete, select, func
+
+from app.models.thread import Thread
+from app.services import thread_service
+from app.services.thread_service import ensure_thread, delete_thread
+
+
+@pytest.fixture(autouse=True)
+def clear_known_threads():
+    """Start every test with an empty registration cache."""
+    thread_service._known_threads.clear()
+    yield
+    thread_service._known_threads.clear()
+
+
+async def _ensure_in_new_session(session_factory, thread_id: str, message: str):
+    async with session_factory() as session:
+        return await ensure_thread(session, thread_id, message)
+
+
+@pytest.mark.asyncio
+async def test_ensure_thread_creates_thread(db_session):
+    """Test that an unknown thread is created with a title from the first message."""
+    thread = await ensure_thread(db_session, "thread-1", "Plan a trip to Lisbon")
+
+    assert thread.id == "thread-1"
+    assert thread.title == "Plan a trip to Lisbon"
+    assert thread.updated_at is not None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_messages(session_factory, db_session):
+    """Test that concurrent registrations of the same thread do not race."""
+    results = await asyncio.gather(*[
+        _ensure_in_new_session(session_factory, "thread-race", f"message {i}")
+        for i in range(10)
+    ])
+
+    assert all(thread.id == "thread-race" for thread in results)
+
+    count = await db_session.execute(
+        select(func.count(Thread.id)).where(Thread.id == "thread-race")
+    )
+    assert count.scalar() == 1
+
+
+@pytest.mark.asyncio
+async def test_ensure_thread_bumps_updated_at(session_factory, db_session):
+    """Test that re-registering an existing thread keeps the title and bumps updatedAt."""
+    first = await _ensure_in_new_session(session_factory, "thread-2", "original title")
+    thread_service._known_threads.clear()
+    second = await _ensure_in_new_session(session_factory, "thread-2", "another message")
+
+    assert second.title == "original title"
+    assert second.updated_at > first.updated_at
+
+
+@pytest.mark.asyncio
+async def test_known_thread_is_not_bumped(db_session):
+    """Test that recently registered threads are not bumped again, but recreated once deleted."""
+    assert await ensure_thread(db_session, "thread-3", "hello") is not None
+    assert await ensure_thread(db_session, "thread-3", "hello again") is None
+
+    # Deleted by another worker: this process still remembers the thread
+    await db_session.execute(delete(Thread).where(Thread.id == "thread-3"))
+    await db_session.commit()
+    recreated = await ensure_thread(db_session, "thread-3", "hello once more")
+    assert recreated is not None and recreated.title == "hello once more"
+
+    assert await delete_thread(db_session, "thread-3") is True
+    assert "thread-3" not in thread_service._known_threads
@@ -0,0 +1,233 @@
+"""Test the tool approval policy engine, its API and its use in the approval node."""
+
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.types import Command
+
+from app.agent.approval import ToolPolicy, tool_server
+from app.agent.builder import AgentBuilder
+from app.agent.fake_llm import create_fake_model
+from app.config import settings
+from app.schemas.tool_policy import ToolPolicyRuleCreate, ToolPolicyRuleRead
+
+calls = []
+
+
+@tool
+def echo(input: str) -> str:
+    """Echo the input back."""
+    calls.append(("echo", input))
+    return f"echo: {input}"
+
+
+@tool
+def remove(path: str) -> str:
+    """Remove a path."""
+    calls.append(("remove", path))
+    return f"removed {path}"
+
+
+def _rule(action: str, **fields) -> ToolPolicyRuleRead:
+    now = datetime.now()
+    return ToolPolicyRuleRead(
+        id=fields.pop("id", f"{action}-{fields.get('tool', '*')}"),
+        action=action,
+        createdAt=now,
+        updatedAt=now,
+        **fields,
+    )
+
+
+def test_tool_server_from_prefixed_names():
+    """Test the server prefixes MCP clients add to tool names."""
+    assert tool_server("mcp__github__create_issue") == "github"
+    assert tool_server("github__create_issue") == "github"
+    assert tool_server("echo") is None
+
+
+def test_policy_rule_order_and_conditions():
+    """Test rule precedence, server rules and argument conditions."""
+    rules = [
+        _rule("allow", tool="*", server="files", id="files"),
+        _rule("deny", tool="files__delete", conditions=[{"arg": "path", "pattern": "^/etc/"}], id="etc"),
+        _rule("review", tool="files__delete", priority=-1, id="delete"),
+        _rule("allow", tool="files__delete", threadId="trusted", priority=-5, id="trusted"),
+        _rule("allow", tool="search", conditions=[{"arg": "options.limit", "equals": 5}], priority=1, id="limit"),
+        _rule("deny", tool="search", conditions=[{"arg": "query", "pattern": "secret", "negate": True}], id="off"),
+    ]
+    policy = ToolPolicy([r for r in rules if r.thread_id is None])
+
+    assert policy.evaluate("files__read", {"path": "/tmp/a"}).rule_id == "files"
+    assert policy.evaluate("files__delete", {"path": "/etc/passwd"}).action == "deny"
+    # Thread overrides come before every global rule
+    trusted = ToolPolicy([r for r in rules if r.thread_id in (None, "trusted")])
+    assert trusted.evaluate("files__delete", {"path": "/etc/passwd"}).rule_id == "trusted"
+
+    # Priority ties go to the stricter action
+    assert policy.evaluate("files__delete", {"path": "/tmp/a"}).rule_id == "files"
+    assert ToolPolicy([_rule("allow", tool="x"), _rule("deny", tool="x")]).evaluate("x", {}).action == "deny"
+
+    assert policy.evaluate("search", {"query": "a", "options": {"limit": 5}}).rule_id == "limit"
+    assert policy.evaluate("search", {"query": "a"}).rule_id == "off"
+    assert policy.evaluate("search", {"query": "my secret"}).action == "review"
+    assert policy.evaluate("other", {}, default_action="allow").action == "allow"
+
+
+def _agent(script: str = "tool:echo"):
+    return AgentBuilder(
+        tools=[echo, remove],
+        llm=create_fake_model(f"fake:instant?tokens=2&script={script}"),
+        checkpointer=MemorySaver(),
+    ).build()
+
+
+def test_pattern_safeguards(monkeypatch):
+    """Test that backtracking patterns are refused and long arguments fail closed."""
+    for pattern in ["(a+)+", r"(\w+\s?)*$", "(?:x|y{2,})*z"]:
+        with pytest.raises(ValueError, match="nested quantifiers"):
+            ToolPolicyRuleCreate(action="deny", conditions=[{"arg": "path", "pattern": pattern}])
+    ToolPolicyRuleCreate(action="deny", conditions=[{"arg": "ip", "pattern": r"^(\d{1,3}\.){3}\d{1,3}$"}])
+    # Rules saved before the check still load
+    _rule("deny", conditions=[{"arg": "path", "pattern": "(a+)+"}])
+
+    monkeypatch.setattr(settings, "tool_policy_max_match_length", 10)
+    rules = [
+        _rule("allow", tool="files__read", conditions=[{"arg": "path", "pattern": "^/tmp/"}], id="tmp"),
+        _rule("deny", tool="files__read", conditions=[{"arg": "path", "pattern": "^/etc/"}], id="etc"),
+    ]
+    policy = ToolPolicy(rules)
+    assert policy.evaluate("files__read", {"path": "/tmp/a"}).rule_id == "tmp"
+    assert policy.evaluate("files__read", {"path": "/tmp/" + "a" * 10}).rule_id == "etc"
+    assert ToolPolicy(rules[:1]).evaluate("files__read", {"path": "/tmp/" + "a" * 10}).action == "review"
+
+
+@pytest.mark.asyncio
+async def test_allowed_call_skips_the_interrupt():
+    """Test that a call allowed by policy runs without pausing the run."""
+    agent = _agent()
+    config = {"configurable": {"thread_id": "policy-allow", "tool_policy": ToolPolicy([_rule("allow", tool="echo")])}}
+
+    await agent.ainvoke({"messages": [HumanMessage(content="hi")]}, config)
+
+    state = await agent.aget_state(config)
+    assert state.next == ()
+    assert [m.type for m in state.values["messages"]] == ["human", "ai", "tool", "ai"]
+
+
+@pytest.mark.asyncio
+async def test_denied_call_is_not_executed():
+    """Test that policy and human denials become error tool messages."""
+    calls.clear()
+    agent = _agent()
+    policy = ToolPolicy([_rule("deny", tool="echo", reason="echo is disabled")])
+    config = {"configurable": {"thread_id": "policy-deny", "tool_policy": policy}}
+
+    await agent.ainvoke({"messages": [HumanMessage(content="hi")]}, config)
+
+    tool_message = (await agent.aget_state(config)).values["messages"][2]
+    assert tool_message.status == "error"
+    assert tool_message.content == "Tool call denied: echo is disabled"
+
+    config = {"configurable": {"thread_id": "human-deny"}}
+    await agent.ainvoke({"messages": [HumanMessage(content="hi")]}, config)
+    assert (await agent.aget_state(config)).next == ("tool_approval",)
+    await agent.ainvoke(Command(resume={"action": "deny"}), config)
+
+    messages = (await agent.aget_state(config)).values["messages"]
+    assert messages[2].content == "Tool call denied: Denied by the user"
+    assert messages[-1].type == "ai"
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_mixed_decisions_run_only_approved_calls():
+    """Test a message with an allowed, a denied and a reviewed call."""
+    calls.clear()
+    agent = _agent(script="text")
+    policy = ToolPolicy([
+        _rule("allow", tool="echo", conditions=[{"arg": "input", "equals": "safe"}], id="safe"),
+        _rule("deny", tool="remove", conditions=[{"arg": "path", "pattern": "^/etc"}], id="etc"),
+    ])
+    config = {"configurable": {"thread_id": "policy-mixed", "tool_policy": policy}}
+    await agent.aupdate_state(config, {"messages": [
+        HumanMessage(content="do things"),
+        AIMessage(content="", id="ai-1", tool_calls=[
+            {"id": "c1", "name": "echo", "args": {"input": "safe"}},
+            {"id": "c2", "name": "remove", "args": {"path": "/etc/hosts"}},
+            {"id": "c3", "name": "echo", "args": {"input": "check me"}},
+        ]),
+    ]}, as_node="agent")
+
+    await agent.ainvoke(None, config)
+    state = await agent.aget_state(config)
+    assert state.tasks[0].interrupts[0].value["toolCall"]["id"] == "c3"
+
+    await agent.ainvoke(Command(resume={"action": "update", "data": {"input": "edited"}}), config)
+
+    messages = (await agent.aget_state(config)).values["messages"]
+    results = {m.tool_call_id: m for m in messages if m.type == "tool"}
+    assert results["c2"].status == "error"
+    assert results["c1"].content == "echo: safe"
+    assert results["c3"].content == "echo: edited"
+    assert sorted(calls) == [("echo", "edited"), ("echo", "safe")]
+    assert messages[1].tool_calls[2]["args"] == {"input": "edited"}
+
+
+@pytest.mark.asyncio
+async def test_policy_api_and_stream(client: AsyncClient, agent_runtime):
+    """Test rule CRUD and a streamed run allowed by a thread override."""
+    params = {"threadId": "thread-policy", "model": "fake:instant?tokens=2&script=tool:lookup,text"}
+    await client.get("/api/agent/stream", params={**params, "content": "first"})
+
+    response = await client.post("/api/tool-policies", json={
+        "action": "allow", "tool": "look*", "threadId": "thread-policy",
+        "conditions": [{"arg": "input", "pattern": "."}],
+    })
+    assert response.status_code == 201
+    rule = response.json()
+    assert rule["threadId"] == "thread-policy"
+
+    bad = await client.post("/api/tool-policies", json={"action": "allow", "conditions": [{"arg": "x"}]})
+    assert bad.status_code == 422
+    slow = await client.post("/api/tool-policies", json={
+        "action": "deny", "conditions": [{"arg": "x", "pattern": "(a*)*b"}],
+    })
+    assert slow.status_code == 422
+    slow = await client.put(f"/api/tool-policies/{rule['id']}", json={
+        "conditions": [{"arg": "x", "pattern": "(a*)*b"}],
+    })
+    assert slow.status_code == 422
+    missing = await client.post("/api/tool-policies", json={"action": "allow", "threadId": "nope"})
+    assert missing.status_code == 404
+
+    listed = (await client.get("/api/tool-policies", params={"threadId": "thread-policy"})).json()
+    assert [r["id"] for r in listed["rules"]] == [rule["id"]]
+
+    response = await client.get("/api/agent/stream", params={**params, "content": "second"})
+    assert "event: approval_required" not in response.text
+    assert "event: tool_result" in response.text
+
+    updated = await client.put(f"/api/tool-policies/{rule['id']}", json={"action": "deny", "reason": "no lookups"})
+    assert updated.json()["action"] == "deny"
+    response = await client.get("/api/agent/stream", params={**params, "content": "third"})
+    assert "Tool call denied: no lookups" in response.text
+
+    assert (await client.delete(f"/api/tool-policies/{rule['id']}")).status_code == 204
+    assert (await client.get(f"/api/tool-policies/{rule['id']}")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_stream_deny_resume(client: AsyncClient, agent_runtime):
+    """Test that allowTool=deny denies the pending call instead of running it with empty args."""
+    params = {"threadId": "thread-deny", "model": "fake:instant?tokens=2&script=tool:lookup,text"}
+    response = await client.get("/api/agent/stream", params={**params, "content": "look"})
+    assert "event: approval_required" in response.text
+
+    response = await client.get("/api/agent/stream", params={**params, "content": "", "allowTool": "deny"})
+    assert "Tool call denied: Denied by the user" in response.text
+    assert '"status": "completed"' in response.text
@@ -0,0 +1,79 @@
+"""Test tracing spans exported for an agent stream."""
+
+import json
+
+import pytest
+from httpx import AsyncClient
+from opentelemetry import trace
+from opentelemetry.util._once import Once
+from sqlalchemy import event
+
+from app.config import settings
+from app.database import engine
+from app.telemetry import tracing
+
+
+@pytest.fixture
+def tracing_enabled():
+    """Tear tracing down after the test, so later tests do not run traced."""
+    yield
+    exporter = tracing._exporter
+    tracing.shutdown_tracing()
+
+    assert tracing._provider is None
+    assert exporter.trace_file.closed
+    assert not event.contains(engine.sync_engine, "before_cursor_execute", tracing._before_cursor_execute)
+
+    # The global provider can only be set once per process, and the app's proxy
+    # tracer caches the provider's tracer: reset both to the no-op defaults
+    trace._TRACER_PROVIDER = None
+    trace._TRACER_PROVIDER_SET_ONCE = Once()
+    tracing.tracer._real_tracer = None
+
+
+@pytest.mark.asyncio
+async def test_stream_spans_exported_to_file(
+    client: AsyncClient, agent_runtime, tracing_enabled, tmp_path, monkeypatch,
+):
+    """Test the span tree from the router through graph nodes, model, checkpoints and SQL."""
+    trace_file = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "tracing_exporter", "file")
+    monkeypatch.setattr(settings, "tracing_file", str(trace_file))
+    assert tracing.setup_tracing()
+
+    response = await client.get("/api/agent/stream", params={
+        "content": "trace this",
+        "threadId": "thread-traced",
+        "model": "fake:instant?tokens=3",
+    })
+    assert "event: done" in response.text
+    tracing._provider.force_flush()
+
+    spans = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    by_name = {}
+    for span in spans:
+        by_name.setdefault(span["name"], []).append(span)
+    by_id = {span["context"]["span_id"]: span for span in spans}
+
+    def parent_name(span):
+        return by_id[span["parent_id"]]["name"] if span["parent_id"] in by_id else None
+
+    root = by_name["GET /api/agent/stream"][0]
+    stream = by_name["stream_response"][0]
+    assert parent_name(stream) == root["name"]
+    assert stream["attributes"]["thread_id"] == "thread-traced"
+    assert stream["attributes"]["outcome"] == "ok"
+
+    for name in ("ensure_thread", "ensure_agent", "prefetch_checkpoint", "node agent"):
+        assert parent_name(by_name[name][0]) == "stream_response"
+
+    node = by_name["node agent"][0]
+    assert node["attributes"]["thread_id"] == "thread-traced"
+    assert node["attributes"]["run_id"] == stream["attributes"]["run_id"]
+    assert [parent_name(s) for s in by_name["llm fake:instant"]] == ["node agent"]
+
+    assert "checkpoint.put" in by_name
+    assert any(
+        name.startswith("sql ") and parent_name(s) == "ensure_thread"
+        for name, group in by_name.items() for s in group
+    )
@@ -0,0 +1,49 @@
+"""Test startup warm-up and readiness gating."""
+
+import pytest
+from httpx import AsyncClient
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from psycopg_pool import AsyncConnectionPool
+
+from app.agent.memory import get_checkpoint_schema_version
+from app.warmup import warmup_state
+from tests.conftest import TEST_DATABASE_URL
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_schema_version():
+    """Test that the schema version is read without running migrations."""
+    conninfo = TEST_DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+    pool = AsyncConnectionPool(conninfo, min_size=1, max_size=1, open=False,
+                               kwargs={"autocommit": True})
+    await pool.open(wait=True)
+    try:
+        async with pool.connection() as conn:
+            await conn.execute(
+                "DROP TABLE IF EXISTS checkpoint_migrations, checkpoints, "
+                "checkpoint_blobs, checkpoint_writes"
+            )
+        assert await get_checkpoint_schema_version(pool) == -1
+
+        await AsyncPostgresSaver(pool).setup()
+        assert await get_checkpoint_schema_version(pool) == len(AsyncPostgresSaver.MIGRATIONS) - 1
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_readiness_waits_for_warmup(client: AsyncClient, monkeypatch):
+    """Test that /ready reports 503 until warm-up has finished."""
+    monkeypatch.setattr(warmup_state, "duration", None)
+    monkeypatch.setattr(warmup_state, "steps", {"checkpointer": "pending"})
+
+    response = await client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "warming_up"
+
+    monkeypatch.setattr(warmup_state, "duration", 0.5)
+    monkeypatch.setattr(warmup_state, "steps", {"checkpointer": "ok"})
+
+    response = await client.get("/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready", "warmup": {"checkpointer": "ok"}}
@@ -0,0 +1,80 @@
+-- Tables owned by the backend (app/models); created by SQLAlchemy's create_all only in development
+
+-- CreateEnum
+CREATE TYPE "toolpolicyaction" AS ENUM ('allow', 'deny', 'review');
+
+-- CreateTable
+CREATE TABLE "ThreadSearchEntry" (
+    "id" TEXT NOT NULL,
+    "threadId" TEXT NOT NULL,
+    "messageId" TEXT NOT NULL,
+    "role" TEXT NOT NULL,
+    "content" TEXT NOT NULL,
+    "searchVector" tsvector NOT NULL GENERATED ALWAYS AS (setweight(to_tsvector('english', content), CASE WHEN role = 'title' THEN 'A' ELSE 'B' END::"char")) STORED,
+    "createdAt" TIMESTAMPTZ(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "ThreadSearchEntry_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateTable
+CREATE TABLE "ToolPolicyRule" (
+    "id" TEXT NOT NULL,
+    "action" "toolpolicyaction" NOT NULL,
+    "tool" TEXT NOT NULL DEFAULT '*',
+    "server" TEXT,
+    "conditions" JSON,
+    "threadId" TEXT,
+    "priority" INTEGER NOT NULL DEFAULT 0,
+    "enabled" BOOLEAN NOT NULL DEFAULT true,
+    "reason" TEXT,
+    "createdAt" TIMESTAMPTZ(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMPTZ(3) NOT NULL,
+
+    CONSTRAINT "ToolPolicyRule_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateTable
+CREATE TABLE "PendingApproval" (
+    "id" TEXT NOT NULL,
+    "threadId" TEXT NOT NULL,
+    "toolCallId" TEXT NOT NULL,
+    "toolName" TEXT NOT NULL,
+    "args" JSON NOT NULL,
+    "createdAt" TIMESTAMPTZ(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "PendingApproval_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateTable
+CREATE TABLE "IdempotencyKey" (
+    "key" TEXT NOT NULL,
+    "fingerprint" TEXT NOT NULL,
+    "createdAt" TIMESTAMPTZ(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "finishedAt" TIMESTAMPTZ(3),
+
+    CONSTRAINT "IdempotencyKey_pkey" PRIMARY KEY ("key")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "ThreadSearchEntry_threadId_messageId_key" ON "ThreadSearchEntry"("threadId", "messageId");
+
+-- CreateIndex
+CREATE INDEX "ThreadSearchEntry_searchVector_idx" ON "ThreadSearchEntry" USING GIN ("searchVector");
+
+-- CreateIndex
+CREATE INDEX "ix_ToolPolicyRule_threadId" ON "ToolPolicyRule"("threadId");
+
+-- CreateIndex
+CREATE INDEX "ix_PendingApproval_threadId" ON "PendingApproval"("threadId");
+
+-- CreateIndex
+CREATE INDEX "ix_PendingApproval_createdAt" ON "PendingApproval"("createdAt");
+
+-- AddForeignKey
+ALTER TABLE "ThreadSearchEntry" ADD CONSTRAINT "ThreadSearchEntry_threadId_fkey" FOREIGN KEY ("threadId") REFERENCES "Thread"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "ToolPolicyRule" ADD CONSTRAINT "ToolPolicyRule_threadId_fkey" FOREIGN KEY ("threadId") REFERENCES "Thread"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "PendingApproval" ADD CONSTRAINT "PendingApproval_threadId_fkey" FOREIGN KEY ("threadId") REFERENCES "Thread"("id") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -1,4 +1,10 @@
-import type { MessageResponse, ToolApprovalCallbacks } from "@/types/message";
+import type {
+  AIMessageData,
+  ApprovalRequiredData,
+  MessageResponse,
+  RunStatus,
+  ToolApprovalCallbacks,
+} from "@/types/message";
 import { HumanMessage } from "./HumanMessage";
 import { AIMessage } from "./AIMessage";
 import { ErrorMessage } from "./ErrorMessage";
@@ -17,9 +23,16 @@ const ToolMessage = dynamic(() => import("./ToolMessage").then((m) => m.ToolMess
 interface MessageListProps {
   messages: MessageResponse[];
   approveToolExecution?: (toolCallId: string, action: "allow" | "deny") => Promise<void>;
+  pendingApproval?: ApprovalRequiredData | null;
+  runStatus?: RunStatus | null;
 }
 
-const MessageList = ({ messages, approveToolExecution }: MessageListProps) => {
+const MessageList = ({
+  messages,
+  approveToolExecution,
+  pendingApproval,
+  runStatus,
+}: MessageListProps) => {
   const bottomRef = useRef<HTMLDivElement | null>(null);
   const { hideToolMessages } = useUISettings();
 
@@ -43,6 +56,15 @@ const MessageList = ({ messages, approveToolExecution }: MessageListProps) => {
     return acc;
   }, []);
 
+  // After a stream, approval_required/run_end say which message (if any) awaits a decision;
+  // history loaded from the server has no run status, so the latest AI message gets the buttons
+  const showApprovalButtons = (message: MessageResponse, index: number) => {
+    if (!runStatus) return index === messages.length - 1;
+    const toolCallId = pendingApproval?.tool_call?.id;
+    if (!toolCallId) return false;
+    return !!(message.data as AIMessageData).tool_calls?.some((tc) => tc.id === toolCallId);
+  };
+
   return (
     <div className="mx-auto w-full max-w-3xl space-y-6">
       {uniqueMessages.map((message, index) => {
@@ -53,7 +75,7 @@ const MessageList = ({ messages, approveToolExecution }: MessageListProps) => {
             <AIMessage
               key={getMessageId(message)}
               message={message}
-              showApprovalButtons={index === messages.length - 1} // Show buttons only on the latest AI message
+              showApprovalButtons={showApprovalButtons(message, index)}
               approvalCallbacks={approvalCallbacks}
             />
           );
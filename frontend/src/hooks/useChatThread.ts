@@ -1,6 +1,16 @@
 import { useCallback, useEffect, useRef, useState } from "react";
 import { useQuery, useQueryClient } from "@tanstack/react-query";
-import type { MessageOptions, MessageResponse, AIMessageData } from "@/types/message";
+import type {
+  MessageOptions,
+  MessageResponse,
+  AIMessageData,
+  ToolMessageData,
+  ToolCallStartData,
+  ToolCallDeltaData,
+  ApprovalRequiredData,
+  RunEndData,
+  RunStatus,
+} from "@/types/message";
 import { createMessageStream, fetchMessageHistory } from "@/services/chatService";
 
 interface UseChatThreadOptions {
@@ -16,6 +26,8 @@ export interface UseChatThreadReturn {
   sendMessage: (text: string, opts?: MessageOptions) => Promise<void>;
   refetchMessages: () => Promise<unknown>;
   approveToolExecution: (toolCallId: string, action: "allow" | "deny") => Promise<void>;
+  pendingApproval: ApprovalRequiredData | null;
+  runStatus: RunStatus | null;
 }
 
 export function useChatThread({ threadId }: UseChatThreadOptions): UseChatThreadReturn {
@@ -24,6 +36,10 @@ export function useChatThread({ threadId }: UseChatThreadOptions): UseChatThread
   const currentMessageRef = useRef<MessageResponse | null>(null);
   const [sendError, setSendError] = useState<Error | null>(null);
   const [isSending, setIsSending] = useState(false);
+  // Raw argument fragments of the tool calls being streamed, by tool call id
+  const toolArgsRef = useRef<Record<string, string>>({});
+  const [pendingApproval, setPendingApproval] = useState<ApprovalRequiredData | null>(null);
+  const [runStatus, setRunStatus] = useState<RunStatus | null>(null);
 
   const {
     data: messages = [],
@@ -50,6 +66,9 @@ export function useChatThread({ threadId }: UseChatThreadOptions): UseChatThread
 
       setIsSending(true);
       setSendError(null);
+      setPendingApproval(null);
+      setRunStatus(null);
+      toolArgsRef.current = {};
 
       // If another stream is active, close it before starting a new one
       if (streamRef.current) {
@@ -91,8 +110,9 @@ export function useChatThread({ threadId }: UseChatThreadOptions): UseChatThread
                 data: {
                   ...currentData,
                   content: newContent,
-                  // Update tool call data if present
-                  ...(data.tool_calls && { tool_calls: data.tool_calls }),
+                  // Update tool call data if present (content chunks carry an empty list, which
+                  // would drop the calls added by tool_call events)
+                  ...(data.tool_calls?.length ? { tool_calls: data.tool_calls } : {}),
                   ...(data.additional_kwargs && { additional_kwargs: data.additional_kwargs }),
                   ...(data.response_metadata && { response_metadata: data.response_metadata }),
                 },
@@ -116,6 +136,116 @@ export function useChatThread({ threadId }: UseChatThreadOptions): UseChatThread
           }
         };
 
+        // Replace the in-flight assistant message in the cache, or append it if it is new
+        const upsertCurrentMessage = () => {
+          queryClient.setQueryData(["messages", threadId], (old: MessageResponse[] = []) => {
+            const oldMessages = Array.isArray(old) ? old : [];
+            const idx = oldMessages.findIndex((m) => m.data?.id === currentMessageRef.current!.data.id);
+            if (idx === -1) return [...oldMessages, currentMessageRef.current!];
+            const clone = [...oldMessages];
+            clone[idx] = currentMessageRef.current!;
+            return clone;
+          });
+        };
+
+        stream.addEventListener("tool_call", (event: MessageEvent) => {
+          try {
+            // The model started a tool call: show it before its arguments arrive
+            const data = JSON.parse(event.data) as ToolCallStartData;
+            if (!currentMessageRef.current || currentMessageRef.current.data.id !== data.message_id) {
+              currentMessageRef.current = { type: "ai", data: { id: data.message_id, content: "" } };
+            }
+            const currentData = currentMessageRef.current.data as AIMessageData;
+            const toolCalls = (currentData.tool_calls ?? []).filter((tc) => tc.id !== data.id);
+            toolArgsRef.current[data.id] = "";
+            currentMessageRef.current = {
+              ...currentMessageRef.current,
+              data: {
+                ...currentData,
+                tool_calls: [...toolCalls, { id: data.id, name: data.name, args: {}, type: "tool_call" }],
+              },
+            };
+            upsertCurrentMessage();
+          } catch {
+            // Ignore malformed events to keep the stream alive
+          }
+        });
+
+        stream.addEventListener("tool_call_delta", (event: MessageEvent) => {
+          try {
+            // Accumulate argument fragments; show the arguments once they parse as JSON
+            const data = JSON.parse(event.data) as ToolCallDeltaData;
+            const raw = (toolArgsRef.current[data.id] ?? "") + data.args;
+            toolArgsRef.current[data.id] = raw;
+            if (!currentMessageRef.current) return;
+            let args: Record<string, unknown>;
+            try {
+              args = JSON.parse(raw);
+            } catch {
+              return; // Incomplete JSON: wait for the next fragment
+            }
+            const currentData = currentMessageRef.current.data as AIMessageData;
+            if (!currentData.tool_calls?.some((tc) => tc.id === data.id)) return;
+            currentMessageRef.current = {
+              ...currentMessageRef.current,
+              data: {
+                ...currentData,
+                tool_calls: (currentData.tool_calls ?? []).map((tc) => (tc.id === data.id ? { ...tc, args } : tc)),
+              },
+            };
+            upsertCurrentMessage();
+          } catch {
+            // Ignore malformed events to keep the stream alive
+          }
+        });
+
+        stream.addEventListener("approval_required", (event: MessageEvent) => {
+          try {
+            // The run paused on a tool call: the approval buttons come from this event
+            setPendingApproval(JSON.parse(event.data) as ApprovalRequiredData);
+          } catch {
+            // Ignore malformed events to keep the stream alive
+          }
+        });
+
+        stream.addEventListener("run_end", (event: MessageEvent) => {
+          try {
+            const data = JSON.parse(event.data) as RunEndData;
+            setRunStatus(data.status);
+            // Only an interrupted run still waits for a decision
+            if (data.status !== "interrupted") setPendingApproval(null);
+            if (data.status === "ignored") {
+              // The thread had no tool call waiting for approval (already resolved elsewhere)
+              const notice: MessageResponse = {
+                type: "error",
+                data: { id: `ignored-${Date.now()}`, content: "⚠️ No tool call is waiting for approval." },
+              };
+              queryClient.setQueryData(["messages", threadId], (old: MessageResponse[] = []) => {
+                const oldMessages = Array.isArray(old) ? old : [];
+                return [...oldMessages, notice];
+              });
+            }
+          } catch {
+            // Ignore malformed events to keep the stream alive
+          }
+        });
+
+        stream.addEventListener("tool_result", (event: MessageEvent) => {
+          try {
+            // Tool results arrive as a named event: append them as tool messages
+            const data = JSON.parse(event.data) as ToolMessageData;
+            const toolMessage: MessageResponse = { type: "tool", data };
+            // The next tokens belong to a new assistant message
+            currentMessageRef.current = null;
+            queryClient.setQueryData(["messages", threadId], (old: MessageResponse[] = []) => {
+              const oldMessages = Array.isArray(old) ? old : [];
+              return [...oldMessages, toolMessage];
+            });
+          } catch {
+            // Ignore malformed events to keep the stream alive
+          }
+        });
+
         stream.addEventListener("done", async () => {
           // Stream finished: clear flags and close
           setIsSending(false);
@@ -217,5 +347,7 @@ export function useChatThread({ threadId }: UseChatThreadOptions): UseChatThread
     sendMessage,
     refetchMessages: refetchMessagesQuery,
     approveToolExecution,
+    pendingApproval,
+    runStatus,
   };
 }
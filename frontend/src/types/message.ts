@@ -72,6 +72,36 @@ export interface BasicMessageData {
   content: string;
 }
 
+// Named SSE events sent next to the message chunks of a stream
+
+export interface ToolCallStartData {
+  id: string;
+  message_id: string;
+  name: string;
+  index: number;
+}
+
+export interface ToolCallDeltaData {
+  id: string;
+  index: number;
+  args: string; // fragment of the tool call's JSON arguments
+}
+
+export interface ApprovalRequiredData {
+  thread_id: string;
+  value: Record<string, unknown>;
+  tool_call?: ToolCall | null;
+  resumable: boolean;
+}
+
+export type RunStatus = "completed" | "interrupted" | "cancelled" | "ignored";
+
+export interface RunEndData {
+  thread_id: string;
+  status: RunStatus;
+  tokens: number;
+}
+
 export interface ToolApprovalCallbacks {
   onApprove: (toolCallId: string) => void;
   onDeny: (toolCallId: string) => void;